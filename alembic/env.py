@@ -13,7 +13,9 @@ config = context.config
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-if config.config_file_name is not None:
+# Skipped when the app runs migrations in-process with its own logging.
+if config.config_file_name is not None and \
+        "connection" not in config.attributes:
     fileConfig(config.config_file_name)
 
 # Ensure app modules are importable when running Alembic.
@@ -25,16 +27,19 @@ if PROJECT_SRC not in sys.path:
 from sqlmodel import SQLModel  # noqa: E402
 
 from lib.env import env  # noqa: E402
+from lib.migrations import migration_namespace  # noqa: E402
 from models import (academic_class, academic_class_subject,  # noqa: F401, E402
                     academic_class_subject_term, academic_session,
                     academic_term, app_settings, date_sheet,
-                    date_sheet_subject, enrollment, gk_competition_student,
-                    report_card, report_card_subject, student, subject, user)
+                    date_sheet_subject, enrollment, gk_competition_rank,
+                    gk_competition_student, report_card, report_card_subject,
+                    student, subject, user)
 
 _ = [academic_class, academic_class_subject,
      academic_class_subject_term, academic_session, academic_term,
      app_settings, date_sheet, date_sheet_subject, enrollment, report_card,
-     report_card_subject, student, subject, user, gk_competition_student]
+     report_card_subject, student, subject, user, gk_competition_student,
+     gk_competition_rank]
 
 # Use SQLModel metadata for autogenerate support.
 target_metadata = SQLModel.metadata
@@ -91,26 +96,37 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    namespace = _normalize_db_namespace(migration_namespace())
+
+    # The app passes a connection from its own engine when migrating
+    # in-process (see lib/test_operations.py).
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_migrations_with_connection(connection, namespace)
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
         poolclass=pool.NullPool,
     )
 
-    namespace = _normalize_db_namespace(os.getenv("DB_NAMESPACE"))
-
     with connectable.connect() as connection:
-        configure_kwargs = {
-            "connection": connection,
-            "target_metadata": target_metadata,
-        }
-        if namespace:
-            configure_kwargs["version_table_schema"] = namespace
+        _run_migrations_with_connection(connection, namespace)
+
 
-        context.configure(**configure_kwargs)
+def _run_migrations_with_connection(connection, namespace) -> None:
+    configure_kwargs = {
+        "connection": connection,
+        "target_metadata": target_metadata,
+    }
+    if namespace:
+        configure_kwargs["version_table_schema"] = namespace
 
-        with context.begin_transaction():
-            context.run_migrations()
+    context.configure(**configure_kwargs)
+
+    with context.begin_transaction():
+        context.run_migrations()
 
 
 if context.is_offline_mode():
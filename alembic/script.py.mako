@@ -9,6 +9,7 @@ from typing import Sequence, Union
 
 from alembic import op
 import sqlalchemy as sa
+from lib.migrations import migration_namespace
 ${imports if imports else ""}
 
 # revision identifiers, used by Alembic.
@@ -17,6 +18,8 @@ down_revision: Union[str, Sequence[str], None] = ${repr(down_revision)}
 branch_labels: Union[str, Sequence[str], None] = ${repr(branch_labels)}
 depends_on: Union[str, Sequence[str], None] = ${repr(depends_on)}
 
+_SCHEMA = migration_namespace()
+
 
 def upgrade() -> None:
     """Upgrade schema."""
@@ -5,12 +5,12 @@ Revises: b2f7c7fd1a8d
 Create Date: 2026-01-21 00:40:41.901665
 
 """
-import os
 from typing import Sequence, Union
 
 import sqlalchemy as sa
 
 from alembic import op
+from lib.migrations import migration_namespace
 
 # revision identifiers, used by Alembic.
 revision: str = '10ff0c19842f'
@@ -18,7 +18,7 @@ down_revision: Union[str, Sequence[str], None] = 'b2f7c7fd1a8d'
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
-_SCHEMA = os.getenv("DB_NAMESPACE") or None
+_SCHEMA = migration_namespace()
 def _fk_target(target: str) -> str:
     if not _SCHEMA:
         return target
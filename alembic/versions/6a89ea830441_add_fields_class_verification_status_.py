@@ -5,12 +5,12 @@ Revises: 886d0c10abee
 Create Date: 2026-02-26 13:28:15.182324
 
 """
-import os
 from typing import Sequence, Union
 
 import sqlalchemy as sa
 
 from alembic import op
+from lib.migrations import migration_namespace
 
 # revision identifiers, used by Alembic.
 revision: str = '6a89ea830441'
@@ -18,7 +18,7 @@ down_revision: Union[str, Sequence[str], None] = '886d0c10abee'
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
-_SCHEMA = os.getenv("DB_NAMESPACE") or None
+_SCHEMA = migration_namespace()
 
 
 def upgrade() -> None:
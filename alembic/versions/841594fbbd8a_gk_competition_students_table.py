@@ -5,10 +5,10 @@ Revises: 10ff0c19842f
 Create Date: 2026-02-05 23:40:43.888038
 
 """
-import os
 from typing import Sequence, Union
 
 from alembic import op
+from lib.migrations import migration_namespace
 import sqlalchemy as sa
 
 
@@ -18,7 +18,7 @@ down_revision: Union[str, Sequence[str], None] = '10ff0c19842f'
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
-_SCHEMA = os.getenv("DB_NAMESPACE") or None
+_SCHEMA = migration_namespace()
 
 
 def upgrade() -> None:
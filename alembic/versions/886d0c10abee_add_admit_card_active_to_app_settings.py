@@ -5,12 +5,12 @@ Revises: b86f78d6f959
 Create Date: 2026-02-16 18:47:48.166107
 
 """
-import os
 from typing import Sequence, Union
 
 import sqlalchemy as sa
 
 from alembic import op
+from lib.migrations import migration_namespace
 
 # revision identifiers, used by Alembic.
 revision: str = '886d0c10abee'
@@ -18,7 +18,7 @@ down_revision: Union[str, Sequence[str], None] = 'b86f78d6f959'
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
-_SCHEMA = os.getenv("DB_NAMESPACE") or None
+_SCHEMA = migration_namespace()
 
 
 def upgrade() -> None:
@@ -5,12 +5,12 @@ Revises: 6a89ea830441
 Create Date: 2026-03-06 11:05:00.000000
 
 """
-import os
 from typing import Sequence, Union
 
 import sqlalchemy as sa
 
 from alembic import op
+from lib.migrations import migration_namespace
 
 # revision identifiers, used by Alembic.
 revision: str = "a3c4f8d2b1e0"
@@ -18,7 +18,7 @@ down_revision: Union[str, Sequence[str], None] = "6a89ea830441"
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
-_SCHEMA = os.getenv("DB_NAMESPACE") or None
+_SCHEMA = migration_namespace()
 
 
 def upgrade() -> None:
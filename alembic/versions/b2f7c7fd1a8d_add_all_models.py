@@ -5,12 +5,12 @@ Revises:
 Create Date: 2026-01-15 19:55:35.215789
 
 """
-import os
 from typing import Sequence, Union
 
 import sqlalchemy as sa
 
 from alembic import op
+from lib.migrations import migration_namespace
 
 # revision identifiers, used by Alembic.
 revision: str = 'b2f7c7fd1a8d'
@@ -18,7 +18,7 @@ down_revision: Union[str, Sequence[str], None] = None
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
-_SCHEMA = os.getenv("DB_NAMESPACE") or None
+_SCHEMA = migration_namespace()
 print('_SCHEMA', _SCHEMA)
 
 
@@ -5,12 +5,12 @@ Revises: 841594fbbd8a
 Create Date: 2026-02-06 20:59:04.916849
 
 """
-import os
 from typing import Sequence, Union
 
 import sqlalchemy as sa
 
 from alembic import op
+from lib.migrations import migration_namespace
 
 # revision identifiers, used by Alembic.
 revision: str = 'b86f78d6f959'
@@ -18,7 +18,7 @@ down_revision: Union[str, Sequence[str], None] = '841594fbbd8a'
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
-_SCHEMA = os.getenv("DB_NAMESPACE") or None
+_SCHEMA = migration_namespace()
 
 
 def upgrade() -> None:
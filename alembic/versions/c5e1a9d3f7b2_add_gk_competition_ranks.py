@@ -0,0 +1,121 @@
+"""add_gk_competition_ranks
+
+Revision ID: c5e1a9d3f7b2
+Revises: a3c4f8d2b1e0
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from lib.migrations import migration_namespace
+
+# revision identifiers, used by Alembic.
+revision: str = "c5e1a9d3f7b2"
+down_revision: Union[str, Sequence[str], None] = "a3c4f8d2b1e0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_SCHEMA = migration_namespace()
+
+
+def _fk_target(target: str) -> str:
+    if not _SCHEMA:
+        return target
+    return f"{_SCHEMA}.{target}"
+
+
+def _table(name: str) -> str:
+    if not _SCHEMA:
+        return name
+    return f'"{_SCHEMA}".{name}'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "gk_competition_ranks",
+        sa.Column("gk_competition_student_id", sa.UUID(), nullable=False),
+        sa.Column("marks", sa.Integer(), nullable=False),
+        sa.Column("group", sa.String(), nullable=False),
+        sa.Column("class_name", sa.String(), nullable=False),
+        sa.Column("overall_rank", sa.Integer(), nullable=False),
+        sa.Column("overall_percentile", sa.Float(), nullable=False),
+        sa.Column("group_rank", sa.Integer(), nullable=False),
+        sa.Column("group_percentile", sa.Float(), nullable=False),
+        sa.Column("class_rank", sa.Integer(), nullable=False),
+        sa.Column("class_percentile", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["gk_competition_student_id"],
+            [_fk_target("gk_competition_students.id")],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("gk_competition_student_id"),
+        schema=_SCHEMA,
+    )
+    op.create_index(
+        "ix_gk_competition_ranks_overall_rank",
+        "gk_competition_ranks",
+        ["overall_rank"],
+        schema=_SCHEMA,
+    )
+    op.create_index(
+        "ix_gk_competition_ranks_group_rank",
+        "gk_competition_ranks",
+        ["group", "group_rank"],
+        schema=_SCHEMA,
+    )
+    op.create_index(
+        "ix_gk_competition_ranks_class_rank",
+        "gk_competition_ranks",
+        ["class_name", "class_rank"],
+        schema=_SCHEMA,
+    )
+    # Rank the results that were published before this table existed.
+    # Deliberately a copy of REBUILD_GK_COMPETITION_RANKS in
+    # routers/gk_competition_students.py: a migration must keep doing what
+    # it did when it was written, whatever the app code changes to later.
+    op.execute(
+        f"""
+        INSERT INTO {_table("gk_competition_ranks")} (
+            gk_competition_student_id, marks, "group", class_name,
+            overall_rank, overall_percentile, group_rank, group_percentile,
+            class_rank, class_percentile
+        )
+        SELECT
+            id, marks, "group", class_name,
+            dense_rank() OVER (ORDER BY marks DESC),
+            round((100 * (1 - percent_rank() OVER (
+                ORDER BY marks DESC)))::numeric, 2),
+            dense_rank() OVER (PARTITION BY "group" ORDER BY marks DESC),
+            round((100 * (1 - percent_rank() OVER (
+                PARTITION BY "group" ORDER BY marks DESC)))::numeric, 2),
+            dense_rank() OVER (PARTITION BY class_name ORDER BY marks DESC),
+            round((100 * (1 - percent_rank() OVER (
+                PARTITION BY class_name ORDER BY marks DESC)))::numeric, 2)
+        FROM {_table("gk_competition_students")}
+        WHERE marks IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_gk_competition_ranks_class_rank",
+        table_name="gk_competition_ranks",
+        schema=_SCHEMA,
+    )
+    op.drop_index(
+        "ix_gk_competition_ranks_group_rank",
+        table_name="gk_competition_ranks",
+        schema=_SCHEMA,
+    )
+    op.drop_index(
+        "ix_gk_competition_ranks_overall_rank",
+        table_name="gk_competition_ranks",
+        schema=_SCHEMA,
+    )
+    op.drop_table("gk_competition_ranks", schema=_SCHEMA)
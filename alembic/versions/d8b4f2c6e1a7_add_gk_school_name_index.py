@@ -0,0 +1,40 @@
+"""add_gk_school_name_index
+
+Revision ID: d8b4f2c6e1a7
+Revises: c5e1a9d3f7b2
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from lib.migrations import migration_namespace
+
+# revision identifiers, used by Alembic.
+revision: str = "d8b4f2c6e1a7"
+down_revision: Union[str, Sequence[str], None] = "c5e1a9d3f7b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_SCHEMA = migration_namespace()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_gk_competition_students_trim_school_name",
+        "gk_competition_students",
+        [sa.text("trim(school_name)")],
+        schema=_SCHEMA,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_gk_competition_students_trim_school_name",
+        table_name="gk_competition_students",
+        schema=_SCHEMA,
+    )
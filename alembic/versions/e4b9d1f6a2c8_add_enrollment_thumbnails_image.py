@@ -0,0 +1,36 @@
+"""add_enrollment_thumbnails_image
+
+Revision ID: e4b9d1f6a2c8
+Revises: d8b4f2c6e1a7
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from lib.migrations import migration_namespace
+
+# revision identifiers, used by Alembic.
+revision: str = "e4b9d1f6a2c8"
+down_revision: Union[str, Sequence[str], None] = "d8b4f2c6e1a7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_SCHEMA = migration_namespace()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing photos serve the original until they are backfilled.
+    op.add_column(
+        "enrollments",
+        sa.Column("thumbnails_image", sa.String(), nullable=True),
+        schema=_SCHEMA,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("enrollments", "thumbnails_image", schema=_SCHEMA)
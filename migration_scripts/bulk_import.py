@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+from uuid import uuid4
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORT_DIFFS = 500
+
+ACTIONS = ("created", "updated", "unchanged", "skipped")
+
+
+class ImportReport:
+    def __init__(self, max_diffs: int = MAX_REPORT_DIFFS):
+        self.counts: dict[str, dict[str, int]] = {}
+        self.diffs: list[dict[str, Any]] = []
+        self.max_diffs = max_diffs
+        self.diffs_truncated = 0
+
+    def count(self, table: str, action: str, amount: int = 1) -> None:
+        table_counts = self.counts.setdefault(
+            table, {name: 0 for name in ACTIONS}
+        )
+        table_counts[action] = table_counts.get(action, 0) + amount
+
+    def record_diff(
+        self,
+        table: str,
+        key: dict[str, Any],
+        action: str,
+        changes: dict[str, tuple[Any, Any]] | None = None,
+    ) -> None:
+        if len(self.diffs) >= self.max_diffs:
+            self.diffs_truncated += 1
+            return
+        diff: dict[str, Any] = {"table": table, "action": action, "key": key}
+        if changes:
+            diff["changes"] = {
+                field: {"old": old, "new": new}
+                for field, (old, new) in changes.items()
+            }
+        self.diffs.append(diff)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "counts": self.counts,
+            "diffs": self.diffs,
+            "diffs_truncated": self.diffs_truncated,
+        }
+
+    def write(self, path: Path) -> None:
+        with path.open("w", encoding="utf-8") as handle:
+            json.dump(self.to_dict(), handle, indent=2, default=str)
+            handle.write("\n")
+
+    def summary(self) -> str:
+        lines = []
+        for table, table_counts in self.counts.items():
+            parts = ", ".join(
+                f"{action}: {amount}"
+                for action, amount in table_counts.items()
+            )
+            lines.append(f"{table}: {parts}")
+        return "\n".join(lines)
+
+
+# Buffers rows for one table and writes them with INSERT ... ON CONFLICT in
+# batches. `existing` maps key tuples to current column values (preloaded in
+# one query) so rows are classified as created/updated/unchanged without a
+# round trip; unchanged rows are never written and dry runs write nothing.
+class BulkUpserter:
+    def __init__(
+        self,
+        session: Session,
+        model: type,
+        key_columns: Sequence[str],
+        update_columns: Sequence[str] = (),
+        existing: dict[tuple, dict[str, Any]] | None = None,
+        report: ImportReport | None = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        dry_run: bool = False,
+        depends_on: Sequence[BulkUpserter] = (),
+    ):
+        self.session = session
+        self.model = model
+        self.table = model.__tablename__
+        self.key_columns = tuple(key_columns)
+        self.update_columns = tuple(update_columns)
+        self.existing = existing if existing is not None else {}
+        self.report = report or ImportReport()
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.depends_on = tuple(depends_on)
+        self.columns = [column.name for column in model.__table__.columns]
+        self._buffer: dict[tuple, dict[str, Any]] = {}
+        self.written = 0
+
+    def _key(self, row: dict[str, Any]) -> tuple:
+        return tuple(row[column] for column in self.key_columns)
+
+    def _new_row(self, row: dict[str, Any]) -> dict[str, Any]:
+        full = {column: None for column in self.columns}
+        if "id" in full:
+            full["id"] = uuid4()
+        if "created_at" in full:
+            full["created_at"] = datetime.now(timezone.utc)
+        full.update(row)
+        return full
+
+    def add(self, row: dict[str, Any]) -> dict[str, Any]:
+        key = self._key(row)
+        current = self.existing.get(key)
+        key_values = dict(zip(self.key_columns, key))
+        if current is None:
+            full = self._new_row(row)
+            self.existing[key] = full
+            self._buffer[key] = full
+            self.report.count(self.table, "created")
+            self.report.record_diff(self.table, key_values, "created")
+            self._flush_if_full()
+            return full
+
+        changes = {
+            column: (current.get(column), row[column])
+            for column in self.update_columns
+            if column in row and current.get(column) != row[column]
+        }
+        if not changes:
+            self.report.count(self.table, "unchanged")
+            return current
+
+        full = {
+            **current,
+            **{column: new for column, (_, new) in changes.items()},
+        }
+        self.existing[key] = full
+        # A row created earlier in this run is still pending as "created".
+        if key not in self._buffer:
+            self.report.count(self.table, "updated")
+            self.report.record_diff(self.table, key_values, "updated", changes)
+        self._buffer[key] = full
+        self._flush_if_full()
+        return full
+
+    def _flush_if_full(self) -> None:
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def skip(self, amount: int = 1) -> None:
+        self.report.count(self.table, "skipped", amount)
+
+    def flush(self) -> None:
+        for dependency in self.depends_on:
+            dependency.flush()
+        if not self._buffer:
+            return
+        rows = [
+            {column: row.get(column) for column in self.columns}
+            for row in self._buffer.values()
+        ]
+        self._buffer = {}
+        if self.dry_run:
+            return
+        statement = insert(self.model.__table__)
+        if self.update_columns:
+            statement = statement.on_conflict_do_update(
+                index_elements=list(self.key_columns),
+                set_={
+                    column: statement.excluded[column]
+                    for column in self.update_columns
+                },
+            )
+        else:
+            statement = statement.on_conflict_do_nothing()
+        self.session.connection().execute(statement, rows)
+        self.written += len(rows)
+
+
+def preload(
+    session: Session,
+    model: type,
+    key_columns: Sequence[str],
+    where: Iterable = (),
+) -> dict[tuple, dict[str, Any]]:
+    table = model.__table__
+    statement = table.select()
+    for clause in where:
+        statement = statement.where(clause)
+    existing: dict[tuple, dict[str, Any]] = {}
+    for row in session.connection().execute(statement).mappings():
+        existing[tuple(row[column] for column in key_columns)] = dict(row)
+    return existing
+
+
+def flush_all(*upserters: BulkUpserter) -> None:
+    for upserter in upserters:
+        upserter.flush()
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
+import argparse
 import json
 import sys
 from datetime import date, datetime, timezone
 from pathlib import Path
-from uuid import UUID, uuid4
+from typing import Any
+from uuid import UUID
 
-from sqlmodel import Session, select
+from sqlmodel import Session
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 BASE_DIR = SCRIPT_DIR.parents[0]
@@ -14,6 +16,7 @@ SRC_DIR = BASE_DIR / "src"
 sys.path.append(str(SRC_DIR))
 
 from db import engine  # noqa: E402
+from lib.reference_data import reference_data_cache  # noqa: E402
 from models.academic_class import AcademicClass  # noqa: E402
 from models.academic_session import AcademicSession  # noqa: E402
 from models.academic_term import AcademicTerm  # noqa: E402
@@ -24,6 +27,11 @@ from models.report_card import ReportCard  # noqa: E402
 from models.report_card_subject import ReportCardSubject  # noqa: E402
 from models.student import Student  # noqa: E402
 
+from bulk_import import (DEFAULT_BATCH_SIZE, BulkUpserter,  # noqa: E402
+                         ImportReport, flush_all, preload)
+from json_stream import (PROGRESS_EVERY, ImportCheckpoint,  # noqa: E402
+                         iter_checkpointed, print_progress)
+
 _ = [AcademicTerm, DateSheetSubject, ReportCardSubject, DateSheet, ReportCard]
 
 DEFAULT_DOB = date(2000, 1, 1)
@@ -58,152 +66,67 @@ def normalize_key(value: str | None) -> str:
     return normalize(value).upper()
 
 
-def get_or_create_academic_session(
-    session: Session,
-    raw_session: dict,
-) -> AcademicSession:
-    session_id = UUID(raw_session["id"])
-    existing = session.get(AcademicSession, session_id)
-    if existing:
-        return existing
-
-    statement = select(AcademicSession).where(
-        AcademicSession.year == raw_session["year"],
-    )
-    existing = session.exec(statement).first()
-    if existing:
-        return existing
-
-    created_at = parse_datetime(raw_session.get("created_at"))
-    academic_session = AcademicSession(
-        id=session_id,
-        year=raw_session["year"],
-        created_at=created_at or datetime.now(timezone.utc),
-    )
-    session.add(academic_session)
-    session.commit()
-    session.refresh(academic_session)
-    return academic_session
-
-
-def get_or_create_academic_class(
-    session: Session,
-    raw_class: dict,
-) -> AcademicClass:
-    class_id = UUID(raw_class["id"])
-    existing = session.get(AcademicClass, class_id)
-    if existing:
-        return existing
-
-    academic_session_id = UUID(raw_class["academic_session_id"])
-    grade = normalize(raw_class.get("grade"))
-    section = normalize(raw_class.get("section"))
-    statement = select(AcademicClass).where(
-        AcademicClass.academic_session_id == academic_session_id,
-        AcademicClass.grade == grade,
-        AcademicClass.section == section,
-    )
-    existing = session.exec(statement).first()
-    if existing:
-        return existing
-
-    created_at = parse_datetime(raw_class.get("created_at"))
-    academic_class = AcademicClass(
-        id=class_id,
-        academic_session_id=academic_session_id,
-        grade=grade,
-        section=section,
-        created_at=created_at or datetime.now(timezone.utc),
-    )
-    session.add(academic_class)
-    session.commit()
-    session.refresh(academic_class)
-    return academic_class
-
-
-def get_or_create_student(
-    session: Session,
-    student_id: UUID,
-    registration_no: str,
-    name: str,
-    dob: date,
-    father_name: str,
-    mother_name: str,
-    created_at: datetime,
-) -> tuple[Student, bool]:
-    existing = session.get(Student, student_id)
-    if existing:
-        return existing, False
-
-    statement = select(Student).where(
-        Student.registration_no == registration_no,
-    )
-    existing = session.exec(statement).first()
-    if existing:
-        return existing, False
-
-    student = Student(
-        id=student_id,
-        registration_no=registration_no,
-        name=name,
-        dob=dob,
-        father_name=father_name,
-        mother_name=mother_name,
-        created_at=created_at,
-    )
-    session.add(student)
-    session.commit()
-    session.refresh(student)
-    return student, True
-
-
-def get_or_create_enrollment(
-    session: Session,
-    student_id: UUID,
-    academic_session_id: UUID,
-    academic_class_id: UUID,
-    image: str | None,
-    created_at: datetime,
-) -> tuple[Enrollment, bool]:
-    statement = select(Enrollment).where(
-        Enrollment.student_id == student_id,
-        Enrollment.academic_session_id == academic_session_id,
-    )
-    existing = session.exec(statement).first()
-    if existing:
-        return existing, False
-
-    enrollment = Enrollment(
-        id=uuid4(),
-        student_id=student_id,
-        academic_session_id=academic_session_id,
-        academic_class_id=academic_class_id,
-        image=image,
-        created_at=created_at,
-    )
-    session.add(enrollment)
-    session.commit()
-    session.refresh(enrollment)
-    return enrollment, True
-
-
 def build_class_map(
-    session: Session,
+    classes: BulkUpserter,
     raw_classes: list[dict],
+    academic_session_id: UUID,
 ) -> dict[tuple[str, str], UUID]:
     class_map: dict[tuple[str, str], UUID] = {}
     for raw_class in raw_classes:
-        academic_class = get_or_create_academic_class(session, raw_class)
-        class_id = UUID(raw_class["id"])
+        created_at = parse_datetime(raw_class.get("created_at"))
+        row: dict[str, Any] = {
+            "id": UUID(raw_class["id"]),
+            "academic_session_id": academic_session_id,
+            "grade": normalize(raw_class.get("grade")),
+            "section": normalize(raw_class.get("section")),
+        }
+        if created_at:
+            row["created_at"] = created_at
+        academic_class = classes.add(row)
         key = (
             normalize_key(raw_class.get("grade")),
             normalize_key(raw_class.get("section")),
         )
-        class_map[key] = class_id
+        class_map[key] = academic_class["id"]
     return class_map
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Import students and enrollments from old_students.json."
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Validate and report changes without writing them",
+    )
+    parser.add_argument(
+        "--report",
+        type=Path,
+        help="Write the diff report as JSON to this path",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Rows per INSERT ... ON CONFLICT statement",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        help="Commit every --commit-every students and record progress "
+        "here; rerun with the same path to resume",
+    )
+    parser.add_argument(
+        "--commit-every",
+        type=int,
+        default=PROGRESS_EVERY,
+        help="Students per commit when --checkpoint is set",
+    )
+    args = parser.parse_args()
+    if args.dry_run and args.checkpoint:
+        parser.error("--checkpoint cannot be combined with --dry-run")
+
     base_dir = Path(__file__).resolve().parents[1]
     data_path = base_dir / "data" / "old_students.json"
     classes_path = base_dir / "seeders" / "data" / \
@@ -212,7 +135,6 @@ def main() -> None:
         base_dir / "seeders" / "data" / "old_data" / "academic_sessions.json"
     )
 
-    students = load_json(data_path)
     raw_classes = load_json(classes_path)
     raw_sessions = load_json(sessions_path)
 
@@ -220,102 +142,182 @@ def main() -> None:
         raise ValueError("No academic sessions found in old data.")
 
     target_session = raw_sessions[0]
-    target_session_id = UUID(target_session["id"])
-
-    stats = {
-        "students_created": 0,
-        "students_existing": 0,
-        "students_skipped": 0,
-        "enrollments_created": 0,
-        "enrollments_existing": 0,
-        "enrollments_skipped": 0,
-        "missing_class_map": 0,
-    }
+    stats = {"missing_class_map": 0}
+    report = ImportReport()
 
     with Session(engine) as session:
-        get_or_create_academic_session(session, target_session)
-        class_map = build_class_map(session, raw_classes)
+        upserter_options = {
+            "report": report,
+            "batch_size": args.batch_size,
+            "dry_run": args.dry_run,
+        }
+        academic_sessions = BulkUpserter(
+            session,
+            AcademicSession,
+            key_columns=("year",),
+            existing=preload(session, AcademicSession, ("year",)),
+            **upserter_options,
+        )
+        session_row: dict[str, Any] = {
+            "id": UUID(target_session["id"]),
+            "year": target_session["year"],
+        }
+        session_created_at = parse_datetime(target_session.get("created_at"))
+        if session_created_at:
+            session_row["created_at"] = session_created_at
+        target_session_id = academic_sessions.add(session_row)["id"]
+
+        class_key = ("academic_session_id", "grade", "section")
+        classes = BulkUpserter(
+            session,
+            AcademicClass,
+            key_columns=class_key,
+            existing=preload(
+                session,
+                AcademicClass,
+                class_key,
+                [AcademicClass.academic_session_id == target_session_id],
+            ),
+            depends_on=[academic_sessions],
+            **upserter_options,
+        )
+        class_map = build_class_map(classes, raw_classes, target_session_id)
+
+        existing_students = preload(session, Student, ("registration_no",))
+        existing_student_ids = {
+            row["id"] for row in existing_students.values()
+        }
+        student_upserter = BulkUpserter(
+            session,
+            Student,
+            key_columns=("registration_no",),
+            existing=existing_students,
+            **upserter_options,
+        )
+        enrollment_key = ("student_id", "academic_session_id")
+        enrollments = BulkUpserter(
+            session,
+            Enrollment,
+            key_columns=enrollment_key,
+            existing=preload(
+                session,
+                Enrollment,
+                enrollment_key,
+                [Enrollment.academic_session_id == target_session_id],
+            ),
+            depends_on=[classes, student_upserter],
+            **upserter_options,
+        )
 
-        for item in students:
+        reference_published = 0
+
+        def commit() -> None:
+            nonlocal reference_published
+            flush_all(academic_sessions, classes, student_upserter,
+                      enrollments)
+            # Sessions and classes feed the servers' reference data cache,
+            # which they drop once this commit lands.
+            reference_written = academic_sessions.written + classes.written
+            if reference_written > reference_published:
+                reference_data_cache.publish(session)
+                reference_published = reference_written
+            session.commit()
+
+        checkpoint = (
+            ImportCheckpoint(args.checkpoint) if args.checkpoint else None
+        )
+        for _, item in iter_checkpointed(
+            data_path,
+            checkpoint=checkpoint,
+            commit=commit,
+            commit_every=args.commit_every,
+            progress=print_progress(data_path.name),
+        ):
             raw_value = item.get("value") or {}
             student_id_raw = raw_value.get("id")
             if not student_id_raw:
-                stats["students_skipped"] += 1
-                stats["enrollments_skipped"] += 1
+                student_upserter.skip()
+                enrollments.skip()
                 continue
 
             try:
                 student_id = UUID(student_id_raw)
             except ValueError:
-                stats["students_skipped"] += 1
-                stats["enrollments_skipped"] += 1
+                student_upserter.skip()
+                enrollments.skip()
                 continue
 
             registration_no = normalize(raw_value.get("Regn. No."))
             name = normalize(raw_value.get("Student Name"))
             if not registration_no or not name:
-                stats["students_skipped"] += 1
-                stats["enrollments_skipped"] += 1
+                student_upserter.skip()
+                enrollments.skip()
                 continue
 
-            class_key = (
+            class_key_values = (
                 normalize_key(raw_value.get("Class")),
                 normalize_key(raw_value.get("Section")),
             )
-            academic_class_id = class_map.get(class_key)
+            academic_class_id = class_map.get(class_key_values)
             if not academic_class_id:
                 stats["missing_class_map"] += 1
-                stats["students_skipped"] += 1
-                stats["enrollments_skipped"] += 1
+                student_upserter.skip()
+                enrollments.skip()
                 continue
 
-            dob = parse_date(raw_value.get("Date of Birth")) or DEFAULT_DOB
-            father_name = (
-                normalize(raw_value.get("Father's Name")) or UNKNOWN_PARENT
-            )
-            mother_name = (
-                normalize(raw_value.get("Mother's Name")) or UNKNOWN_PARENT
-            )
             created_at = parse_datetime(item.get("createdAt")) or datetime.now(
                 timezone.utc
             )
-
-            student, student_created = get_or_create_student(
-                session=session,
-                student_id=student_id,
-                registration_no=registration_no,
-                name=name,
-                dob=dob,
-                father_name=father_name,
-                mother_name=mother_name,
-                created_at=created_at,
-            )
-
-            if student_created:
-                stats["students_created"] += 1
+            if student_id in existing_student_ids and \
+                    (registration_no,) not in existing_students:
+                # Same student already imported under another registration no.
+                report.count(Student.__tablename__, "unchanged")
+                resolved_student_id = student_id
             else:
-                stats["students_existing"] += 1
-
-            image = raw_value.get("studentImage")
-            _, enrollment_created = get_or_create_enrollment(
-                session=session,
-                student_id=student_id,
-                academic_session_id=target_session_id,
-                academic_class_id=academic_class_id,
-                image=image,
-                created_at=created_at,
+                student = student_upserter.add(
+                    {
+                        "id": student_id,
+                        "registration_no": registration_no,
+                        "name": name,
+                        "dob": parse_date(raw_value.get("Date of Birth"))
+                        or DEFAULT_DOB,
+                        "father_name": normalize(
+                            raw_value.get("Father's Name")
+                        ) or UNKNOWN_PARENT,
+                        "mother_name": normalize(
+                            raw_value.get("Mother's Name")
+                        ) or UNKNOWN_PARENT,
+                        "created_at": created_at,
+                    }
+                )
+                resolved_student_id = student["id"]
+                existing_student_ids.add(resolved_student_id)
+
+            enrollments.add(
+                {
+                    "student_id": resolved_student_id,
+                    "academic_session_id": target_session_id,
+                    "academic_class_id": academic_class_id,
+                    "image": raw_value.get("studentImage"),
+                    "created_at": created_at,
+                }
             )
-            if enrollment_created:
-                stats["enrollments_created"] += 1
-            else:
-                stats["enrollments_existing"] += 1
 
-    print(
-        "Created students: {students_created}, existing: {students_existing}, "
-        "skipped: {students_skipped}; enrollments created: {enrollments_created}, "
-        "existing: {enrollments_existing}, skipped: {enrollments_skipped}; "
-        "missing class mapping: {missing_class_map}".format(**stats)
-    )
+        if args.dry_run:
+            flush_all(
+                academic_sessions, classes, student_upserter, enrollments
+            )
+            session.rollback()
+        else:
+            commit()
+
+    print(report.summary())
+    print(f"Missing class mapping: {stats['missing_class_map']}")
+    if args.dry_run:
+        print("Dry run: no changes were written.")
+    if args.report:
+        report.write(args.report)
+        print(f"Diff report written to {args.report}.")
 
 
 if __name__ == "__main__":
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import argparse
 import json
 import re
 import sys
@@ -28,6 +29,11 @@ from models.report_card import ReportCardGrade, ReportCardResult  # noqa: E402
 from models.report_card_subject import ReportCardSubject  # noqa: E402
 from models.subject import Subject  # noqa: E402
 
+from bulk_import import (DEFAULT_BATCH_SIZE, BulkUpserter,  # noqa: E402
+                         ImportReport, flush_all, preload)
+from json_stream import (PROGRESS_EVERY, ImportCheckpoint,  # noqa: E402
+                         iter_checkpointed, print_progress)
+
 _ = [AcademicTerm, DateSheetSubject, ReportCardSubject, DateSheet, ReportCard]
 
 SESSION_YEAR = "2025-2026"
@@ -39,6 +45,25 @@ CLASS_SUBJECTS_DATA = "seeders/data/old_data/academic_class_subjects.json"
 
 SPECIAL_KEYS = {"ATTENDANCE", "GRADING SCALES", "REPORT DETAILS"}
 
+REPORT_CARD_KEY = ("enrollment_id", "academic_term_id")
+REPORT_CARD_UPDATE_COLUMNS = (
+    "attendance_present",
+    "behaviour_grade",
+    "art_education_grade",
+    "work_education_grade",
+    "physical_education_grade",
+    "result",
+)
+REPORT_CARD_SUBJECT_KEY = ("report_card_id", "academic_class_subject_id")
+REPORT_CARD_SUBJECT_UPDATE_COLUMNS = (
+    "mid_term",
+    "notebook",
+    "assignment",
+    "class_test",
+    "final_term",
+    "final_marks",
+)
+
 ALIAS_SUBJECTS: dict[str, list[str]] = {
     "GENERAL KNOWLEDGE": ["GK"],
     "GK": ["GENERAL KNOWLEDGE"],
@@ -67,11 +92,6 @@ COMPONENT_MAP = {
 }
 
 
-def load_json(path: Path) -> dict[str, Any]:
-    with path.open("r", encoding="utf-8") as handle:
-        return json.load(handle)
-
-
 def load_json_list(path: Path) -> list[dict[str, Any]]:
     with path.open("r", encoding="utf-8") as handle:
         return json.load(handle)
@@ -283,25 +303,6 @@ def build_seed_class_subject_templates(
     return templates
 
 
-def get_or_create_report_card(
-    session: Session,
-    report_cards_by_enrollment: dict[UUID, ReportCard],
-    enrollment_id: UUID,
-    academic_term_id: UUID,
-) -> tuple[ReportCard, bool]:
-    existing = report_cards_by_enrollment.get(enrollment_id)
-    if existing:
-        return existing, False
-    report_card = ReportCard(
-        enrollment_id=enrollment_id,
-        academic_term_id=academic_term_id,
-    )
-    session.add(report_card)
-    session.flush()
-    report_cards_by_enrollment[enrollment_id] = report_card
-    return report_card, True
-
-
 def parse_grade(value: Any) -> ReportCardGrade | None:
     if not isinstance(value, str):
         return None
@@ -326,63 +327,34 @@ def parse_result(value: Any) -> ReportCardResult | None:
     return mapping.get(normalized)
 
 
-def apply_report_card_metadata(report_card: ReportCard, record: dict[str, Any]) -> bool:
-    changed = False
+def build_report_card_metadata(record: dict[str, Any]) -> dict[str, Any]:
+    metadata: dict[str, Any] = {}
     attendance = record.get("Attendance")
     if isinstance(attendance, dict):
         present = parse_int(attendance.get("Present"))
-        if present is not None and report_card.attendance_present != present:
-            report_card.attendance_present = present
-            changed = True
+        if present is not None:
+            metadata["attendance_present"] = present
 
     grading_scales = record.get("Grading Scales")
     if isinstance(grading_scales, dict):
-        behaviour = parse_grade(grading_scales.get("Behaviour"))
-        if behaviour and report_card.behaviour_grade != behaviour:
-            report_card.behaviour_grade = behaviour
-            changed = True
-        art = parse_grade(grading_scales.get("Art Education"))
-        if art and report_card.art_education_grade != art:
-            report_card.art_education_grade = art
-            changed = True
-        work = parse_grade(grading_scales.get("Work Education"))
-        if work and report_card.work_education_grade != work:
-            report_card.work_education_grade = work
-            changed = True
-        physical = parse_grade(grading_scales.get("Physical Education"))
-        if physical and report_card.physical_education_grade != physical:
-            report_card.physical_education_grade = physical
-            changed = True
+        grade_fields = {
+            "behaviour_grade": "Behaviour",
+            "art_education_grade": "Art Education",
+            "work_education_grade": "Work Education",
+            "physical_education_grade": "Physical Education",
+        }
+        for field_name, label in grade_fields.items():
+            grade = parse_grade(grading_scales.get(label))
+            if grade:
+                metadata[field_name] = grade
 
     report_details = record.get("Report Details")
     if isinstance(report_details, dict):
         result = parse_result(report_details.get("Result"))
-        if result and report_card.result != result:
-            report_card.result = result
-            changed = True
+        if result:
+            metadata["result"] = result
 
-    return changed
-
-
-def get_report_card_subject_map(
-    session: Session,
-    cache: dict[UUID, dict[UUID, ReportCardSubject]],
-    report_card_id: UUID,
-) -> dict[UUID, ReportCardSubject]:
-    if report_card_id in cache:
-        return cache[report_card_id]
-    rows = session.exec(
-        select(ReportCardSubject).where(
-            ReportCardSubject.report_card_id == report_card_id
-        )
-    ).all()
-    subject_map = {
-        row.academic_class_subject_id: row
-        for row in rows
-        if row.academic_class_subject_id
-    }
-    cache[report_card_id] = subject_map
-    return subject_map
+    return metadata
 
 
 SubjectField = Literal[
@@ -422,6 +394,49 @@ def find_class_subject_id(
     return None
 
 
+def resolve_class_subject_id(
+    session: Session,
+    class_subjects: dict[UUID, dict[str, UUID]],
+    class_id: UUID,
+    raw_subject: str,
+    seed_subjects_by_name: dict[str, dict[str, Any]],
+    seed_class_subject_templates: dict[tuple[UUID, UUID], dict[str, Any]],
+    stats: dict[str, int],
+) -> UUID | None:
+    class_subject_id = find_class_subject_id(
+        class_subjects,
+        class_id,
+        raw_subject,
+    )
+    if class_subject_id:
+        return class_subject_id
+
+    seed_subject = resolve_seed_subject(raw_subject, seed_subjects_by_name)
+    if not seed_subject:
+        return None
+    subject, subject_created = ensure_seed_subject(session, seed_subject)
+    if subject.id is None:
+        return None
+    template = seed_class_subject_templates.get((class_id, subject.id))
+    if not template:
+        return None
+    class_subject, class_subject_created = ensure_seed_class_subject(
+        session,
+        template=template,
+        subject_id=subject.id,
+    )
+    if class_subject.id is None:
+        return None
+    class_subjects.setdefault(class_id, {})[
+        normalize_subject(subject.name)
+    ] = class_subject.id
+    if subject_created:
+        stats["subjects_created"] += 1
+    if class_subject_created:
+        stats["class_subjects_created"] += 1
+    return class_subject.id
+
+
 def process_term(
     session: Session,
     academic_session_id: UUID,
@@ -430,12 +445,12 @@ def process_term(
     enrollment_map: dict[UUID, tuple[UUID, UUID]],
     seed_subjects_by_name: dict[str, dict[str, Any]],
     seed_class_subject_templates: dict[tuple[UUID, UUID], dict[str, Any]],
+    report: ImportReport,
+    dry_run: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    checkpoint: ImportCheckpoint | None = None,
+    commit_every: int = PROGRESS_EVERY,
 ) -> dict[str, int]:
-    data = load_json(data_path)
-    records = data.get("records")
-    if not isinstance(records, dict):
-        raise ValueError(f"Invalid records in {data_path}.")
-
     academic_term = get_academic_term(session, academic_session_id, term_type)
     academic_term_id = academic_term.id
     if academic_term_id is None:
@@ -444,153 +459,164 @@ def process_term(
         )
     class_subjects = build_class_subject_map(session)
 
-    report_cards_by_enrollment: dict[UUID, ReportCard] = {}
-    existing_cards = session.exec(
-        select(ReportCard).where(
-            ReportCard.academic_term_id == academic_term_id)
-    ).all()
-    for report_card in existing_cards:
-        report_cards_by_enrollment[report_card.enrollment_id] = report_card
+    report_cards = BulkUpserter(
+        session,
+        ReportCard,
+        key_columns=REPORT_CARD_KEY,
+        update_columns=REPORT_CARD_UPDATE_COLUMNS,
+        existing=preload(
+            session,
+            ReportCard,
+            REPORT_CARD_KEY,
+            [ReportCard.academic_term_id == academic_term_id],
+        ),
+        report=report,
+        batch_size=batch_size,
+        dry_run=dry_run,
+    )
+    term_report_card_ids = select(ReportCard.id).where(
+        ReportCard.academic_term_id == academic_term_id
+    )
+    report_card_subjects = BulkUpserter(
+        session,
+        ReportCardSubject,
+        key_columns=REPORT_CARD_SUBJECT_KEY,
+        update_columns=REPORT_CARD_SUBJECT_UPDATE_COLUMNS,
+        existing=preload(
+            session,
+            ReportCardSubject,
+            REPORT_CARD_SUBJECT_KEY,
+            [ReportCardSubject.report_card_id.in_(term_report_card_ids)],
+        ),
+        report=report,
+        batch_size=batch_size,
+        dry_run=dry_run,
+        depends_on=[report_cards],
+    )
 
-    subject_cache: dict[UUID, dict[UUID, ReportCardSubject]] = {}
     stats = {
-        "report_cards_created": 0,
-        "report_cards_existing": 0,
-        "report_cards_skipped": 0,
-        "report_card_subjects_created": 0,
-        "report_card_subjects_updated": 0,
-        "report_card_subjects_skipped": 0,
         "missing_enrollment": 0,
         "missing_subject": 0,
         "subjects_created": 0,
         "class_subjects_created": 0,
     }
 
-    for student_id_raw, record in records.items():
+    def commit() -> None:
+        flush_all(report_cards, report_card_subjects)
+        session.commit()
+
+    for student_id_raw, record in iter_checkpointed(
+        data_path,
+        key="records",
+        checkpoint=checkpoint,
+        commit=commit,
+        commit_every=commit_every,
+        progress=print_progress(data_path.name),
+    ):
         try:
             student_id = UUID(student_id_raw)
-        except ValueError:
-            stats["report_cards_skipped"] += 1
+        except (TypeError, ValueError):
+            report_cards.skip()
             continue
 
         if not isinstance(record, dict):
-            stats["report_cards_skipped"] += 1
+            report_cards.skip()
             continue
 
         enrollment = enrollment_map.get(student_id)
         if not enrollment:
             stats["missing_enrollment"] += 1
-            stats["report_cards_skipped"] += 1
+            report_cards.skip()
             continue
 
         enrollment_id, class_id = enrollment
-        report_card, created = get_or_create_report_card(
-            session=session,
-            report_cards_by_enrollment=report_cards_by_enrollment,
-            enrollment_id=enrollment_id,
-            academic_term_id=academic_term_id,
-        )
-        if report_card.id is None:
-            raise ValueError(
-                f"Report card ID missing for enrollment {enrollment_id}."
-            )
-        if created:
-            stats["report_cards_created"] += 1
-        else:
-            stats["report_cards_existing"] += 1
-
-        updated_metadata = False
+        report_card_row: dict[str, Any] = {
+            "enrollment_id": enrollment_id,
+            "academic_term_id": academic_term_id,
+        }
         if term_type == AcademicTermType.HALF_YEARLY:
-            updated_metadata = apply_report_card_metadata(report_card, record)
+            report_card_row.update(build_report_card_metadata(record))
+        report_card = report_cards.add(report_card_row)
 
-        subject_map = get_report_card_subject_map(
-            session, subject_cache, report_card.id
-        )
+        # Aliases (e.g. DRAWING and DRAWING54) can hit the same class
+        # subject; later columns win, as they did with per-row updates.
+        subject_fields: dict[UUID, dict[SubjectField, int | None]] = {}
         for raw_subject, raw_value in record.items():
             if normalize_subject(raw_subject) in SPECIAL_KEYS:
                 continue
-            class_subject_id = find_class_subject_id(
+            class_subject_id = resolve_class_subject_id(
+                session,
                 class_subjects,
                 class_id,
                 raw_subject,
+                seed_subjects_by_name,
+                seed_class_subject_templates,
+                stats,
             )
             if not class_subject_id:
-                seed_subject = resolve_seed_subject(
-                    raw_subject, seed_subjects_by_name
-                )
-                if not seed_subject:
-                    stats["missing_subject"] += 1
-                    stats["report_card_subjects_skipped"] += 1
-                    continue
-                subject, subject_created = ensure_seed_subject(
-                    session, seed_subject
-                )
-                if subject.id is None:
-                    stats["missing_subject"] += 1
-                    stats["report_card_subjects_skipped"] += 1
-                    continue
-                template = seed_class_subject_templates.get(
-                    (class_id, subject.id)
-                )
-                if not template:
-                    stats["missing_subject"] += 1
-                    stats["report_card_subjects_skipped"] += 1
-                    continue
-                class_subject, class_subject_created = ensure_seed_class_subject(
-                    session,
-                    template=template,
-                    subject_id=subject.id,
-                )
-                if class_subject.id is None:
-                    stats["missing_subject"] += 1
-                    stats["report_card_subjects_skipped"] += 1
-                    continue
-                class_subject_id = class_subject.id
-                class_subjects.setdefault(class_id, {})[
-                    normalize_subject(subject.name)
-                ] = class_subject_id
-                if subject_created:
-                    stats["subjects_created"] += 1
-                if class_subject_created:
-                    stats["class_subjects_created"] += 1
-
-            fields = build_subject_fields(raw_value)
-            existing_subject = subject_map.get(class_subject_id)
-            if existing_subject:
-                changed = False
-                for field_name, field_value in fields.items():
-                    if getattr(existing_subject, field_name) != field_value:
-                        setattr(existing_subject, field_name, field_value)
-                        changed = True
-                if changed:
-                    stats["report_card_subjects_updated"] += 1
+                stats["missing_subject"] += 1
+                report_card_subjects.skip()
                 continue
-
-            report_card_subject = ReportCardSubject(
-                report_card_id=report_card.id,
-                academic_class_subject_id=class_subject_id,
-                **fields,
+            subject_fields.setdefault(class_subject_id, {}).update(
+                build_subject_fields(raw_value)
             )
-            session.add(report_card_subject)
-            subject_map[class_subject_id] = report_card_subject
-            stats["report_card_subjects_created"] += 1
-
-        if created or updated_metadata:
-            report_card.created_at = report_card.created_at or datetime.now(
-                timezone.utc
+        for class_subject_id, fields in subject_fields.items():
+            report_card_subjects.add(
+                {
+                    "report_card_id": report_card["id"],
+                    "academic_class_subject_id": class_subject_id,
+                    **fields,
+                }
             )
-        session.commit()
 
+    flush_all(report_cards, report_card_subjects)
     return stats
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Import quarterly and half-yearly exam marks."
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Validate and report changes without writing them",
+    )
+    parser.add_argument(
+        "--report",
+        type=Path,
+        help="Write the diff report as JSON to this path",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Rows per INSERT ... ON CONFLICT statement",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        help="Commit every --commit-every students and record progress "
+        "here; rerun with the same path to resume",
+    )
+    parser.add_argument(
+        "--commit-every",
+        type=int,
+        default=PROGRESS_EVERY,
+        help="Students per commit when --checkpoint is set",
+    )
+    args = parser.parse_args()
+    if args.dry_run and args.checkpoint:
+        parser.error("--checkpoint cannot be combined with --dry-run")
+
     base_dir = Path(__file__).resolve().parents[1]
     quarterly_path = base_dir / QUARTERLY_DATA
     half_yearly_path = base_dir / HALF_YEARLY_DATA
     subjects_path = base_dir / SUBJECTS_DATA
     class_subjects_path = base_dir / CLASS_SUBJECTS_DATA
 
+    report = ImportReport()
+    checkpoint = ImportCheckpoint(args.checkpoint) if args.checkpoint else None
     with Session(engine) as session:
         seed_subjects = load_json_list(subjects_path)
         seed_class_subjects = load_json_list(class_subjects_path)
@@ -609,27 +635,39 @@ def main() -> None:
             session, academic_session_id
         )
 
-        quarterly_stats = process_term(
-            session=session,
-            academic_session_id=academic_session_id,
-            term_type=AcademicTermType.QUARTERLY,
-            data_path=quarterly_path,
-            enrollment_map=enrollment_map,
-            seed_subjects_by_name=seed_subjects_by_name,
-            seed_class_subject_templates=seed_class_subject_templates,
-        )
-        half_yearly_stats = process_term(
-            session=session,
-            academic_session_id=academic_session_id,
-            term_type=AcademicTermType.HALF_YEARLY,
-            data_path=half_yearly_path,
-            enrollment_map=enrollment_map,
-            seed_subjects_by_name=seed_subjects_by_name,
-            seed_class_subject_templates=seed_class_subject_templates,
-        )
+        term_stats = {}
+        for term_type, data_path in (
+            (AcademicTermType.QUARTERLY, quarterly_path),
+            (AcademicTermType.HALF_YEARLY, half_yearly_path),
+        ):
+            term_stats[term_type] = process_term(
+                session=session,
+                academic_session_id=academic_session_id,
+                term_type=term_type,
+                data_path=data_path,
+                enrollment_map=enrollment_map,
+                seed_subjects_by_name=seed_subjects_by_name,
+                seed_class_subject_templates=seed_class_subject_templates,
+                report=report,
+                dry_run=args.dry_run,
+                batch_size=args.batch_size,
+                checkpoint=checkpoint,
+                commit_every=args.commit_every,
+            )
 
-    print("Quarterly stats:", quarterly_stats)
-    print("Half-yearly stats:", half_yearly_stats)
+        if args.dry_run:
+            session.rollback()
+        else:
+            session.commit()
+
+    print("Quarterly stats:", term_stats[AcademicTermType.QUARTERLY])
+    print("Half-yearly stats:", term_stats[AcademicTermType.HALF_YEARLY])
+    print(report.summary())
+    if args.dry_run:
+        print("Dry run: no changes were written.")
+    if args.report:
+        report.write(args.report)
+        print(f"Diff report written to {args.report}.")
 
 
 if __name__ == "__main__":
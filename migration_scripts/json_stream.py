@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import codecs
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterator
+
+CHUNK_SIZE = 64 * 1024
+PROGRESS_EVERY = 500
+
+WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+NUMBER_TAIL_RE = re.compile(r"[0-9.eE+-]*")
+
+Progress = Callable[[int, int, int], None]
+
+
+# Incremental reader over a UTF-8 JSON file. Values are decoded one at a time
+# with JSONDecoder.raw_decode, so only the current value is held in memory.
+# `offset` is the byte offset of the first unconsumed character, which is
+# what checkpoints store and resumes seek to.
+class _Reader:
+    def __init__(self, handle: BinaryIO, offset: int, chunk_size: int):
+        self.handle = handle
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.offset = offset
+        self.eof = False
+        handle.seek(offset)
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.handle.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            self.buffer = self.buffer[self.position:] + self.decoder.decode(
+                b"", final=True
+            )
+            self.position = 0
+            return False
+        self.buffer = self.buffer[self.position:] + self.decoder.decode(chunk)
+        self.position = 0
+        return True
+
+    def _consume(self, end: int) -> None:
+        consumed = self.buffer[self.position:end]
+        self.offset += len(consumed.encode("utf-8"))
+        self.position = end
+
+    def peek(self) -> str:
+        while True:
+            self._consume(
+                WHITESPACE_RE.match(self.buffer, self.position).end()
+            )
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._fill():
+                raise ValueError(
+                    f"Unexpected end of JSON at byte {self.offset}."
+                )
+
+    def expect(self, *chars: str) -> str:
+        char = self.peek()
+        if char not in chars:
+            raise ValueError(
+                f"Expected {' or '.join(chars)} at byte {self.offset}, "
+                f"got {char!r}."
+            )
+        self._consume(self.position + 1)
+        return char
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(
+                    self.buffer, self.position
+                )
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number cut off by the end of the buffer decodes as a shorter
+            # one ("12." as 12), so anything that could still be part of it
+            # is read again with the next chunk.
+            if NUMBER_TAIL_RE.fullmatch(self.buffer, end) and self._fill():
+                continue
+            self._consume(end)
+            return value
+
+
+def _iter_members(
+    reader: _Reader,
+    closing: str,
+    resumed: bool,
+) -> Iterator[tuple[str | None, Any]]:
+    first = not resumed
+    while True:
+        if first:
+            first = False
+            if reader.peek() == closing:
+                reader.expect(closing)
+                return
+        elif reader.expect(",", closing) == closing:
+            return
+        key = None
+        if closing == "}":
+            key = reader.value()
+            if not isinstance(key, str):
+                raise ValueError(
+                    f"Expected object key at byte {reader.offset}."
+                )
+            reader.expect(":")
+        yield key, reader.value()
+
+
+def _closing(opening: str) -> str:
+    return "]" if opening == "[" else "}"
+
+
+def _open_container(reader: _Reader, key: str | None) -> str:
+    opening = reader.expect("[", "{")
+    if key is None:
+        return _closing(opening)
+    if opening != "{":
+        raise ValueError(f"Expected an object containing {key!r}.")
+    first = True
+    while True:
+        if first:
+            first = False
+            if reader.peek() == "}":
+                break
+        elif reader.expect(",", "}") == "}":
+            break
+        member_key = reader.value()
+        reader.expect(":")
+        if member_key == key:
+            return _closing(reader.expect("[", "{"))
+        reader.value()
+    raise ValueError(f"Key {key!r} not found.")
+
+
+def _container_closing(path: Path, key: str | None) -> str:
+    with path.open("rb") as handle:
+        return _open_container(_Reader(handle, 0, CHUNK_SIZE), key)
+
+
+def iter_json(
+    path: Path,
+    key: str | None = None,
+    start: int | None = None,
+    progress: Progress | None = None,
+    progress_every: int = PROGRESS_EVERY,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[tuple[str | None, Any, int]]:
+    # Yields (key, value, offset) for each member of the top-level array or
+    # object, or of the object/array stored under top-level `key`. Keys are
+    # None for array items. Passing a previously yielded offset as `start`
+    # resumes right after that member.
+    total = path.stat().st_size
+    items = 0
+    with path.open("rb") as handle:
+        reader = _Reader(handle, start or 0, chunk_size)
+        if start:
+            closing = _container_closing(path, key)
+        else:
+            closing = _open_container(reader, key)
+        for member_key, value in _iter_members(
+            reader, closing, resumed=bool(start)
+        ):
+            items += 1
+            yield member_key, value, reader.offset
+            if progress and items % progress_every == 0:
+                progress(reader.offset, total, items)
+    if progress:
+        progress(total, total, items)
+
+
+def iter_checkpointed(
+    path: Path,
+    key: str | None = None,
+    checkpoint: ImportCheckpoint | None = None,
+    commit: Callable[[], None] | None = None,
+    commit_every: int = PROGRESS_EVERY,
+    progress: Progress | None = None,
+) -> Iterator[tuple[str | None, Any]]:
+    # Like iter_json, but every `commit_every` members (once the caller has
+    # finished processing them) calls `commit` and records the offset, and
+    # starts from the recorded offset when resuming.
+    if checkpoint is None:
+        for member_key, value, _ in iter_json(path, key, progress=progress):
+            yield member_key, value
+        return
+    if checkpoint.is_done(path):
+        return
+    items = checkpoint.items(path)
+    for member_key, value, offset in iter_json(
+        path, key, start=checkpoint.offset(path), progress=progress
+    ):
+        yield member_key, value
+        items += 1
+        if items % commit_every == 0:
+            if commit:
+                commit()
+            checkpoint.save(path, offset, items)
+    if commit:
+        commit()
+    checkpoint.save(path, path.stat().st_size, items, done=True)
+
+
+def print_progress(label: str) -> Progress:
+    def report(offset: int, total: int, items: int) -> None:
+        percent = offset * 100 / total if total else 100
+        print(
+            f"{label}: {items} items, {percent:.1f}% "
+            f"({offset}/{total} bytes)"
+        )
+    return report
+
+
+# Per-source resume offsets, written atomically after each committed batch
+# so an interrupted import restarts after the last commit.
+class ImportCheckpoint:
+    def __init__(self, path: Path):
+        self.path = path
+        self.sources: dict[str, dict[str, Any]] = {}
+        if path.exists():
+            with path.open("r", encoding="utf-8") as handle:
+                self.sources = json.load(handle)
+
+    def _source(self, source: Path) -> dict[str, Any]:
+        return self.sources.get(str(source.resolve()), {})
+
+    def offset(self, source: Path) -> int | None:
+        return self._source(source).get("offset")
+
+    def items(self, source: Path) -> int:
+        return self._source(source).get("items", 0)
+
+    def is_done(self, source: Path) -> bool:
+        return bool(self._source(source).get("done"))
+
+    def save(
+        self, source: Path, offset: int, items: int, done: bool = False
+    ) -> None:
+        self.sources[str(source.resolve())] = {
+            "offset": offset,
+            "items": items,
+            "done": done,
+        }
+        directory = self.path.parent
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(
+            dir=directory, prefix=f".{self.path.name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(self.sources, handle, indent=2)
+                handle.write("\n")
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+SCRIPT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
+
+from sqlmodel import Session, col, select  # noqa: E402
+
+from db import engine, normalize_db_namespace  # noqa: E402
+from lib.thumbnail_pipeline import ensure_thumbnails  # noqa: E402
+from models.enrollment import Enrollment  # noqa: E402
+
+
+# Renders the missing derivatives of photos uploaded before thumbnails
+# existed. Photos that already have them are only checked.
+def main() -> int:
+    try:
+        namespace = normalize_db_namespace(os.getenv("DB_NAMESPACE"))
+    except ValueError as exc:
+        print(f"  ERROR: {exc}")
+        return 2
+
+    with Session(engine) as session:
+        session.info["db_namespace"] = namespace
+        images = session.exec(
+            select(Enrollment.image)
+            .where(col(Enrollment.image).is_not(None))
+            .distinct()
+        ).all()
+    print(f"Checking {len(images)} photos...")
+    failed = ensure_thumbnails(
+        (image for image in images if image), namespace
+    )
+    for url in sorted(failed):
+        print(f"  FAILED: {url}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
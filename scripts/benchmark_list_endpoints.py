@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import statistics
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from db import DB_NAMESPACE_HEADER  # noqa: E402
+from lib.auth import require_user  # noqa: E402
+from main import app  # noqa: E402
+
+ENDPOINTS = [
+    "/report-cards",
+    "/students",
+    "/enrollments",
+    "/gk-competition-students",
+]
+
+
+def measure(
+    client: TestClient, path: str, params: dict, repeat: int
+) -> tuple[int, int, list[float]]:
+    # The first request warms up connections and lazily built schemas.
+    response = client.get(path, params=params)
+    response.raise_for_status()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(path, params=params)
+        timings.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return len(response.json()["items"]), len(response.content), timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time the large list endpoints and report per-item cost."
+    )
+    parser.add_argument("--namespace", default=None)
+    parser.add_argument("--limit", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--path",
+        action="append",
+        dest="paths",
+        help="Endpoint to time; may be repeated. Defaults to all list "
+        "endpoints.",
+    )
+    args = parser.parse_args()
+
+    # Runs in-process against the configured database, without auth.
+    app.dependency_overrides[require_user] = lambda: None
+    headers = {DB_NAMESPACE_HEADER: args.namespace} if args.namespace else {}
+    params = {"limit": args.limit}
+    with TestClient(app, headers=headers) as client:
+        print(
+            f"{'endpoint':<28}{'items':>7}{'KiB':>9}"
+            f"{'median ms':>11}{'us/item':>9}"
+        )
+        for path in args.paths or ENDPOINTS:
+            items, size, timings = measure(
+                client, path, params, args.repeat
+            )
+            median = statistics.median(timings)
+            per_item = median / items * 1e6 if items else 0.0
+            print(
+                f"{path:<28}{items:>7}{size / 1024:>9.0f}"
+                f"{median * 1000:>11.1f}{per_item:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
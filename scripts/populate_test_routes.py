@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 import argparse
+import hashlib
 import json
 import os
 import sys
+import tempfile
 
 SCRIPT_DIR = os.path.dirname(__file__)
 SRC_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, "..", "src"))
@@ -19,6 +21,7 @@ BASE_DATA_DIR = os.path.join(
     "seeders",
     "data",
 )
+MANIFEST_FILENAME = "manifest.json"
 
 
 ROUTES = {
@@ -38,20 +41,89 @@ ROUTES = {
 }
 
 
-def fetch_route_data(route: str, session: Session):
-    items = dev_routes.fetch_route_data(route, session)
+def iter_route_data(route: str, session: Session):
     response_model = dev_routes.ROUTE_RESPONSE_MODELS[route]
-    return [
-        response_model.model_validate(item).model_dump(mode="json")
-        for item in items
-    ]
+    for item in dev_routes.iter_route_data(route, session):
+        yield response_model.model_validate(item).model_dump(mode="json")
 
 
-def write_json(path, data):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as handle:
-        json.dump(data, handle, indent=2, ensure_ascii=False)
+def route_fields(route: str) -> list[str]:
+    response_model = dev_routes.ROUTE_RESPONSE_MODELS[route]
+    return sorted(response_model.model_fields)
+
+
+def load_manifest(data_dir):
+    path = os.path.join(data_dir, MANIFEST_FILENAME)
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as handle:
+            for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def _indent_item(item):
+    encoded = json.dumps(item, indent=2, ensure_ascii=False)
+    return "\n".join(f"  {line}" for line in encoded.splitlines())
+
+
+def write_json_atomic(path, items):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    digest = hashlib.sha256()
+    rows = 0
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=".tmp-", suffix=".json"
+    )
+
+    def emit(handle, chunk):
+        handle.write(chunk)
+        digest.update(chunk.encode("utf-8"))
+
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as handle:
+            for item in items:
+                emit(handle, ("[\n" if rows == 0 else ",\n"))
+                emit(handle, _indent_item(item))
+                rows += 1
+            emit(handle, "\n]\n" if rows else "[]\n")
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return rows, digest.hexdigest()
+
+
+def write_manifest(data_dir, manifest):
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, MANIFEST_FILENAME)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=data_dir, prefix=".tmp-", suffix=".json"
+    )
+    with os.fdopen(fd, "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2, ensure_ascii=False,
+                  sort_keys=True)
         handle.write("\n")
+    os.replace(tmp_path, path)
+
+
+def is_route_unchanged(entry, fingerprint, fields, file_path):
+    if not entry:
+        return False
+    if entry.get("db") != fingerprint or entry.get("fields") != fields:
+        return False
+    return entry.get("sha256") == file_sha256(file_path)
 
 
 def main():
@@ -68,6 +140,11 @@ def main():
         required=True,
         help="Seed data folder name under seeders/data",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Skip routes whose table fingerprint matches the manifest",
+    )
     args = parser.parse_args()
 
     data_dir = os.path.join(BASE_DATA_DIR, args.data_name)
@@ -85,14 +162,19 @@ def main():
         print(f"  ERROR: {exc}")
         return 2
 
+    manifest = load_manifest(data_dir)
     failures = 0
+    skipped = 0
     with Session(engine) as session:
         session.info["db_namespace"] = namespace
         for route, filename in routes.items():
             file_path = os.path.join(data_dir, filename)
             print(f"Fetching {route} -> {file_path}...")
             try:
-                data = fetch_route_data(route, session)
+                fingerprint = dev_routes.fetch_route_fingerprint(
+                    route, session
+                )
+                fields = route_fields(route)
             except KeyError as exc:
                 print(f"  ERROR: {exc}")
                 failures += 1
@@ -102,14 +184,39 @@ def main():
                 failures += 1
                 continue
 
+            if args.incremental and is_route_unchanged(
+                manifest.get(route), fingerprint, fields, file_path
+            ):
+                print("  SKIPPED (unchanged)")
+                skipped += 1
+                continue
+
             try:
-                write_json(file_path, data)
-            except OSError as exc:
+                rows, sha256 = write_json_atomic(
+                    file_path, iter_route_data(route, session)
+                )
+            except Exception as exc:
                 print(f"  ERROR: {exc}")
                 failures += 1
                 continue
 
-            print("  OK")
+            manifest[route] = {
+                "file": filename,
+                "rows": rows,
+                "sha256": sha256,
+                "fields": fields,
+                "db": fingerprint,
+            }
+            print(f"  OK ({rows} rows)")
+
+    try:
+        write_manifest(data_dir, manifest)
+    except OSError as exc:
+        print(f"  ERROR: {exc}")
+        failures += 1
+
+    if skipped:
+        print(f"\nSkipped {skipped} unchanged route(s).")
 
     if failures:
         print(f"\nFAILED: {failures} route(s) not written.")
@@ -221,69 +221,49 @@ def compare_lists(expected, actual, allow_id_remap=False, id_maps=None):
     return errors
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Verify DB data matches JSON seed data."
-    )
-    parser.add_argument(
-        "--only",
-        nargs="*",
-        help="Only check these routes (space-separated)",
-    )
-    parser.add_argument(
-        "--data-name",
-        required=True,
-        help="Seed data folder name under seeders/data",
-    )
-    parser.add_argument(
-        "--logical-compare",
-        action="store_true",
-        help="Compare normalized data (ignore volatile fields and remap ids)",
-    )
-    args = parser.parse_args()
-
-    data_dir = os.path.join(BASE_DATA_DIR, args.data_name)
+def verify_seed_data(
+    data_name,
+    namespace=None,
+    only=None,
+    logical_compare=False,
+    log=print,
+):
+    data_dir = os.path.join(BASE_DATA_DIR, data_name)
     routes = ROUTES
-    if args.only:
-        routes = {k: v for k, v in ROUTES.items() if k in args.only}
-        missing = sorted(set(args.only) - set(routes))
+    if only:
+        routes = {k: v for k, v in ROUTES.items() if k in only}
+        missing = sorted(set(only) - set(routes))
         if missing:
-            print(f"Unknown routes: {missing}")
+            log(f"Unknown routes: {missing}")
             return 2
 
-    try:
-        namespace = normalize_db_namespace(os.getenv("DB_NAMESPACE"))
-    except ValueError as exc:
-        print(f"  ERROR: {exc}")
-        return 2
-
     failures = 0
     route_data = {}
     with Session(engine) as session:
         session.info["db_namespace"] = namespace
         for route, filename in routes.items():
             file_path = os.path.join(data_dir, filename)
-            print(f"Checking {route} against {file_path}...")
+            log(f"Checking {route} against {file_path}...")
             try:
                 expected = load_json(file_path)
             except FileNotFoundError:
-                print(f"  ERROR: missing seed file {file_path}")
+                log(f"  ERROR: missing seed file {file_path}")
                 failures += 1
                 continue
             try:
                 actual = fetch_route_data(route, session)
             except KeyError as exc:
-                print(f"  ERROR: {exc}")
+                log(f"  ERROR: {exc}")
                 failures += 1
                 continue
             except Exception as exc:
-                print(f"  ERROR: {exc}")
+                log(f"  ERROR: {exc}")
                 failures += 1
                 continue
             route_data[route] = {"expected": expected, "actual": actual}
 
     id_maps_by_route = {}
-    if args.logical_compare:
+    if logical_compare:
         for route, payload in route_data.items():
             mapping = _build_id_map_by_index(
                 payload["expected"], payload["actual"]
@@ -293,30 +273,65 @@ def main():
 
     for route, payload in route_data.items():
         id_maps = {}
-        if args.logical_compare:
+        if logical_compare:
             id_maps = dict(id_maps_by_route)
             id_maps["self"] = id_maps_by_route.get(route, {})
 
         errors = compare_lists(
             payload["expected"],
             payload["actual"],
-            allow_id_remap=args.logical_compare,
+            allow_id_remap=logical_compare,
             id_maps=id_maps,
         )
         if errors:
             failures += 1
             for error in errors:
-                print(f"  MISMATCH ({route}): {error}")
+                log(f"  MISMATCH ({route}): {error}")
         else:
-            print(f"  OK ({route})")
+            log(f"  OK ({route})")
 
     if failures:
-        print(f"\nFAILED: {failures} route(s) mismatched.")
+        log(f"\nFAILED: {failures} route(s) mismatched.")
         return 1
 
-    print("\nALL OK")
+    log("\nALL OK")
     return 0
 
 
+def main():
+    parser = argparse.ArgumentParser(
+        description="Verify DB data matches JSON seed data."
+    )
+    parser.add_argument(
+        "--only",
+        nargs="*",
+        help="Only check these routes (space-separated)",
+    )
+    parser.add_argument(
+        "--data-name",
+        required=True,
+        help="Seed data folder name under seeders/data",
+    )
+    parser.add_argument(
+        "--logical-compare",
+        action="store_true",
+        help="Compare normalized data (ignore volatile fields and remap ids)",
+    )
+    args = parser.parse_args()
+
+    try:
+        namespace = normalize_db_namespace(os.getenv("DB_NAMESPACE"))
+    except ValueError as exc:
+        print(f"  ERROR: {exc}")
+        return 2
+
+    return verify_seed_data(
+        args.data_name,
+        namespace,
+        only=args.only,
+        logical_compare=args.logical_compare,
+    )
+
+
 if __name__ == "__main__":
     sys.exit(main())
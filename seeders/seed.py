@@ -6,6 +6,7 @@ import os
 import sys
 from datetime import date, datetime, time
 from time import perf_counter
+from typing import Callable
 from uuid import UUID
 
 from sqlalchemy import exists, insert, or_
@@ -58,6 +59,7 @@ def parse_optional_time(value: str | None) -> time | None:
 def seed_students(
     session: Session,
     data_dir: str,
+    log: Callable[[str], None] = print,
 ) -> None:
     start_time = perf_counter()
 
@@ -132,7 +134,7 @@ def seed_students(
     ]
     session_inserted = insert_rows(AcademicSession, session_rows)
 
-    print(
+    log(
         f"Academic sessions: {session_inserted} inserted "
         f"in {perf_counter() - section_start:.2f}s."
     )
@@ -153,7 +155,7 @@ def seed_students(
     ]
     term_inserted = insert_rows(AcademicTerm, term_rows)
 
-    print(
+    log(
         f"Academic terms: {term_inserted} inserted "
         f"in {perf_counter() - section_start:.2f}s."
     )
@@ -171,7 +173,7 @@ def seed_students(
     ]
     class_inserted = insert_rows(AcademicClass, class_rows)
 
-    print(
+    log(
         f"Academic classes: {class_inserted} inserted "
         f"in {perf_counter() - section_start:.2f}s."
     )
@@ -187,7 +189,7 @@ def seed_students(
     ]
     subject_inserted = insert_rows(Subject, subject_rows)
 
-    print(
+    log(
         f"Subjects: {subject_inserted} inserted "
         f"in {perf_counter() - section_start:.2f}s."
     )
@@ -208,7 +210,7 @@ def seed_students(
         AcademicClassSubject, class_subject_rows
     )
 
-    print(
+    log(
         f"Academic class subjects: {class_subject_inserted} inserted "
         f"in {perf_counter() - section_start:.2f}s."
     )
@@ -231,7 +233,7 @@ def seed_students(
         AcademicClassSubjectTerm, class_subject_term_rows
     )
 
-    print(
+    log(
         f"Academic class subject terms: {class_subject_term_inserted} inserted "
         f"in {perf_counter() - section_start:.2f}s."
     )
@@ -251,7 +253,7 @@ def seed_students(
     ]
     student_inserted = insert_rows(Student, student_rows)
 
-    print(
+    log(
         f"Students: {student_inserted} inserted "
         f"in {perf_counter() - section_start:.2f}s."
     )
@@ -270,7 +272,7 @@ def seed_students(
     ]
     enrollment_inserted = insert_rows(Enrollment, enrollment_rows)
 
-    print(
+    log(
         f"Enrollments: {enrollment_inserted} inserted "
         f"in {perf_counter() - section_start:.2f}s."
     )
@@ -309,7 +311,7 @@ def seed_students(
     ]
     report_card_inserted = insert_rows(ReportCard, report_card_rows)
 
-    print(
+    log(
         f"Report cards: {report_card_inserted} inserted "
         f"in {perf_counter() - section_start:.2f}s."
     )
@@ -336,7 +338,7 @@ def seed_students(
         ReportCardSubject, report_card_subject_rows
     )
 
-    print(
+    log(
         f"Report card subjects: {report_card_subject_inserted} inserted "
         f"in {perf_counter() - section_start:.2f}s."
     )
@@ -353,7 +355,7 @@ def seed_students(
     ]
     date_sheet_inserted = insert_rows(DateSheet, date_sheet_rows)
 
-    print(
+    log(
         f"Date sheets: {date_sheet_inserted} inserted "
         f"in {perf_counter() - section_start:.2f}s."
     )
@@ -378,7 +380,7 @@ def seed_students(
         DateSheetSubject, date_sheet_subject_rows
     )
 
-    print(
+    log(
         f"Date sheet subjects: {date_sheet_subject_inserted} inserted "
         f"in {perf_counter() - section_start:.2f}s."
     )
@@ -408,13 +410,13 @@ def seed_students(
     ]
     user_inserted = insert_rows(User, user_rows)
 
-    print(
+    log(
         f"Users: {user_inserted} inserted "
         f"in {perf_counter() - section_start:.2f}s."
     )
 
     session.commit()
-    print(f"Total seeding time: {perf_counter() - start_time:.2f}s.")
+    log(f"Total seeding time: {perf_counter() - start_time:.2f}s.")
 
 
 if __name__ == "__main__":
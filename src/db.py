@@ -39,6 +39,7 @@ engine = create_engine(env.DATABASE_URL, echo=False)
 
 
 DB_NAMESPACE_HEADER = "x-test-namespace"
+DEFAULT_DB_NAMESPACE = os.getenv("DB_NAMESPACE", "public")
 _NAMESPACE_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
 
 
@@ -77,7 +78,7 @@ def get_session(request: Request):
     with Session(engine) as session:
         namespace = getattr(request.state, "db_namespace", None)
         if not namespace:
-            namespace = os.getenv("DB_NAMESPACE", 'public')
+            namespace = DEFAULT_DB_NAMESPACE
         session.info["db_namespace"] = normalize_db_namespace(namespace)
         yield session
 
@@ -0,0 +1,186 @@
+import json
+import logging
+import select
+import threading
+import time
+from typing import Any, Callable
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session as SASession
+from sqlmodel import Session
+
+from db import engine
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cache_invalidation"
+# Cache name used when a whole namespace was replaced.
+ALL_CACHES = "*"
+RECONNECT_SECONDS = 5
+KEEPALIVE_SECONDS = 30
+
+Handler = Callable[[str | None], None]
+
+_handlers: dict[str, list[Handler]] = {}
+_handlers_lock = threading.Lock()
+_listening = threading.Event()
+_listener: threading.Thread | None = None
+_listener_lock = threading.Lock()
+
+_MISSING = object()
+
+
+def session_namespace(session: Session) -> str:
+    return session.info.get("db_namespace") or "public"
+
+
+def subscribe(cache: str, handler: Handler) -> None:
+    with _handlers_lock:
+        _handlers.setdefault(cache, []).append(handler)
+
+
+def _dispatch(cache: str, namespace: str | None) -> None:
+    with _handlers_lock:
+        handlers = [
+            handler
+            for name, name_handlers in _handlers.items()
+            if cache == ALL_CACHES or name == cache
+            for handler in name_handlers
+        ]
+    for handler in handlers:
+        handler(namespace)
+
+
+def _notify(connection: Connection, cache: str, namespace: str) -> None:
+    connection.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {
+            "channel": CHANNEL,
+            "payload": json.dumps({"cache": cache, "namespace": namespace}),
+        },
+    )
+
+
+def publish(session: Session, cache: str) -> None:
+    # NOTIFY is delivered to every process when the transaction commits;
+    # this process also invalidates right after commit so the writer reads
+    # its own change even before its listener catches up.
+    namespace = session_namespace(session)
+    pending = session.info.setdefault("cache_invalidations", set())
+    if (cache, namespace) in pending:
+        return
+    _notify(session.connection(), cache, namespace)
+    pending.add((cache, namespace))
+
+
+def publish_namespace_replaced(
+    connection: Connection, namespace: str | None
+) -> None:
+    namespace = namespace or "public"
+    _notify(connection, ALL_CACHES, namespace)
+    _dispatch(ALL_CACHES, namespace)
+
+
+@event.listens_for(SASession, "after_commit")
+def _invalidate_after_commit(session: SASession) -> None:
+    for cache, namespace in session.info.pop("cache_invalidations", ()):
+        _dispatch(cache, namespace)
+
+
+@event.listens_for(SASession, "after_rollback")
+def _discard_after_rollback(session: SASession) -> None:
+    session.info.pop("cache_invalidations", None)
+
+
+def is_listening() -> bool:
+    return _listening.is_set()
+
+
+def _listen() -> None:
+    raw_connection = engine.raw_connection()
+    connection = raw_connection.driver_connection
+    # Kept out of the pool: it sits in LISTEN for the life of the process.
+    raw_connection.detach()
+    try:
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+        # Anything published while we were not listening was missed.
+        _dispatch(ALL_CACHES, None)
+        _listening.set()
+        while True:
+            ready, _, _ = select.select(
+                [connection], [], [], KEEPALIVE_SECONDS
+            )
+            if not ready:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+            connection.poll()
+            while connection.notifies:
+                notification = connection.notifies.pop(0)
+                payload = json.loads(notification.payload)
+                _dispatch(payload["cache"], payload["namespace"])
+    finally:
+        _listening.clear()
+        connection.close()
+
+
+def _listen_forever() -> None:
+    while True:
+        try:
+            _listen()
+        except Exception:
+            logger.exception("Cache invalidation listener failed")
+        time.sleep(RECONNECT_SECONDS)
+
+
+def start_listener() -> None:
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+        _listener = threading.Thread(
+            target=_listen_forever, name="cache-listener", daemon=True
+        )
+        _listener.start()
+
+
+# Process-local values per namespace. Reads are only served from memory
+# while the listener is connected; otherwise changes made by other
+# processes could be missed, so every read goes to the database.
+class NamespaceCache:
+    def __init__(self, name: str):
+        self.name = name
+        self._values: dict[str, Any] = {}
+        # Bumped on every invalidation so a load that overlapped a write
+        # is returned but not stored.
+        self._generation = 0
+        self._lock = threading.Lock()
+        subscribe(name, self.invalidate)
+
+    def invalidate(self, namespace: str | None = None) -> None:
+        with self._lock:
+            if namespace is None:
+                self._values.clear()
+            else:
+                self._values.pop(namespace, None)
+            self._generation += 1
+
+    def get(self, session: Session, load: Callable[[Session], Any]) -> Any:
+        if not is_listening():
+            return load(session)
+        namespace = session_namespace(session)
+        value = self._values.get(namespace, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            generation = self._generation
+        value = load(session)
+        with self._lock:
+            if self._generation == generation:
+                self._values[namespace] = value
+        return value
+
+    def publish(self, session: Session) -> None:
+        publish(session, self.name)
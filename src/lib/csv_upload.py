@@ -0,0 +1,113 @@
+import codecs
+import csv
+import re
+from datetime import date, datetime
+from typing import Iterator, Sequence
+
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import column, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, SQLModel
+
+BULK_WRITE_BATCH_SIZE = 1000
+DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%d.%m.%Y")
+
+
+def normalize_header(value: str) -> str:
+    return re.sub(r"[\s.\-]+", "_", value.strip().lower()).strip("_")
+
+
+def iter_csv_rows(
+    upload: UploadFile,
+    required_columns: Sequence[str],
+) -> Iterator[tuple[int, dict[str, str]]]:
+    # Reads the spooled upload incrementally; row numbers match what a
+    # spreadsheet shows (header is row 1).
+    reader = csv.reader(
+        codecs.iterdecode(upload.file, "utf-8-sig"),
+        skipinitialspace=True,
+    )
+    try:
+        header = next(reader)
+    except StopIteration:
+        raise HTTPException(status_code=400, detail="CSV file is empty")
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=400, detail="CSV file must be UTF-8 encoded"
+        )
+    columns = [normalize_header(column) for column in header]
+    missing = [column for column in required_columns if column not in columns]
+    if missing:
+        raise HTTPException(
+            status_code=400,
+            detail="Missing CSV columns: " + ", ".join(missing),
+        )
+    try:
+        for cells in reader:
+            if not any(cell.strip() for cell in cells):
+                continue
+            yield reader.line_num, {
+                column: cell.strip()
+                for column, cell in zip(columns, cells)
+            }
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=400, detail="CSV file must be UTF-8 encoded"
+        )
+
+
+def parse_date_value(value: str) -> date:
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date: {value}")
+
+
+def bulk_upsert(
+    session: Session,
+    model: type[SQLModel],
+    rows: list[dict],
+    conflict_columns: Sequence[str],
+    update_columns: Sequence[str],
+) -> None:
+    table = model.__table__  # type: ignore[attr-defined]
+    for start in range(0, len(rows), BULK_WRITE_BATCH_SIZE):
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(conflict_columns),
+            set_={
+                column: statement.excluded[column]
+                for column in update_columns
+            },
+        )
+        session.connection().execute(
+            statement, rows[start:start + BULK_WRITE_BATCH_SIZE]
+        )
+
+
+def bulk_update(
+    session: Session,
+    model: type[SQLModel],
+    rows: list[dict],
+    key_columns: Sequence[str],
+    update_columns: Sequence[str],
+) -> int:
+    # UPDATE ... FROM (VALUES ...) so each batch is a single statement.
+    table = model.__table__  # type: ignore[attr-defined]
+    names = [*key_columns, *update_columns]
+    updated = 0
+    for start in range(0, len(rows), BULK_WRITE_BATCH_SIZE):
+        batch = rows[start:start + BULK_WRITE_BATCH_SIZE]
+        data = values(
+            *(column(name, table.c[name].type) for name in names),
+            name="bulk_rows",
+        ).data([tuple(row[name] for name in names) for row in batch])
+        statement = (
+            update(table)
+            .where(*(table.c[name] == data.c[name] for name in key_columns))
+            .values({name: data.c[name] for name in update_columns})
+        )
+        updated += session.connection().execute(statement).rowcount
+    return updated
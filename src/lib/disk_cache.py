@@ -0,0 +1,96 @@
+import hashlib
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import BinaryIO
+
+from lib.env import env
+
+# Pruning goes this far below the limit so it doesn't run on every write.
+PRUNE_TARGET_RATIO = 0.9
+
+
+def content_key(*parts: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+# Files under CACHE_DIR/<name>, evicted least recently used first once the
+# directory grows past max_bytes. Writes are atomic renames, so several
+# processes can share a directory.
+class DiskCache:
+    def __init__(self, name: str, max_bytes: int):
+        self.directory = Path(env.CACHE_DIR) / name
+        self.max_bytes = max_bytes
+        self._size: int | None = None
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def open(self, key: str) -> BinaryIO | None:
+        # The open file stays readable even if the entry is evicted.
+        path = self._path(key)
+        try:
+            file = path.open("rb")
+        except FileNotFoundError:
+            return None
+        try:
+            # The modification time doubles as the last access time.
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return file
+
+    def get(self, key: str) -> bytes | None:
+        file = self.open(key)
+        if file is None:
+            return None
+        with file:
+            return file.read()
+
+    def set(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_name(f"{key}.{uuid.uuid4().hex}.tmp")
+        temporary_path.write_bytes(data)
+        try:
+            replaced_size = path.stat().st_size
+        except FileNotFoundError:
+            replaced_size = 0
+        os.replace(temporary_path, path)
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, _, size in self._entries())
+            else:
+                self._size += len(data) - replaced_size
+            if self._size > self.max_bytes:
+                self._prune()
+
+    def _entries(self) -> list[tuple[float, Path, int]]:
+        entries = []
+        for path in self.directory.glob("*/*"):
+            # Another writer's file, renamed into place once complete.
+            if path.suffix == ".tmp":
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def _prune(self) -> None:
+        entries = sorted(self._entries())
+        size = sum(entry_size for _, _, entry_size in entries)
+        target = self.max_bytes * PRUNE_TARGET_RATIO
+        for _, path, entry_size in entries:
+            if size <= target:
+                break
+            path.unlink(missing_ok=True)
+            size -= entry_size
+        self._size = size
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from enum import Enum
 
 from dotenv import load_dotenv
@@ -27,6 +28,18 @@ class _Env:
         self.AWS_PRIVATE_BUCKET = self._get_var(
             'AWS_PRIVATE_BUCKET', "private-ai-exp"
         )
+        # Optional: a local S3 stand-in such as MinIO or moto's server.
+        self.AWS_ENDPOINT_URL = os.getenv('AWS_ENDPOINT_URL') or None
+        # Optional: "stub" serves generated bytes instead of calling OpenAI,
+        # for tests and local runs without an API key.
+        self.TTS_UPSTREAM = os.getenv('TTS_UPSTREAM') or "openai"
+        # Optional: how many reverse proxies in front of the app append the
+        # address they received from to X-Forwarded-For. Leave unset when
+        # the server already rewrites the client from proxy headers.
+        self.TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT') or 0)
+        self.CACHE_DIR = self._get_var(
+            'CACHE_DIR', os.path.join(tempfile.gettempdir(), "api-cache")
+        )
 
     def _get_var(self, s: str, default: str | None = None):
         value = os.getenv(s, default)
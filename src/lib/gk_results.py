@@ -0,0 +1,210 @@
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+from fastapi import HTTPException
+from sqlmodel import Session, col, select
+
+from db import DEFAULT_DB_NAMESPACE
+from lib.cache import publish, subscribe
+from models.gk_competition_rank import (GKCompetitionRank,
+                                        GKCompetitionRankRead,
+                                        GKCompetitionStudentDataResponse)
+from models.gk_competition_student import (GKCompetitionStudent,
+                                           GKCompetitionStudentRead)
+
+# Backstop for a missed invalidation; writes are published to every
+# worker process.
+LOOKUP_TTL_SECONDS = 60
+MAX_FAILED_LOOKUPS = 10
+FAILED_LOOKUP_WINDOW_SECONDS = 300
+MAX_TRACKED_CLIENTS = 10000
+
+
+# Complete roll_no -> (aadhaar_no, encoded response) map for one namespace.
+# Because it holds every student, a miss is authoritative and never reaches
+# the database.
+class _LookupTable:
+    def __init__(self, entries: dict[str, tuple[str, bytes]]):
+        self.entries = entries
+        self.built_at = time.monotonic()
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() - self.built_at < LOOKUP_TTL_SECONDS
+
+
+_tables: dict[str, _LookupTable] = {}
+# Bumped on every invalidation so a build that overlapped a write is
+# discarded instead of cached.
+_generations: dict[str, int] = {}
+_tables_lock = threading.Lock()
+_build_locks: dict[str, threading.Lock] = {}
+
+# namespace -> (built_at, options); dropped together with the lookup table.
+_school_options: dict[str, tuple[float, list[str]]] = {}
+
+_failed_lookups: dict[str, deque[float]] = {}
+_failed_lookups_lock = threading.Lock()
+
+
+def _namespace(session: Session) -> str:
+    return session.info.get("db_namespace") or "public"
+
+
+def _result_statement():
+    return select(GKCompetitionStudent, GKCompetitionRank).outerjoin(
+        GKCompetitionRank,
+        col(GKCompetitionRank.gk_competition_student_id)
+        == col(GKCompetitionStudent.id),
+    )
+
+
+def _encode_result(
+    student: GKCompetitionStudent, rank: GKCompetitionRank | None
+) -> bytes:
+    response = GKCompetitionStudentDataResponse(
+        gk_competition_student=GKCompetitionStudentRead.model_validate(
+            student
+        ),
+        rank=GKCompetitionRankRead.model_validate(rank) if rank else None,
+    )
+    return response.model_dump_json().encode()
+
+
+def _build_entries(session: Session) -> dict[str, tuple[str, bytes]]:
+    return {
+        student.roll_no: (student.aadhaar_no, _encode_result(student, rank))
+        for student, rank in session.exec(_result_statement()).all()
+    }
+
+
+def _query_result(
+    session: Session, roll_no: str, aadhaar_no: str
+) -> bytes | None:
+    row = session.exec(
+        _result_statement().where(
+            col(GKCompetitionStudent.roll_no) == roll_no,
+            col(GKCompetitionStudent.aadhaar_no) == aadhaar_no,
+        )
+    ).first()
+    if row is None:
+        return None
+    return _encode_result(*row)
+
+
+def build_lookup_table(session: Session) -> _LookupTable:
+    namespace = _namespace(session)
+    with _tables_lock:
+        build_lock = _build_locks.setdefault(namespace, threading.Lock())
+    with build_lock:
+        with _tables_lock:
+            generation = _generations.setdefault(namespace, 0)
+        table = _LookupTable(_build_entries(session))
+        with _tables_lock:
+            if _generations.get(namespace, 0) == generation:
+                _tables[namespace] = table
+    return table
+
+
+def warm_lookup_table(session: Session) -> None:
+    if _namespace(session) == DEFAULT_DB_NAMESPACE:
+        build_lookup_table(session)
+
+
+def invalidate_namespace(namespace: str | None) -> None:
+    with _tables_lock:
+        namespaces = [namespace] if namespace else list(_generations)
+        if not namespace:
+            _tables.clear()
+            _school_options.clear()
+        for name in namespaces:
+            _tables.pop(name, None)
+            _school_options.pop(name, None)
+            _generations[name] = _generations.get(name, 0) + 1
+
+
+# Namespace resets and clones are published to every cache.
+subscribe("gk_results", invalidate_namespace)
+
+
+# Call before commit: every worker process drops its copy once the
+# transaction commits, and nothing is dropped if it rolls back.
+def invalidate_gk_cache(session: Session) -> None:
+    publish(session, "gk_results")
+
+
+def lookup_result(
+    session: Session, roll_no: str, aadhaar_no: str
+) -> bytes | None:
+    namespace = _namespace(session)
+    if namespace != DEFAULT_DB_NAMESPACE:
+        # Test namespaces are dropped and recreated under the same name, so
+        # they go straight to the roll_no unique index instead.
+        return _query_result(session, roll_no, aadhaar_no)
+    table = _tables.get(namespace)
+    if table is None or not table.is_fresh():
+        # Concurrent misses queue on the build lock; whoever gets it after
+        # the first build finds the fresh table instead of scanning again.
+        with _tables_lock:
+            build_lock = _build_locks.setdefault(namespace, threading.Lock())
+        with build_lock:
+            table = _tables.get(namespace)
+        if table is None or not table.is_fresh():
+            table = build_lookup_table(session)
+    entry = table.entries.get(roll_no)
+    if entry is None or entry[0] != aadhaar_no:
+        return None
+    return entry[1]
+
+
+def school_options(
+    session: Session, load: Callable[[Session], list[str]]
+) -> list[str]:
+    namespace = _namespace(session)
+    if namespace != DEFAULT_DB_NAMESPACE:
+        return load(session)
+    cached = _school_options.get(namespace)
+    if cached and time.monotonic() - cached[0] < LOOKUP_TTL_SECONDS:
+        return cached[1]
+    with _tables_lock:
+        generation = _generations.setdefault(namespace, 0)
+    options = load(session)
+    with _tables_lock:
+        if _generations.get(namespace, 0) == generation:
+            _school_options[namespace] = (time.monotonic(), options)
+    return options
+
+
+def _recent_failures(client: str, now: float) -> deque[float]:
+    failures = _failed_lookups.setdefault(client, deque())
+    while failures and now - failures[0] >= FAILED_LOOKUP_WINDOW_SECONDS:
+        failures.popleft()
+    return failures
+
+
+def check_failed_lookups(client: str) -> None:
+    now = time.monotonic()
+    with _failed_lookups_lock:
+        failures = _recent_failures(client, now)
+        if not failures:
+            del _failed_lookups[client]
+            return
+        if len(failures) < MAX_FAILED_LOOKUPS:
+            return
+        retry_after = FAILED_LOOKUP_WINDOW_SECONDS - (now - failures[0])
+    raise HTTPException(
+        status_code=429,
+        detail="Too many failed attempts. Please try again later.",
+        headers={"Retry-After": str(int(retry_after) + 1)},
+    )
+
+
+def record_failed_lookup(client: str) -> None:
+    now = time.monotonic()
+    with _failed_lookups_lock:
+        if len(_failed_lookups) >= MAX_TRACKED_CLIENTS:
+            for tracked in list(_failed_lookups):
+                if not _recent_failures(tracked, now):
+                    del _failed_lookups[tracked]
+        _recent_failures(client, now).append(now)
@@ -0,0 +1,13 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+
+# Encodes a response model straight to JSON bytes with its compiled
+# pydantic-core serializer. Returned from a route, it also skips FastAPI's
+# response_model handling, which validates the model again and converts it
+# to plain Python objects before the json module encodes them. The route
+# keeps its response_model for the OpenAPI schema.
+class ModelJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return content.__pydantic_serializer__.to_json(content)
@@ -0,0 +1,17 @@
+import os
+
+from alembic import context
+
+
+# Schema the current alembic run migrates. The app passes it in the config
+# when it migrates in-process; the CLI reads DB_NAMESPACE. Revisions are
+# also loaded outside a migration (e.g. `alembic history`), where there is
+# no config.
+def migration_namespace() -> str | None:
+    if hasattr(context, "config"):
+        namespace = context.config.attributes.get(
+            "namespace", os.getenv("DB_NAMESPACE")
+        )
+    else:
+        namespace = os.getenv("DB_NAMESPACE")
+    return namespace or None
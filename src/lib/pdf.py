@@ -0,0 +1,194 @@
+import zlib
+
+# A4 in points.
+PAGE_WIDTH = 595.28
+PAGE_HEIGHT = 841.89
+
+# Only the standard Helvetica faces are used: every PDF viewer ships them,
+# so nothing has to be embedded and a page is just a content stream.
+FONTS = {
+    False: ("F1", "Helvetica"),
+    True: ("F2", "Helvetica-Bold"),
+}
+
+# Glyph widths (1/1000 em) for characters 32-126, from the standard AFMs.
+_WIDTHS = {
+    False: [
+        278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333,
+        278, 278, 556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278,
+        584, 584, 584, 556, 1015, 667, 667, 722, 722, 667, 611, 778, 722, 278,
+        500, 667, 556, 833, 722, 778, 667, 778, 722, 667, 611, 722, 667, 944,
+        667, 667, 611, 278, 278, 278, 469, 556, 333, 556, 556, 500, 556, 556,
+        278, 556, 556, 222, 222, 500, 222, 833, 556, 556, 556, 556, 333, 500,
+        278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+    ],
+    True: [
+        278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333,
+        278, 278, 556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333,
+        584, 584, 584, 611, 975, 722, 722, 722, 722, 667, 611, 778, 722, 278,
+        556, 722, 611, 833, 722, 778, 667, 778, 722, 667, 611, 722, 667, 944,
+        667, 667, 611, 333, 278, 333, 584, 556, 333, 556, 611, 556, 611, 556,
+        333, 611, 611, 278, 278, 556, 278, 889, 611, 611, 611, 611, 389, 556,
+        333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+    ],
+}
+_DEFAULT_WIDTH = 556
+
+
+def text_width(value: str, size: float, bold: bool = False) -> float:
+    widths = _WIDTHS[bold]
+    total = 0
+    for char in value:
+        code = ord(char)
+        total += (
+            widths[code - 32] if 32 <= code <= 126 else _DEFAULT_WIDTH
+        )
+    return total * size / 1000
+
+
+def fit_text(
+    value: str, size: float, max_width: float, bold: bool = False
+) -> str:
+    if text_width(value, size, bold) <= max_width:
+        return value
+    while value and text_width(value + "...", size, bold) > max_width:
+        value = value[:-1]
+    return value + "..."
+
+
+def _encode_text(value: str) -> bytes:
+    encoded = value.encode("cp1252", errors="replace")
+    return (
+        encoded.replace(b"\\", b"\\\\")
+        .replace(b"(", b"\\(")
+        .replace(b")", b"\\)")
+    )
+
+
+def _number(value: float) -> bytes:
+    return f"{value:.2f}".rstrip("0").rstrip(".").encode()
+
+
+# Drawing operations for one page, with the origin at the top left so
+# layouts read top to bottom.
+class Page:
+    def __init__(self):
+        self._operations: list[bytes] = []
+
+    def text(
+        self,
+        x: float,
+        y: float,
+        value: str,
+        size: float = 10,
+        bold: bool = False,
+        align: str = "left",
+    ) -> None:
+        if align == "center":
+            x -= text_width(value, size, bold) / 2
+        elif align == "right":
+            x -= text_width(value, size, bold)
+        font = FONTS[bold][0].encode()
+        self._operations.append(
+            b"BT /" + font + b" " + _number(size) + b" Tf "
+            + _number(x) + b" " + _number(PAGE_HEIGHT - y) + b" Td ("
+            + _encode_text(value) + b") Tj ET"
+        )
+
+    def line(
+        self,
+        x1: float,
+        y1: float,
+        x2: float,
+        y2: float,
+        width: float = 0.5,
+    ) -> None:
+        self._operations.append(
+            _number(width) + b" w " + _number(x1) + b" "
+            + _number(PAGE_HEIGHT - y1) + b" m " + _number(x2) + b" "
+            + _number(PAGE_HEIGHT - y2) + b" l S"
+        )
+
+    def rect(
+        self,
+        x: float,
+        y: float,
+        width: float,
+        height: float,
+        line_width: float = 0.5,
+        fill_gray: float | None = None,
+    ) -> None:
+        box = (
+            _number(x) + b" " + _number(PAGE_HEIGHT - y - height) + b" "
+            + _number(width) + b" " + _number(height) + b" re"
+        )
+        if fill_gray is not None:
+            self._operations.append(
+                b"q " + _number(fill_gray) + b" g " + box + b" f Q"
+            )
+        self._operations.append(_number(line_width) + b" w " + box + b" S")
+
+    def content(self) -> bytes:
+        # Compressed content stream, ready to be placed in any document.
+        return zlib.compress(b"\n".join(self._operations))
+
+
+def build_document(pages: list[bytes]) -> bytes:
+    # Objects: 1 catalog, 2 page tree, 3-4 fonts, then a page and its
+    # content stream for every page.
+    objects: list[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",
+    ]
+    font_ids = []
+    for name, base_font in FONTS.values():
+        objects.append(
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /"
+            + base_font.encode()
+            + b" /Encoding /WinAnsiEncoding >>"
+        )
+        font_ids.append((name, len(objects)))
+    resources = (
+        b"<< /Font << "
+        + b" ".join(
+            b"/" + name.encode() + b" " + str(object_id).encode() + b" 0 R"
+            for name, object_id in font_ids
+        )
+        + b" >> >>"
+    )
+    page_ids = []
+    for content in pages:
+        page_id = len(objects) + 1
+        page_ids.append(page_id)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 "
+            + _number(PAGE_WIDTH) + b" " + _number(PAGE_HEIGHT)
+            + b"] /Resources " + resources
+            + b" /Contents " + str(page_id + 1).encode() + b" 0 R >>"
+        )
+        objects.append(
+            b"<< /Length " + str(len(content)).encode()
+            + b" /Filter /FlateDecode >>\nstream\n" + content
+            + b"\nendstream"
+        )
+    objects[1] = (
+        b"<< /Type /Pages /Kids ["
+        + b" ".join(f"{page_id} 0 R".encode() for page_id in page_ids)
+        + b"] /Count " + str(len(page_ids)).encode() + b" >>"
+    )
+
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for object_id, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{object_id} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n".encode()
+    output += b"0000000000 65535 f \n"
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode()
+    output += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref_offset}\n%%EOF\n"
+    ).encode()
+    return bytes(output)
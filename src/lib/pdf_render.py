@@ -0,0 +1,45 @@
+import io
+import zipfile
+from typing import Callable
+
+from lib.disk_cache import DiskCache, content_key
+from lib.worker_pool import map_in_pool
+
+PAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Below this many pages, handing work to the pool costs more than it saves.
+MIN_POOL_PAGES = 8
+POOL_CHUNK_SIZE = 16
+
+page_cache = DiskCache("pdf-pages", PAGE_CACHE_MAX_BYTES)
+
+
+def render_pages(
+    layout: str,
+    render: Callable[[bytes], bytes],
+    documents: list[bytes],
+) -> list[bytes]:
+    # Pages are cached by a hash of the layout name and the document, so
+    # after a correction only the documents that changed are rendered again.
+    # `render` runs in worker processes and must be a module-level function.
+    keys = [content_key(layout.encode(), document) for document in documents]
+    pages = [page_cache.get(key) for key in keys]
+    missing = [index for index, page in enumerate(pages) if page is None]
+    rendered = map_in_pool(
+        render,
+        [documents[index] for index in missing],
+        min_pool_items=MIN_POOL_PAGES,
+        chunksize=POOL_CHUNK_SIZE,
+    )
+    for index, page in zip(missing, rendered):
+        page_cache.set(keys[index], page)
+        pages[index] = page
+    return pages  # type: ignore[return-value]
+
+
+def build_zip(files: list[tuple[str, bytes]]) -> bytes:
+    buffer = io.BytesIO()
+    # PDF content streams are already compressed.
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        for name, data in files:
+            archive.writestr(name, data)
+    return buffer.getvalue()
@@ -0,0 +1,194 @@
+from itertools import chain
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SASession
+from sqlmodel import Session, col, select
+
+from lib.cache import NamespaceCache
+from models.academic_class import (AcademicClass, AcademicClassRead,
+                                   grade_rank)
+from models.academic_class_subject import (AcademicClassSubject,
+                                           AcademicClassSubjectRead)
+from models.academic_session import AcademicSession, AcademicSessionRead
+from models.academic_term import (AcademicTerm, AcademicTermRead,
+                                  AcademicTermType, term_rank)
+from models.subject import Subject, SubjectRead
+
+
+# Sessions, terms, classes, subjects and class subjects of one namespace,
+# loaded together and kept in the same order the list endpoints use.
+class ReferenceData:
+    def __init__(
+        self,
+        academic_sessions: list[AcademicSessionRead],
+        academic_terms: list[AcademicTermRead],
+        academic_classes: list[AcademicClassRead],
+        subjects: list[SubjectRead],
+        class_subjects: list[AcademicClassSubjectRead],
+    ):
+        self.academic_sessions = academic_sessions
+        self.academic_sessions_by_id = {
+            item.id: item for item in academic_sessions
+        }
+        self.academic_terms_by_id = {item.id: item for item in academic_terms}
+        self.academic_terms_by_session: dict[UUID, list[AcademicTermRead]] = {}
+        for term in academic_terms:
+            self.academic_terms_by_session.setdefault(
+                term.academic_session_id, []
+            ).append(term)
+        self.academic_classes_by_id = {
+            item.id: item for item in academic_classes
+        }
+        self.academic_classes_by_session: dict[
+            UUID, list[AcademicClassRead]
+        ] = {}
+        for academic_class in academic_classes:
+            self.academic_classes_by_session.setdefault(
+                academic_class.academic_session_id, []
+            ).append(academic_class)
+        self.subjects_by_id = {item.id: item for item in subjects}
+        self.class_subjects_by_class: dict[
+            UUID, list[AcademicClassSubjectRead]
+        ] = {}
+        for class_subject in class_subjects:
+            self.class_subjects_by_class.setdefault(
+                class_subject.academic_class_id, []
+            ).append(class_subject)
+
+
+def _load(session: Session) -> ReferenceData:
+    academic_sessions = session.exec(
+        select(AcademicSession).order_by(
+            col(AcademicSession.year),
+            col(AcademicSession.created_at).desc(),
+        )
+    ).all()
+    academic_terms = session.exec(
+        select(AcademicTerm).order_by(
+            term_rank,
+            col(AcademicTerm.created_at).desc(),
+        )
+    ).all()
+    academic_classes = session.exec(
+        select(AcademicClass).order_by(
+            grade_rank,
+            col(AcademicClass.section),
+            col(AcademicClass.created_at).desc(),
+        )
+    ).all()
+    subjects = session.exec(select(Subject)).all()
+    class_subjects = session.exec(
+        select(AcademicClassSubject).order_by(
+            col(AcademicClassSubject.is_additional).asc(),
+            col(AcademicClassSubject.position).asc(),
+        )
+    ).all()
+    return ReferenceData(
+        [
+            AcademicSessionRead.model_validate(item)
+            for item in academic_sessions
+        ],
+        [AcademicTermRead.model_validate(item) for item in academic_terms],
+        [
+            AcademicClassRead.model_validate(item)
+            for item in academic_classes
+        ],
+        [SubjectRead.model_validate(item) for item in subjects],
+        [
+            AcademicClassSubjectRead.model_validate(item)
+            for item in class_subjects
+        ],
+    )
+
+
+reference_data_cache = NamespaceCache("reference_data")
+
+REFERENCE_MODELS = (
+    AcademicSession,
+    AcademicTerm,
+    AcademicClass,
+    Subject,
+    AcademicClassSubject,
+)
+
+
+# Any ORM write to a reference table invalidates the cache when its
+# transaction commits, whichever router made it.
+@event.listens_for(SASession, "after_flush")
+def _publish_reference_changes(session: SASession, flush_context) -> None:
+    if any(
+        isinstance(instance, REFERENCE_MODELS)
+        for instance in chain(session.new, session.dirty, session.deleted)
+    ):
+        reference_data_cache.publish(session)
+
+
+def get_reference_data(session: Session) -> ReferenceData:
+    return reference_data_cache.get(session, _load)
+
+
+def get_academic_session(
+    session: Session, academic_session_id: UUID
+) -> AcademicSessionRead | None:
+    return get_reference_data(session).academic_sessions_by_id.get(
+        academic_session_id
+    )
+
+
+def list_academic_sessions(session: Session) -> list[AcademicSessionRead]:
+    return get_reference_data(session).academic_sessions
+
+
+def get_academic_term(
+    session: Session, academic_term_id: UUID
+) -> AcademicTermRead | None:
+    return get_reference_data(session).academic_terms_by_id.get(
+        academic_term_id
+    )
+
+
+def list_academic_terms(
+    session: Session, academic_session_id: UUID
+) -> list[AcademicTermRead]:
+    return get_reference_data(session).academic_terms_by_session.get(
+        academic_session_id, []
+    )
+
+
+def get_half_yearly_term(
+    session: Session, academic_session_id: UUID
+) -> AcademicTermRead | None:
+    for term in list_academic_terms(session, academic_session_id):
+        if term.term_type == AcademicTermType.HALF_YEARLY:
+            return term
+    return None
+
+
+def get_academic_class(
+    session: Session, academic_class_id: UUID
+) -> AcademicClassRead | None:
+    return get_reference_data(session).academic_classes_by_id.get(
+        academic_class_id
+    )
+
+
+def list_academic_classes(
+    session: Session, academic_session_id: UUID
+) -> list[AcademicClassRead]:
+    return get_reference_data(session).academic_classes_by_session.get(
+        academic_session_id, []
+    )
+
+
+def get_subject(session: Session, subject_id: UUID) -> SubjectRead | None:
+    return get_reference_data(session).subjects_by_id.get(subject_id)
+
+
+def list_class_subjects(
+    session: Session, academic_class_id: UUID
+) -> list[AcademicClassSubjectRead]:
+    # Main subjects first, then additional ones, each in position order.
+    return get_reference_data(session).class_subjects_by_class.get(
+        academic_class_id, []
+    )
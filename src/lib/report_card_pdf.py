@@ -0,0 +1,294 @@
+import json
+
+from lib.pdf import PAGE_HEIGHT, PAGE_WIDTH, Page, fit_text
+
+# Part of every cache key: bump it whenever the drawing below changes.
+REPORT_CARD_LAYOUT = "report-card/1"
+
+MARGIN = 40
+CONTENT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+SUBJECT_COLUMN_WIDTH = 175
+MAX_ROW_HEIGHT = 18
+MIN_ROW_HEIGHT = 10
+SIGNATURE_HEIGHT = 50
+
+TERM_TITLES = {
+    "quarterly": "Quarterly Examination",
+    "half-yearly": "Half-Yearly Examination",
+    "annual": "Annual Examination",
+}
+RESULT_LABELS = {
+    "promoted": "Promoted",
+    "passed": "Passed",
+    "need_improvement": "Need Improvement",
+    "result_withheld": "Result Withheld",
+}
+MARK_COLUMNS = [
+    ("Notebook", "notebook"),
+    ("Class Test", "class_test"),
+    ("Assignment", "assignment"),
+    ("Mid Term", "mid_term"),
+    ("Final Term", "final_term"),
+]
+GRADE_FIELDS = [
+    ("Work Education", "work_education_grade"),
+    ("Art Education", "art_education_grade"),
+    ("Physical Education", "physical_education_grade"),
+    ("Behaviour", "behaviour_grade"),
+]
+
+
+def _value(value) -> str:
+    return "-" if value is None or value == "" else str(value)
+
+
+def _format_date(value: str | None) -> str:
+    if not value:
+        return "-"
+    year, month, day = value.split("-")
+    return f"{day}-{month}-{year}"
+
+
+def _subject_name(report_card_subject: dict) -> str:
+    class_subject = report_card_subject.get("academic_class_subject") or {}
+    subject = class_subject.get("subject") or {}
+    return subject.get("name") or "-"
+
+
+def _is_additional(report_card_subject: dict) -> bool:
+    class_subject = report_card_subject.get("academic_class_subject") or {}
+    return bool(class_subject.get("is_additional"))
+
+
+def _mark_cells(report_card_subject: dict, term_type: str) -> list[str]:
+    if term_type == "quarterly":
+        return [_value(report_card_subject.get("final_marks"))]
+    marks = [report_card_subject.get(field) for _, field in MARK_COLUMNS]
+    present = [mark for mark in marks if mark is not None]
+    total = sum(present) if present else None
+    return [_value(mark) for mark in marks] + [_value(total)]
+
+
+def _table_rows(report_card: dict) -> int:
+    subjects = report_card.get("report_card_subjects") or []
+    has_additional = any(_is_additional(item) for item in subjects)
+    return 1 + len(subjects) + (1 if has_additional else 0)
+
+
+def _draw_header(page: Page, y: float, report_card: dict) -> float:
+    academic_term = report_card.get("academic_term") or {}
+    enrollment = report_card.get("enrollment") or {}
+    academic_session = (
+        academic_term.get("academic_session")
+        or enrollment.get("academic_session")
+        or {}
+    )
+    term_type = academic_term.get("term_type") or ""
+    page.text(PAGE_WIDTH / 2, y + 18, "REPORT CARD", 18, True, "center")
+    page.text(
+        PAGE_WIDTH / 2,
+        y + 36,
+        f"{TERM_TITLES.get(term_type, term_type)} - Session "
+        f"{_value(academic_session.get('year'))}",
+        11,
+        align="center",
+    )
+    page.line(MARGIN, y + 46, PAGE_WIDTH - MARGIN, y + 46, 1)
+    return y + 60
+
+
+def _draw_student(page: Page, y: float, report_card: dict) -> float:
+    enrollment = report_card.get("enrollment") or {}
+    student = enrollment.get("student") or {}
+    academic_class = enrollment.get("academic_class") or {}
+    class_name = (
+        f"{academic_class.get('grade', '')}-{academic_class.get('section', '')}"
+        if academic_class
+        else "-"
+    )
+    fields = [
+        ("Name", _value(student.get("name"))),
+        ("Registration No.", _value(student.get("registration_no"))),
+        ("Father's Name", _value(student.get("father_name"))),
+        ("Class", class_name),
+        ("Mother's Name", _value(student.get("mother_name"))),
+        ("Date of Birth", _format_date(student.get("dob"))),
+    ]
+    column_width = CONTENT_WIDTH / 2
+    for index, (label, value) in enumerate(fields):
+        x = MARGIN + (index % 2) * column_width
+        row_y = y + (index // 2) * 16
+        page.text(x, row_y, f"{label}:", 10, True)
+        page.text(
+            x + 95, row_y, fit_text(value, 10, column_width - 100), 10
+        )
+    return y + 3 * 16 + 8
+
+
+def _draw_marks(
+    page: Page,
+    y: float,
+    title: str,
+    report_card: dict,
+    term_type: str,
+    row_height: float,
+    percentage_label: str,
+) -> float:
+    font_size = min(9, row_height * 0.6)
+    page.text(MARGIN, y + 12, title, 11, True)
+    y += 18
+    headers = (
+        ["Marks"]
+        if term_type == "quarterly"
+        else [label for label, _ in MARK_COLUMNS] + ["Total"]
+    )
+    mark_width = (CONTENT_WIDTH - SUBJECT_COLUMN_WIDTH) / len(headers)
+    subjects = report_card.get("report_card_subjects") or []
+    rows: list[tuple[str, list[str], bool]] = [("Subject", headers, True)]
+    additional_started = False
+    for item in subjects:
+        if _is_additional(item) and not additional_started:
+            additional_started = True
+            rows.append(("Additional Subjects", [], True))
+        rows.append((_subject_name(item), _mark_cells(item, term_type), False))
+
+    top = y
+    for index, (name, cells, shaded) in enumerate(rows):
+        row_y = top + index * row_height
+        if shaded:
+            page.rect(
+                MARGIN, row_y, CONTENT_WIDTH, row_height, 0.5, fill_gray=0.9
+            )
+        text_y = row_y + row_height / 2 + font_size * 0.35
+        page.text(
+            MARGIN + 4,
+            text_y,
+            fit_text(name, font_size, SUBJECT_COLUMN_WIDTH - 8, shaded),
+            font_size,
+            shaded,
+        )
+        for column, cell in enumerate(cells):
+            center = (
+                MARGIN + SUBJECT_COLUMN_WIDTH + (column + 0.5) * mark_width
+            )
+            page.text(center, text_y, cell, font_size, index == 0, "center")
+    bottom = top + len(rows) * row_height
+    page.rect(MARGIN, top, CONTENT_WIDTH, bottom - top)
+    for index in range(1, len(rows)):
+        row_y = top + index * row_height
+        page.line(MARGIN, row_y, PAGE_WIDTH - MARGIN, row_y)
+    for column in range(len(headers)):
+        x = MARGIN + SUBJECT_COLUMN_WIDTH + column * mark_width
+        page.line(x, top, x, bottom)
+
+    percentage = report_card.get("overall_percentage")
+    page.text(
+        MARGIN,
+        bottom + 14,
+        f"{percentage_label}: "
+        f"{'-' if percentage is None else f'{percentage}%'}",
+        10,
+        True,
+    )
+    page.text(
+        MARGIN + CONTENT_WIDTH / 2,
+        bottom + 14,
+        f"Rank: {_value(report_card.get('rank'))}",
+        10,
+        True,
+    )
+    return bottom + 26
+
+
+def _draw_summary(page: Page, y: float, report_card: dict) -> float:
+    academic_term = report_card.get("academic_term") or {}
+    present = report_card.get("attendance_present")
+    working_days = academic_term.get("working_days")
+    attendance = _value(present)
+    if present is not None and working_days:
+        attendance = f"{present} / {working_days}"
+    result = report_card.get("result")
+    fields = [
+        ("Attendance", attendance),
+        ("Result", RESULT_LABELS.get(result, _value(result))),
+    ] + [
+        (label, _value(report_card.get(field)))
+        for label, field in GRADE_FIELDS
+    ]
+    column_width = CONTENT_WIDTH / 2
+    for index, (label, value) in enumerate(fields):
+        x = MARGIN + (index % 2) * column_width
+        row_y = y + 12 + (index // 2) * 16
+        page.text(x, row_y, f"{label}:", 10, True)
+        page.text(x + 110, row_y, value, 10)
+    return y + 12 + ((len(fields) + 1) // 2) * 16
+
+
+def _draw_signatures(page: Page) -> None:
+    y = PAGE_HEIGHT - MARGIN - 10
+    labels = ["Class Teacher", "Principal", "Parent / Guardian"]
+    column_width = CONTENT_WIDTH / len(labels)
+    for index, label in enumerate(labels):
+        center = MARGIN + (index + 0.5) * column_width
+        page.line(center - 60, y - 14, center + 60, y - 14)
+        page.text(center, y, label, 10, align="center")
+
+
+def render_report_card(document: bytes) -> bytes:
+    # `document` is a ReportCardDataResponse as JSON; returns the page's
+    # content stream. Runs in render worker processes.
+    data = json.loads(document)
+    report_card = data["report_card"]
+    half_yearly_report_card = data.get("half_yearly_report_card")
+    term_type = (report_card.get("academic_term") or {}).get("term_type")
+
+    sections = []
+    if half_yearly_report_card:
+        sections.append(
+            (
+                TERM_TITLES["half-yearly"],
+                half_yearly_report_card,
+                "half-yearly",
+                "Percentage",
+            )
+        )
+    sections.append(
+        (
+            TERM_TITLES.get(term_type, "Marks"),
+            report_card,
+            term_type,
+            "Overall Percentage" if half_yearly_report_card else "Percentage",
+        )
+    )
+
+    page = Page()
+    y = _draw_header(page, MARGIN, report_card)
+    y = _draw_student(page, y, report_card)
+    # Rows shrink so that every subject fits on one page.
+    summary_height = 12 + 3 * 16 + 10
+    section_overhead = 18 + 26
+    available = (
+        PAGE_HEIGHT
+        - MARGIN
+        - SIGNATURE_HEIGHT
+        - summary_height
+        - y
+        - section_overhead * len(sections)
+    )
+    total_rows = sum(_table_rows(section[1]) for section in sections)
+    row_height = max(
+        MIN_ROW_HEIGHT, min(MAX_ROW_HEIGHT, available / total_rows)
+    )
+    for title, section_report_card, section_term_type, label in sections:
+        y = _draw_marks(
+            page,
+            y,
+            title,
+            section_report_card,
+            section_term_type,
+            row_height,
+            label,
+        )
+    _draw_summary(page, y, report_card)
+    _draw_signatures(page)
+    return page.content()
@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from lib.env import env
+
+S3_IO_WORKERS = 16
+
+s3 = boto3.client(
+    "s3",
+    region_name=env.AWS_REGION,
+    aws_access_key_id=env.AWS_ACCESS_KEY,
+    aws_secret_access_key=env.AWS_SECRET_ACCESS_KEY,
+    endpoint_url=env.AWS_ENDPOINT_URL,
+    config=Config(signature_version="s3v4"),
+)
+
+# For work that makes many S3 requests at once; they are I/O bound.
+s3_io_executor = ThreadPoolExecutor(
+    max_workers=S3_IO_WORKERS, thread_name_prefix="s3-io"
+)
+
+
+def is_missing(error: ClientError) -> bool:
+    return error.response["Error"]["Code"] in ("404", "NoSuchKey")
+
+
+def object_exists(bucket: str, key: str) -> bool:
+    try:
+        s3.head_object(Bucket=bucket, Key=key)
+    except ClientError as error:
+        if is_missing(error):
+            return False
+        raise
+    return True
@@ -0,0 +1,13 @@
+import re
+from urllib.parse import quote
+
+# Importing this module has no side effects, so models and worker
+# processes can use it without creating an S3 client.
+s3_url_re = re.compile(
+    r"^https://(?P<bucket>[\w.-]+)\.s3(?:\.(?P<region>[\w-]+))?\.amazonaws\.com/(?P<key>.+)$"
+)
+
+
+def object_url(bucket: str, key: str) -> str:
+    # The form s3_url_re parses, as stored in Enrollment.image.
+    return f"https://{bucket}.s3.amazonaws.com/{quote(key)}"
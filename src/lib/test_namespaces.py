@@ -0,0 +1,581 @@
+import hashlib
+import json
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Iterator
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.pool import NullPool
+
+from db import engine
+from lib.cache import publish_namespace_replaced
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SEED_DATA_DIR = REPO_ROOT / "seeders" / "data"
+ALEMBIC_VERSIONS_DIR = REPO_ROOT / "alembic" / "versions"
+
+TEMPLATE_PREFIX = "tpl_"
+TEMPLATE_COMMENT_PREFIX = "seed-template:"
+POOL_PREFIX = "pool_"
+POOL_COMMENT_PREFIX = "seed-pool:"
+DEFAULT_POOL_SIZE = 4
+DEFAULT_LEASE_SECONDS = 60 * 60
+
+_pool_executor = ThreadPoolExecutor(
+    max_workers=2, thread_name_prefix="namespace-pool"
+)
+
+# Session-level advisory locks live on a connection outside the request
+# pool, one per thread however many locks the thread nests.
+_lock_engine = create_engine(engine.url, poolclass=NullPool)
+_lock_connections = threading.local()
+
+
+@contextmanager
+def advisory_lock(key: str, wait: bool = True) -> Iterator[bool]:
+    connection = getattr(_lock_connections, "connection", None)
+    owner = connection is None
+    if owner:
+        connection = _lock_engine.connect()
+        _lock_connections.connection = connection
+    try:
+        if wait:
+            connection.execute(
+                text("SELECT pg_advisory_lock(hashtext(:key))"), {"key": key}
+            )
+            locked = True
+        else:
+            locked = connection.execute(
+                text("SELECT pg_try_advisory_lock(hashtext(:key))"),
+                {"key": key},
+            ).scalar()
+        connection.commit()
+        try:
+            yield locked
+        finally:
+            if locked:
+                connection.execute(
+                    text("SELECT pg_advisory_unlock(hashtext(:key))"),
+                    {"key": key},
+                )
+                connection.commit()
+    finally:
+        if owner:
+            _lock_connections.connection = None
+            connection.close()
+
+
+def seed_folder_path(folder: str) -> Path:
+    path = SEED_DATA_DIR / folder
+    if (
+        not folder
+        or "/" in folder
+        or "\\" in folder
+        or folder.startswith(".")
+        or not path.is_dir()
+    ):
+        raise HTTPException(
+            status_code=404,
+            detail=f"Seed data folder not found: {folder}",
+        )
+    return path
+
+
+def template_fingerprint(folder: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(folder.encode("utf-8"))
+    for path in sorted(ALEMBIC_VERSIONS_DIR.glob("*.py")):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    for path in sorted(seed_folder_path(folder).glob("*.json")):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def template_namespace(folder: str) -> str:
+    return f"{TEMPLATE_PREFIX}{template_fingerprint(folder)[:24]}"
+
+
+def _schema_comment(connection: Connection, namespace: str) -> str | None:
+    row = connection.execute(
+        text(
+            "SELECT obj_description(oid, 'pg_namespace') "
+            "FROM pg_namespace WHERE nspname = :namespace"
+        ),
+        {"namespace": namespace},
+    ).first()
+    return row[0] if row else None
+
+
+def _is_template_ready(
+    connection: Connection, namespace: str, folder: str
+) -> bool:
+    return (
+        _schema_comment(connection, namespace)
+        == f"{TEMPLATE_COMMENT_PREFIX}{folder}"
+    )
+
+
+def _drop_stale_templates(
+    connection: Connection, folder: str, keep: str
+) -> list[str]:
+    rows = connection.execute(
+        text(
+            "SELECT nspname FROM pg_namespace "
+            "WHERE nspname LIKE :prefix "
+            "AND obj_description(oid, 'pg_namespace') = :comment "
+            "AND nspname <> :keep"
+        ),
+        {
+            "prefix": f"{TEMPLATE_PREFIX}%",
+            "comment": f"{TEMPLATE_COMMENT_PREFIX}{folder}",
+            "keep": keep,
+        },
+    )
+    dropped = [row[0] for row in rows]
+    for namespace in dropped:
+        connection.execute(text(f'DROP SCHEMA "{namespace}" CASCADE'))
+    return dropped
+
+
+def ensure_template(
+    folder: str,
+    build: Callable[[str], None],
+) -> str:
+    namespace = template_namespace(folder)
+    with advisory_lock(namespace):
+        with engine.begin() as connection:
+            if _is_template_ready(connection, namespace, folder):
+                return namespace
+        build(namespace)
+        with engine.begin() as connection:
+            comment = _quote_literal(f"{TEMPLATE_COMMENT_PREFIX}{folder}")
+            connection.execute(
+                text(f'COMMENT ON SCHEMA "{namespace}" IS {comment}')
+            )
+            _drop_stale_templates(connection, folder, namespace)
+    return namespace
+
+
+def _set_search_path(connection: Connection, namespace: str) -> None:
+    connection.execute(text(f'SET LOCAL search_path TO "{namespace}"'))
+
+
+def _index_names(connection: Connection, namespace: str) -> dict:
+    rows = connection.execute(
+        text(
+            "SELECT tablename, indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = :namespace"
+        ),
+        {"namespace": namespace},
+    ).all()
+    # pg_indexes always schema-qualifies the table, so strip it to compare
+    # definitions across schemas.
+    qualifiers = (f'"{namespace}".', f"{namespace}.")
+    names = {}
+    for table_name, index_name, definition in rows:
+        target = definition.split(" ON ", 1)[1]
+        for qualifier in qualifiers:
+            if target.startswith(qualifier):
+                target = target[len(qualifier):]
+                break
+        names[(table_name, target)] = index_name
+    return names
+
+
+def clone_namespace(
+    connection: Connection, source: str, target: str
+) -> list[str]:
+    columns = connection.execute(
+        text(
+            "SELECT table_name, column_name, data_type, udt_schema, udt_name "
+            "FROM information_schema.columns c "
+            "WHERE table_schema = :source AND EXISTS ("
+            "SELECT 1 FROM information_schema.tables t "
+            "WHERE t.table_schema = c.table_schema "
+            "AND t.table_name = c.table_name "
+            "AND t.table_type = 'BASE TABLE') "
+            "ORDER BY table_name, ordinal_position"
+        ),
+        {"source": source},
+    ).all()
+    columns_by_table: dict[str, list[tuple[str, str | None]]] = {}
+    for table_name, column_name, data_type, udt_schema, udt_name in columns:
+        enum_type = (
+            udt_name
+            if data_type == "USER-DEFINED" and udt_schema == source
+            else None
+        )
+        columns_by_table.setdefault(table_name, []).append(
+            (column_name, enum_type)
+        )
+    enum_types = connection.execute(
+        text(
+            "SELECT t.typname, "
+            "array_agg(e.enumlabel::text ORDER BY e.enumsortorder) "
+            "FROM pg_type t "
+            "JOIN pg_namespace n ON n.oid = t.typnamespace "
+            "JOIN pg_enum e ON e.enumtypid = t.oid "
+            "WHERE n.nspname = :source GROUP BY t.typname"
+        ),
+        {"source": source},
+    ).all()
+
+    # Definitions are rendered with the source schema on the search_path so
+    # they come back unqualified and resolve against the target schema.
+    _set_search_path(connection, source)
+    defaults = connection.execute(
+        text(
+            "SELECT c.relname, a.attname, pg_get_expr(d.adbin, d.adrelid) "
+            "FROM pg_attrdef d "
+            "JOIN pg_class c ON c.oid = d.adrelid "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "JOIN pg_attribute a "
+            "ON a.attrelid = d.adrelid AND a.attnum = d.adnum "
+            "WHERE n.nspname = :source"
+        ),
+        {"source": source},
+    ).all()
+    defaults_by_column = {
+        (table_name, column_name): expression
+        for table_name, column_name, expression in defaults
+    }
+    foreign_keys = connection.execute(
+        text(
+            "SELECT c.relname, con.conname, pg_get_constraintdef(con.oid) "
+            "FROM pg_constraint con "
+            "JOIN pg_class c ON c.oid = con.conrelid "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = :source AND con.contype = 'f'"
+        ),
+        {"source": source},
+    ).all()
+    source_index_names = _index_names(connection, source)
+
+    connection.execute(text(f'DROP SCHEMA IF EXISTS "{target}" CASCADE'))
+    connection.execute(text(f'CREATE SCHEMA "{target}"'))
+    publish_namespace_replaced(connection, target)
+    _set_search_path(connection, target)
+    for type_name, labels in enum_types:
+        connection.execute(
+            text(
+                f'CREATE TYPE "{target}"."{type_name}" AS ENUM '
+                f"({', '.join(_quote_literal(label) for label in labels)})"
+            )
+        )
+
+    for table_name, table_columns in columns_by_table.items():
+        qualified = f'"{target}"."{table_name}"'
+        connection.execute(
+            text(
+                f"CREATE TABLE {qualified} "
+                f'(LIKE "{source}"."{table_name}" INCLUDING ALL)'
+            )
+        )
+        for column_name, enum_type in table_columns:
+            if enum_type is None:
+                continue
+            default = defaults_by_column.get((table_name, column_name))
+            if default is not None:
+                connection.execute(
+                    text(
+                        f"ALTER TABLE {qualified} "
+                        f'ALTER COLUMN "{column_name}" DROP DEFAULT'
+                    )
+                )
+            connection.execute(
+                text(
+                    f'ALTER TABLE {qualified} ALTER COLUMN "{column_name}" '
+                    f'TYPE "{enum_type}" '
+                    f'USING "{column_name}"::text::"{enum_type}"'
+                )
+            )
+            if default is not None:
+                connection.execute(
+                    text(
+                        f"ALTER TABLE {qualified} "
+                        f'ALTER COLUMN "{column_name}" SET DEFAULT {default}'
+                    )
+                )
+
+    # LIKE generates its own index names; keep the migration-defined ones.
+    for key, index_name in _index_names(connection, target).items():
+        source_name = source_index_names.get(key)
+        if source_name and source_name != index_name:
+            connection.execute(
+                text(
+                    f'ALTER INDEX "{target}"."{index_name}" '
+                    f'RENAME TO "{source_name}"'
+                )
+            )
+
+    for table_name, table_columns in columns_by_table.items():
+        column_list = ", ".join(
+            f'"{column_name}"' for column_name, _ in table_columns
+        )
+        select_list = ", ".join(
+            f'"{column_name}"::text::"{enum_type}"'
+            if enum_type
+            else f'"{column_name}"'
+            for column_name, enum_type in table_columns
+        )
+        connection.execute(
+            text(
+                f'INSERT INTO "{target}"."{table_name}" ({column_list}) '
+                f'SELECT {select_list} FROM "{source}"."{table_name}"'
+            )
+        )
+    for table_name, constraint_name, definition in foreign_keys:
+        connection.execute(
+            text(
+                f'ALTER TABLE "{target}"."{table_name}" '
+                f'ADD CONSTRAINT "{constraint_name}" {definition}'
+            )
+        )
+    return list(columns_by_table)
+
+
+def _quote_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def pool_namespace(folder: str, index: int) -> str:
+    folder_hash = hashlib.sha256(folder.encode("utf-8")).hexdigest()[:8]
+    return f"{POOL_PREFIX}{folder_hash}_{index}"
+
+
+def _pool_lock(connection: Connection, folder: str) -> None:
+    connection.execute(
+        text("SELECT pg_advisory_xact_lock(hashtext(:key))"),
+        {"key": f"{POOL_COMMENT_PREFIX}{folder}"},
+    )
+
+
+def _set_pool_state(
+    connection: Connection, namespace: str, state: dict
+) -> None:
+    comment = _quote_literal(f"{POOL_COMMENT_PREFIX}{json.dumps(state)}")
+    connection.execute(text(f'COMMENT ON SCHEMA "{namespace}" IS {comment}'))
+
+
+def _pool_slots(connection: Connection, folder: str) -> dict[str, dict]:
+    rows = connection.execute(
+        text(
+            "SELECT nspname, obj_description(oid, 'pg_namespace') "
+            "FROM pg_namespace WHERE nspname LIKE :prefix "
+            "AND obj_description(oid, 'pg_namespace') LIKE :comment"
+        ),
+        {
+            "prefix": f"{POOL_PREFIX}%",
+            "comment": f"{POOL_COMMENT_PREFIX}%",
+        },
+    ).all()
+    slots = {}
+    for namespace, comment in rows:
+        state = json.loads(comment[len(POOL_COMMENT_PREFIX):])
+        if state.get("folder") == folder:
+            slots[namespace] = state
+    return slots
+
+
+def _is_lease_expired(state: dict, now: datetime) -> bool:
+    return (
+        state.get("state") == "leased"
+        and datetime.fromisoformat(state["expires_at"]) <= now
+    )
+
+
+def pool_status(folder: str) -> list[dict]:
+    with engine.begin() as connection:
+        slots = _pool_slots(connection, folder)
+    return [
+        {"namespace": namespace, **slots[namespace]}
+        for namespace in sorted(slots)
+    ]
+
+
+def _clone_pool_slot(
+    folder: str, template: str, namespace: str, state: dict
+) -> None:
+    with engine.begin() as connection:
+        clone_namespace(connection, template, namespace)
+        _set_pool_state(connection, namespace, state)
+
+
+def _has_pending_slots(folder: str) -> bool:
+    now = datetime.now(timezone.utc)
+    with engine.begin() as connection:
+        slots = _pool_slots(connection, folder)
+    return any(
+        state["state"] in ("released", "recycling")
+        or _is_lease_expired(state, now)
+        for state in slots.values()
+    )
+
+
+def refill_pool(
+    folder: str,
+    build: Callable[[str], None],
+    size: int | None = None,
+) -> list[str]:
+    key = f"{POOL_COMMENT_PREFIX}refill:{folder}"
+    recycled: list[str] = []
+    while True:
+        with advisory_lock(key, wait=False) as locked:
+            # Whoever holds the lock re-checks for pending slots on exit.
+            if not locked:
+                return recycled
+            while True:
+                batch = _refill_pool(folder, build, size)
+                size = None
+                if not batch:
+                    break
+                recycled.extend(batch)
+        if not _has_pending_slots(folder):
+            return recycled
+
+
+def _refill_pool(
+    folder: str,
+    build: Callable[[str], None],
+    size: int | None,
+) -> list[str]:
+    template = ensure_template(folder, build)
+    now = datetime.now(timezone.utc)
+    with engine.begin() as connection:
+        _pool_lock(connection, folder)
+        slots = _pool_slots(connection, folder)
+        if size is None:
+            size = len(
+                [state for state in slots.values() if not state["overflow"]]
+            )
+        recycle = []
+        for namespace, state in slots.items():
+            in_use = state["state"] == "leased" \
+                and not _is_lease_expired(state, now)
+            # Overflow and surplus slots are dropped once they are free.
+            if state["overflow"] or state["index"] >= size:
+                if not in_use:
+                    connection.execute(
+                        text(f'DROP SCHEMA "{namespace}" CASCADE')
+                    )
+                continue
+            if in_use or (
+                state["state"] == "ready" and state["template"] == template
+            ):
+                continue
+            recycle.append(namespace)
+            _set_pool_state(
+                connection, namespace, {**state, "state": "recycling"}
+            )
+        # Missing slots are recorded before the lock is released, so an
+        # overflow lease cannot claim the same name meanwhile.
+        for index in range(size):
+            namespace = pool_namespace(folder, index)
+            if namespace not in slots:
+                recycle.append(namespace)
+                connection.execute(text(f'CREATE SCHEMA "{namespace}"'))
+                _set_pool_state(
+                    connection,
+                    namespace,
+                    {
+                        "folder": folder,
+                        "template": template,
+                        "index": index,
+                        "overflow": False,
+                        "state": "recycling",
+                    },
+                )
+
+    for namespace in recycle:
+        index = int(namespace.rsplit("_", 1)[1])
+        _clone_pool_slot(
+            folder,
+            template,
+            namespace,
+            {
+                "folder": folder,
+                "template": template,
+                "index": index,
+                "overflow": False,
+                "state": "ready",
+            },
+        )
+    return recycle
+
+
+def schedule_refill(
+    folder: str,
+    build: Callable[[str], None],
+    size: int | None = None,
+) -> None:
+    _pool_executor.submit(refill_pool, folder, build, size)
+
+
+def lease_namespace(
+    folder: str,
+    build: Callable[[str], None],
+    lease_seconds: int = DEFAULT_LEASE_SECONDS,
+) -> dict:
+    template = ensure_template(folder, build)
+    now = datetime.now(timezone.utc)
+    lease = {
+        "folder": folder,
+        "template": template,
+        "state": "leased",
+        "lease_id": uuid.uuid4().hex,
+        "leased_at": now.isoformat(),
+        "expires_at": (now + timedelta(seconds=lease_seconds)).isoformat(),
+    }
+    with engine.begin() as connection:
+        _pool_lock(connection, folder)
+        slots = _pool_slots(connection, folder)
+        ready = sorted(
+            namespace
+            for namespace, state in slots.items()
+            if state["state"] == "ready" and state["template"] == template
+        )
+        if ready:
+            namespace = ready[0]
+            _set_pool_state(
+                connection, namespace, {**slots[namespace], **lease}
+            )
+            return {"namespace": namespace, **lease}
+        # Pool is drained: reserve an overflow slot and clone it directly,
+        # which is still far cheaper than seeding from scratch.
+        # Indices below the pool size belong to regular slots even while
+        # they do not exist yet.
+        size = len(
+            [state for state in slots.values() if not state["overflow"]]
+        )
+        index = max(
+            [size, *(state["index"] + 1 for state in slots.values())]
+        )
+        namespace = pool_namespace(folder, index)
+        connection.execute(text(f'CREATE SCHEMA "{namespace}"'))
+        state = {**lease, "index": index, "overflow": True}
+        _set_pool_state(connection, namespace, state)
+    _clone_pool_slot(folder, template, namespace, state)
+    return {"namespace": namespace, **lease}
+
+
+def release_namespace(folder: str, namespace: str, lease_id: str) -> dict:
+    with engine.begin() as connection:
+        _pool_lock(connection, folder)
+        state = _pool_slots(connection, folder).get(namespace)
+        if not state or state["state"] != "leased" \
+                or state.get("lease_id") != lease_id:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No active lease for namespace: {namespace}",
+            )
+        state = {**state, "state": "released"}
+        _set_pool_state(connection, namespace, state)
+    return {"namespace": namespace, **state}
@@ -0,0 +1,222 @@
+import importlib.util
+import logging
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+from sqlmodel import Session
+
+from db import engine
+from lib.cache import publish_namespace_replaced
+from lib.test_namespaces import advisory_lock, seed_folder_path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+ALEMBIC_INI = REPO_ROOT / "alembic.ini"
+SEED_SCRIPT = REPO_ROOT / "seeders" / "seed.py"
+VERIFY_SCRIPT = REPO_ROOT / "scripts" / "verify_test_routes.py"
+
+MAX_FINISHED_JOBS = 200
+
+logger = logging.getLogger(__name__)
+
+Log = Callable[[str], None]
+
+_script_modules: dict[Path, object] = {}
+_script_lock = threading.Lock()
+# Alembic's `op` and `context` proxies are process-wide, so migrations have
+# to run one at a time per process.
+_migration_lock = threading.Lock()
+
+_jobs: dict[str, dict] = {}
+_jobs_lock = threading.Lock()
+_job_executor = ThreadPoolExecutor(
+    max_workers=4, thread_name_prefix="test-job"
+)
+
+
+class OperationError(Exception):
+    def __init__(self, command: str, output: str):
+        super().__init__(command)
+        self.command = command
+        self.output = output
+
+
+def _load_script(path: Path):
+    with _script_lock:
+        module = _script_modules.get(path)
+        if module is None:
+            spec = importlib.util.spec_from_file_location(path.stem, path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            _script_modules[path] = module
+        return module
+
+
+@contextmanager
+def namespace_lock(namespace: str | None):
+    with advisory_lock(f"test-namespace:{namespace or 'public'}"):
+        yield
+
+
+def reset_namespace(namespace: str | None, log: Log = print) -> None:
+    schema = namespace or "public"
+    with engine.begin() as connection:
+        connection.execute(text(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE'))
+        connection.execute(text(f'CREATE SCHEMA "{schema}"'))
+        publish_namespace_replaced(connection, namespace)
+    log(f"Reset schema {schema}.")
+
+
+def migrate_namespace(namespace: str | None, log: Log = print) -> None:
+    schema = namespace or "public"
+    config = Config(str(ALEMBIC_INI))
+    with _migration_lock, engine.begin() as connection:
+        connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
+        # Pooled connections can carry another namespace's search_path.
+        connection.execute(text(f'SET LOCAL search_path TO "{schema}"'))
+        config.attributes["connection"] = connection
+        # Read by env.py and the revision modules instead of DB_NAMESPACE.
+        config.attributes["namespace"] = namespace
+        command.upgrade(config, "head")
+        revision = connection.execute(
+            text(f'SELECT version_num FROM "{schema}".alembic_version')
+        ).scalar()
+    log(f"Migrated schema {schema} to {revision}.")
+
+
+def seed_namespace(
+    namespace: str | None, folder: str, log: Log = print
+) -> None:
+    data_dir = seed_folder_path(folder)
+    seed = _load_script(SEED_SCRIPT)
+    with Session(engine) as session:
+        session.info["db_namespace"] = namespace or "public"
+        seed.seed_students(session, str(data_dir), log)
+
+
+def refresh_namespace(
+    namespace: str | None, folder: str, log: Log = print
+) -> None:
+    seed_folder_path(folder)
+    reset_namespace(namespace, log)
+    migrate_namespace(namespace, log)
+    seed_namespace(namespace, folder, log)
+
+
+def verify_namespace(
+    namespace: str | None,
+    folder: str,
+    logical_compare: bool = False,
+    log: Log = print,
+) -> None:
+    seed_folder_path(folder)
+    verify = _load_script(VERIFY_SCRIPT)
+    exit_code = verify.verify_seed_data(
+        folder,
+        namespace or "public",
+        logical_compare=logical_compare,
+        log=log,
+    )
+    if exit_code != 0:
+        raise RuntimeError(f"Seed verification failed ({exit_code}).")
+
+
+def run_operation(
+    command_name: str,
+    namespace: str | None,
+    operation: Callable[[Log], None],
+) -> str:
+    lines: list[str] = []
+    try:
+        with namespace_lock(namespace):
+            operation(lines.append)
+    except Exception:
+        lines.append(traceback.format_exc())
+        raise OperationError(command_name, "\n".join(lines))
+    finally:
+        _publish_replaced(namespace)
+    return "\n".join(lines)
+
+
+# Also runs after a failed operation, which may have replaced part of the
+# namespace. A publish failure is logged so it never hides the operation's
+# own result.
+def _publish_replaced(namespace: str | None) -> None:
+    try:
+        with engine.begin() as connection:
+            publish_namespace_replaced(connection, namespace)
+    except Exception:
+        logger.exception("Could not publish reset of %s", namespace)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _update_job(job_id: str, **values) -> None:
+    with _jobs_lock:
+        _jobs[job_id].update(values)
+
+
+def _run_job(
+    job_id: str,
+    command_name: str,
+    namespace: str | None,
+    operation: Callable[[Log], None],
+) -> None:
+    _update_job(job_id, status="running", started_at=_now())
+    try:
+        output = run_operation(command_name, namespace, operation)
+    except OperationError as exc:
+        _update_job(
+            job_id, status="failed", output=exc.output, finished_at=_now()
+        )
+        return
+    _update_job(job_id, status="ok", output=output, finished_at=_now())
+
+
+def _prune_jobs() -> None:
+    finished = [
+        job_id
+        for job_id, job in _jobs.items()
+        if job["status"] in ("ok", "failed")
+    ]
+    for job_id in finished[:-MAX_FINISHED_JOBS]:
+        del _jobs[job_id]
+
+
+def start_job(
+    command_name: str,
+    namespace: str | None,
+    operation: Callable[[Log], None],
+) -> dict:
+    job_id = uuid.uuid4().hex
+    job = {
+        "id": job_id,
+        "command": command_name,
+        "namespace": namespace,
+        "status": "queued",
+        "output": "",
+        "created_at": _now(),
+        "started_at": None,
+        "finished_at": None,
+    }
+    with _jobs_lock:
+        _prune_jobs()
+        _jobs[job_id] = job
+    _job_executor.submit(_run_job, job_id, command_name, namespace, operation)
+    return dict(job)
+
+
+def get_job(job_id: str) -> dict | None:
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job else None
@@ -0,0 +1,243 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Iterable
+
+from botocore.exceptions import ClientError
+from sqlalchemy import event, inspect, update
+from sqlalchemy.orm import Session as SASession
+from sqlmodel import Session, col
+
+from db import engine
+from lib.s3 import is_missing, object_exists, s3, s3_io_executor
+from lib.thumbnail_render import render_thumbnails
+from lib.thumbnails import THUMBNAIL_VARIANTS, derivative_key, parse_image_url
+from lib.worker_pool import map_in_pool
+from models.enrollment import Enrollment
+
+logger = logging.getLogger(__name__)
+
+# Originals held in memory at once while they are rendered.
+RENDER_BATCH_SIZE = 32
+MAX_READY_IMAGES = 100000
+# A photo that could not be downloaded or decoded is not tried again for
+# this long, unless it is uploaded again.
+FAILED_RETRY_SECONDS = 3600
+CONTENT_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+# Derivatives sit next to their photo, usually in the private bucket, so
+# shared caches must not keep them.
+CACHE_CONTROL = "private, max-age=86400"
+
+Original = tuple[str, str]
+
+# Photos set by writes are processed one batch at a time, off the request.
+_background_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="thumbnails"
+)
+
+# Originals whose derivatives are known to exist, and originals that
+# failed -> when they may be tried again.
+_ready: set[Original] = set()
+_failed: dict[Original, float] = {}
+_ready_lock = threading.Lock()
+
+
+def _derivatives_exist(original: Original) -> bool:
+    bucket, key = original
+    return all(
+        object_exists(bucket, derivative_key(key, variant))
+        for variant in THUMBNAIL_VARIANTS
+    )
+
+
+def _download(original: Original) -> bytes | None:
+    bucket, key = original
+    try:
+        return s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+    except ClientError as error:
+        if is_missing(error):
+            return None
+        raise
+
+
+def _upload(item: tuple[Original, dict[str, bytes]]) -> None:
+    (bucket, key), rendered = item
+    for variant, data in rendered.items():
+        _, image_format = THUMBNAIL_VARIANTS[variant]
+        s3.put_object(
+            Bucket=bucket,
+            Key=derivative_key(key, variant),
+            Body=data,
+            ContentType=CONTENT_TYPES[image_format],
+            CacheControl=CACHE_CONTROL,
+        )
+
+
+def _mark_ready(originals: list[Original]) -> None:
+    with _ready_lock:
+        if len(_ready) + len(originals) > MAX_READY_IMAGES:
+            _ready.clear()
+        _ready.update(originals)
+        for original in originals:
+            _failed.pop(original, None)
+
+
+def _mark_failed(originals: set[Original]) -> None:
+    retry_at = time.monotonic() + FAILED_RETRY_SECONDS
+    with _ready_lock:
+        if len(_failed) + len(originals) > MAX_READY_IMAGES:
+            _failed.clear()
+        _failed.update((original, retry_at) for original in originals)
+
+
+def _recently_failed(original: Original, now: float) -> bool:
+    retry_at = _failed.get(original)
+    return retry_at is not None and retry_at > now
+
+
+def _record_ready(namespace: str | None, image_urls: list[str]) -> None:
+    # Read models only link to the derivatives of the photos listed here.
+    if not image_urls:
+        return
+    with Session(engine) as session:
+        session.info["db_namespace"] = namespace
+        session.connection().execute(
+            update(Enrollment)
+            .where(
+                col(Enrollment.image).in_(image_urls),
+                col(Enrollment.thumbnails_image).is_distinct_from(
+                    col(Enrollment.image)
+                ),
+            )
+            .values(thumbnails_image=col(Enrollment.image))
+        )
+        session.commit()
+
+
+def ensure_thumbnails(
+    image_urls: Iterable[str],
+    namespace: str | None,
+    regenerate: bool = False,
+) -> set[str]:
+    # Renders the derivatives of every photo that lacks them, records the
+    # enrollments of `namespace` whose photo has them and returns the URLs
+    # that could not be processed. `regenerate` also replaces existing
+    # ones, for photos uploaded again under the same key.
+    originals_by_url = {
+        url: original
+        for url in image_urls
+        if (original := parse_image_url(url))
+    }
+    originals = list(dict.fromkeys(originals_by_url.values()))
+    failed: set[Original] = set()
+    if not regenerate:
+        now = time.monotonic()
+        failed = {
+            original
+            for original in originals
+            if _recently_failed(original, now)
+        }
+        originals = [
+            original
+            for original in originals
+            if original not in _ready and original not in failed
+        ]
+        exists = list(s3_io_executor.map(_derivatives_exist, originals))
+        _mark_ready(
+            [original for original, found in zip(originals, exists) if found]
+        )
+        originals = [
+            original
+            for original, found in zip(originals, exists)
+            if not found
+        ]
+
+    for start in range(0, len(originals), RENDER_BATCH_SIZE):
+        batch = originals[start:start + RENDER_BATCH_SIZE]
+        downloaded = [
+            (original, data)
+            for original, data in zip(
+                batch, s3_io_executor.map(_download, batch)
+            )
+            if data is not None
+        ]
+        rendered = map_in_pool(
+            render_thumbnails, [data for _, data in downloaded]
+        )
+        done = [
+            (original, derivatives)
+            for (original, _), derivatives in zip(downloaded, rendered)
+            if derivatives is not None
+        ]
+        list(s3_io_executor.map(_upload, done))
+        _mark_ready([original for original, _ in done])
+        batch_failed = set(batch) - {original for original, _ in done}
+        _mark_failed(batch_failed)
+        for bucket, key in batch_failed:
+            logger.warning("No thumbnails for photo %s/%s", bucket, key)
+        failed.update(batch_failed)
+    _record_ready(
+        namespace,
+        [
+            url
+            for url, original in originals_by_url.items()
+            if original not in failed
+        ],
+    )
+    return {
+        url
+        for url, original in originals_by_url.items()
+        if original in failed
+    }
+
+
+def _ensure_in_background(
+    image_urls: list[str], namespace: str | None, regenerate: bool
+) -> None:
+    try:
+        ensure_thumbnails(image_urls, namespace, regenerate)
+    except Exception:
+        logger.exception("Thumbnail generation failed")
+
+
+def schedule_thumbnails(
+    image_urls: Iterable[str],
+    namespace: str | None,
+    regenerate: bool = False,
+) -> None:
+    image_urls = [url for url in image_urls if url]
+    if image_urls:
+        _background_executor.submit(
+            _ensure_in_background, image_urls, namespace, regenerate
+        )
+
+
+# Setting an enrollment photo through the ORM means its upload just
+# finished; the derivatives are rendered once the transaction commits.
+@event.listens_for(SASession, "after_flush")
+def _collect_new_photos(session: SASession, flush_context) -> None:
+    for instance in chain(session.new, session.dirty):
+        if (
+            isinstance(instance, Enrollment)
+            and instance.image
+            and inspect(instance).attrs.image.history.has_changes()
+        ):
+            session.info.setdefault("thumbnail_images", set()).add(
+                instance.image
+            )
+
+
+@event.listens_for(SASession, "after_commit")
+def _schedule_new_photos(session: SASession) -> None:
+    schedule_thumbnails(
+        session.info.pop("thumbnail_images", ()),
+        session.info.get("db_namespace"),
+        regenerate=True,
+    )
+
+
+@event.listens_for(SASession, "after_rollback")
+def _discard_new_photos(session: SASession) -> None:
+    session.info.pop("thumbnail_images", None)
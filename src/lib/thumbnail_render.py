@@ -0,0 +1,38 @@
+import io
+
+from PIL import Image, ImageOps
+
+from lib.thumbnails import THUMBNAIL_VARIANTS
+
+SAVE_OPTIONS = {
+    "webp": {"quality": 80, "method": 4},
+    "jpeg": {"quality": 85, "optimize": True, "progressive": True},
+}
+
+
+def render_thumbnails(original: bytes) -> dict[str, bytes] | None:
+    # Runs in worker processes. Variants are rendered largest first, each
+    # one resized from the previous instead of from the original.
+    variants = sorted(
+        THUMBNAIL_VARIANTS.items(), key=lambda item: item[1][0], reverse=True
+    )
+    largest = variants[0][1][0]
+    try:
+        with Image.open(io.BytesIO(original)) as image:
+            # JPEGs are decoded directly at a reduced scale.
+            image.draft("RGB", (largest, largest))
+            photo = ImageOps.exif_transpose(image).convert("RGBA")
+    except (OSError, Image.DecompressionBombError):
+        return None
+    photo.thumbnail((largest, largest), Image.Resampling.LANCZOS)
+    current = Image.new("RGB", photo.size, "white")
+    current.paste(photo, mask=photo.getchannel("A"))
+    rendered = {}
+    for variant, (size, image_format) in variants:
+        current.thumbnail((size, size), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        current.save(
+            buffer, format=image_format.upper(), **SAVE_OPTIONS[image_format]
+        )
+        rendered[variant] = buffer.getvalue()
+    return rendered
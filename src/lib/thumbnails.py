@@ -0,0 +1,33 @@
+from urllib.parse import unquote
+
+from lib.s3_urls import s3_url_re
+
+# Derivatives stored next to every uploaded photo: name -> (longest side in
+# pixels, format). The size is part of the key, so changing it produces new
+# objects instead of serving stale ones.
+THUMBNAIL_VARIANTS = {
+    "thumbnail": (160, "webp"),
+    "card": (480, "jpeg"),
+}
+
+
+def _suffix(variant: str) -> str:
+    size, image_format = THUMBNAIL_VARIANTS[variant]
+    return f".{variant}-{size}.{image_format}"
+
+
+def parse_image_url(image_url: str) -> tuple[str, str] | None:
+    m = s3_url_re.match(image_url.split("?")[0])
+    if not m:
+        return None
+    return m.group("bucket"), unquote(m.group("key"))
+
+
+def derivative_key(key: str, variant: str) -> str:
+    return key + _suffix(variant)
+
+
+def derivative_url(image_url: str | None, variant: str) -> str | None:
+    if not image_url or not parse_image_url(image_url):
+        return None
+    return image_url.split("?")[0] + _suffix(variant)
@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import re
+import textwrap
+from typing import AsyncIterator, BinaryIO
+
+from openai import AsyncOpenAI
+from starlette.concurrency import iterate_in_threadpool
+
+from lib.disk_cache import DiskCache, content_key
+from lib.env import env
+
+logger = logging.getLogger(__name__)
+
+TTS_MODEL = "gpt-4o-mini-tts"
+DEFAULT_VOICE = "alloy"
+AUDIO_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+# Long text is synthesized in chunks of whole sentences. The first chunk is
+# kept short so that playback starts quickly.
+FIRST_CHUNK_CHARS = 200
+MAX_CHUNK_CHARS = 1000
+# Chunks of one request synthesized at the same time.
+SYNTHESIS_CONCURRENCY = 4
+STUB_CHUNK_DELAY_SECONDS = 0.01
+
+_sentence_re = re.compile(
+    r".+?(?:[.!?]+[\"'”’)\]]*(?=\s)|\n\s*\n|$)", re.S
+)
+
+openai_client = AsyncOpenAI(api_key=env.OPENAI_API_KEY)
+audio_cache = DiskCache("tts-audio", AUDIO_CACHE_MAX_BYTES)
+
+
+# Audio of one upstream synthesis, replayed to every request for the same
+# speech while it is still being received.
+class _Broadcast:
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.done = False
+        self.error: Exception | None = None
+        self.task: asyncio.Task | None = None
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def append(self, chunk: bytes) -> None:
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self, error: Exception | None = None) -> None:
+        self.error = error
+        self.done = True
+        self._notify()
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.done:
+                if self.error:
+                    raise self.error
+                return
+            await changed.wait()
+
+
+_inflight: dict[str, _Broadcast] = {}
+
+
+async def _openai_upstream(text: str, voice: str) -> AsyncIterator[bytes]:
+    async with openai_client.audio.speech.with_streaming_response.create(
+        model=TTS_MODEL,
+        voice=voice,
+        input=text,
+    ) as response:
+        async for chunk in response.iter_bytes():
+            if chunk:
+                yield chunk
+
+
+async def _stub_upstream(text: str, voice: str) -> AsyncIterator[bytes]:
+    for word in text.split():
+        await asyncio.sleep(STUB_CHUNK_DELAY_SECONDS)
+        yield f"{voice}:{word};".encode()
+
+
+_upstream = _stub_upstream if env.TTS_UPSTREAM == "stub" else _openai_upstream
+
+
+async def _synthesize(
+    key: str, text: str, voice: str, broadcast: _Broadcast
+) -> None:
+    # Runs as its own task, so the audio is still received and cached when
+    # the request that started it goes away.
+    try:
+        try:
+            async for chunk in _upstream(text, voice):
+                broadcast.append(chunk)
+        except Exception as exc:
+            broadcast.finish(exc)
+            return
+        except asyncio.CancelledError:
+            broadcast.finish(RuntimeError("TTS synthesis was cancelled"))
+            raise
+        broadcast.finish()
+        try:
+            await asyncio.to_thread(
+                audio_cache.set, key, b"".join(broadcast.chunks)
+            )
+        except OSError:
+            logger.exception("Could not cache TTS audio")
+    finally:
+        _inflight.pop(key, None)
+
+
+async def _read_file(file: BinaryIO) -> AsyncIterator[bytes]:
+    with file:
+        async for chunk in iterate_in_threadpool(
+            iter(lambda: file.read(READ_CHUNK_BYTES), b"")
+        ):
+            yield chunk
+
+
+def _cached_speech(text: str, voice: str) -> AsyncIterator[bytes]:
+    # Audio is cached on disk by a hash of (model, voice, text), and
+    # identical requests in flight share one upstream stream.
+    key = content_key(TTS_MODEL.encode(), voice.encode(), text.encode())
+    broadcast = _inflight.get(key)
+    if broadcast is None:
+        file = audio_cache.open(key)
+        if file is not None:
+            return _read_file(file)
+        broadcast = _inflight[key] = _Broadcast()
+        broadcast.task = asyncio.create_task(
+            _synthesize(key, text, voice, broadcast)
+        )
+    return broadcast.stream()
+
+
+def split_text(text: str) -> list[str]:
+    # Sentences longer than a chunk are broken between words.
+    pieces = [
+        piece
+        for sentence in _sentence_re.findall(text)
+        for piece in textwrap.wrap(
+            " ".join(sentence.split()), MAX_CHUNK_CHARS, break_on_hyphens=False
+        )
+    ]
+    chunks: list[str] = []
+    for piece in pieces:
+        limit = FIRST_CHUNK_CHARS if len(chunks) == 1 else MAX_CHUNK_CHARS
+        if chunks and len(chunks[-1]) + 1 + len(piece) <= limit:
+            chunks[-1] += " " + piece
+        else:
+            chunks.append(piece)
+    return chunks
+
+
+async def speech_stream(text: str, voice: str) -> AsyncIterator[bytes]:
+    # Chunks are synthesized concurrently, each cached on its own, and
+    # their audio is streamed in order: the first as it arrives, the rest
+    # buffered until their turn.
+    semaphore = asyncio.Semaphore(SYNTHESIS_CONCURRENCY)
+    chunks = split_text(text)
+    queues: list[asyncio.Queue] = [asyncio.Queue() for _ in chunks]
+
+    async def synthesize(chunk: str, queue: asyncio.Queue) -> None:
+        try:
+            async with semaphore:
+                async for audio in _cached_speech(chunk, voice):
+                    queue.put_nowait(audio)
+        except Exception as exc:
+            queue.put_nowait(exc)
+        else:
+            queue.put_nowait(None)
+
+    tasks = [
+        asyncio.create_task(synthesize(chunk, queue))
+        for chunk, queue in zip(chunks, queues)
+    ]
+    try:
+        for queue in queues:
+            while (audio := await queue.get()) is not None:
+                if isinstance(audio, Exception):
+                    raise audio
+                yield audio
+    finally:
+        for task in tasks:
+            task.cancel()
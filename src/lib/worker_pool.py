@@ -0,0 +1,53 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+Item = TypeVar("Item")
+Result = TypeVar("Result")
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned rather than forked so workers never inherit this
+            # process's database connections or listener thread.
+            _pool = ProcessPoolExecutor(
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def map_in_pool(
+    function: Callable[[Item], Result],
+    items: list[Item],
+    min_pool_items: int = 1,
+    chunksize: int = 1,
+) -> list[Result]:
+    # One pool of CPU-bound workers per process, shared by every caller.
+    # `function` runs in worker processes and must be module-level.
+    if len(items) < min_pool_items:
+        return [function(item) for item in items]
+    pool = _get_pool()
+    try:
+        return list(pool.map(function, items, chunksize=chunksize))
+    except BrokenProcessPool:
+        logger.exception("Worker pool failed, running inline")
+        _discard_pool(pool)
+        return [function(item) for item in items]
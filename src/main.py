@@ -9,12 +9,14 @@ from sqlmodel import SQLModel
 from admin import setup_admin
 from db import DB_NAMESPACE_HEADER, engine, normalize_db_namespace
 from lib.auth import get_bearer_token, get_decoded_token, require_user
+from lib.cache import start_listener
 from lib.env import AppEnv, env
 from models import (academic_class, academic_class_subject,
                     academic_class_subject_term, academic_session,
                     academic_term, app_settings, date_sheet,
-                    date_sheet_subject, enrollment, gk_competition_student,
-                    report_card, report_card_subject, student, subject, user)
+                    date_sheet_subject, enrollment, gk_competition_rank,
+                    gk_competition_student, report_card, report_card_subject,
+                    student, subject, user)
 from models.user import UserRead
 from routers import (academic_class_subject_terms, academic_class_subjects,
                      academic_classes, academic_sessions, academic_terms)
@@ -39,6 +41,7 @@ def create_all_models_without_migrations(allowed: bool):
             date_sheet,
             date_sheet_subject,
             enrollment,
+            gk_competition_rank,
             gk_competition_student,
             report_card,
             report_card_subject,
@@ -55,6 +58,7 @@ async def lifespan(app: FastAPI):
     # Startup logic
 
     create_all_models_without_migrations(allowed=False)
+    start_listener()
 
     yield
     # Shutdown logic (optional)
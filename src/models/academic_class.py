@@ -2,9 +2,9 @@ from datetime import datetime, timezone
 from typing import TYPE_CHECKING, Optional
 from uuid import UUID, uuid4
 
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import UniqueConstraint, case
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
-from sqlmodel import Field, Relationship, SQLModel
+from sqlmodel import Field, Relationship, SQLModel, col
 
 from models.academic_class_subject import (AcademicClassSubject,
                                            AcademicClassSubjectReadWithSubject)
@@ -62,6 +62,31 @@ class AcademicClass(AcademicClassBase, AcademicClassDB, table=True):
     pass
 
 
+grade_order = [
+    "PRE-NURSERY",
+    "NURSERY",
+    "LKG",
+    "UKG",
+    "I",
+    "II",
+    "III",
+    "IV",
+    "V",
+    "VI",
+    "VII",
+    "VIII",
+    "IX",
+    "X",
+    "XI",
+    "XII",
+]
+grade_rank = case(
+    {grade: index for index, grade in enumerate(grade_order)},
+    value=col(AcademicClass.grade),
+    else_=len(grade_order),
+)
+
+
 class AcademicClassCreate(AcademicClassBase):
     pass
 
@@ -3,9 +3,9 @@ from enum import Enum
 from typing import TYPE_CHECKING, Optional
 from uuid import UUID, uuid4
 
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import UniqueConstraint, case
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
-from sqlmodel import Field, Relationship, SQLModel
+from sqlmodel import Field, Relationship, SQLModel, col
 
 from models.academic_session import AcademicSessionRead
 
@@ -68,6 +68,23 @@ class AcademicTerm(AcademicTermBase, AcademicTermDB, table=True):
     pass
 
 
+term_rank = case(
+    (
+        col(AcademicTerm.term_type) == AcademicTermType.QUARTERLY,
+        0,
+    ),
+    (
+        col(AcademicTerm.term_type) == AcademicTermType.HALF_YEARLY,
+        1,
+    ),
+    (
+        col(AcademicTerm.term_type) == AcademicTermType.ANNUAL,
+        2,
+    ),
+    else_=3,
+)
+
+
 class AcademicTermCreate(AcademicTermBase):
     pass
 
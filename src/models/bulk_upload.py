@@ -0,0 +1,10 @@
+from typing import Optional
+
+from sqlmodel import SQLModel
+
+
+class BulkUploadRowError(SQLModel):
+    row: int
+    key: Optional[str] = None
+    field: Optional[str] = None
+    message: str
@@ -9,6 +9,7 @@ from sqlmodel import Field, Relationship, SQLModel
 from models.academic_class import AcademicClassRead
 from models.academic_term import AcademicTermRead
 from models.date_sheet_subject import DateSheetSubjectRead
+from models.enrollment import EnrollmentRead
 
 if TYPE_CHECKING:
     from models.academic_class import AcademicClass
@@ -84,6 +85,12 @@ class DateSheetReadDetail(DateSheetRead):
     date_sheet_subjects: list[DateSheetSubjectRead] = []
 
 
+class AdmitCardDataResponse(SQLModel):
+    enrollment: EnrollmentRead
+    academic_term: AcademicTermRead
+    date_sheet: DateSheetReadDetail | None = None
+
+
 class DateSheetReadRaw(DateSheetBase, DateSheetId):
     created_at: datetime
 
@@ -1,13 +1,17 @@
 from datetime import datetime, timezone
+from enum import Enum
 from typing import TYPE_CHECKING, ClassVar, Optional
 from uuid import UUID, uuid4
 
+from pydantic import computed_field
 from sqlalchemy import UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlmodel import Field, Relationship, SQLModel
 
+from lib.thumbnails import derivative_url
 from models.academic_class import AcademicClassRead
 from models.academic_session import AcademicSessionRead
+from models.bulk_upload import BulkUploadRowError
 
 if TYPE_CHECKING:
     from models.academic_class import AcademicClass
@@ -53,6 +57,9 @@ class Enrollment(EnrollmentBase, EnrollmentDB, table=True):
             name="uq_enrollment_session",
         ),
     )
+    # The `image` whose derivatives were rendered; they only exist while
+    # the two are equal.
+    thumbnails_image: Optional[str] = None
     student: Optional["Student"] = Relationship(
         back_populates="enrollments"
     )
@@ -86,6 +93,24 @@ class EnrollmentRead(EnrollmentBase, EnrollmentId):
     student: Optional["StudentRead"] = None
     academic_class: Optional[AcademicClassRead] = None
     academic_session: Optional[AcademicSessionRead] = None
+    thumbnails_image: Optional[str] = Field(default=None, exclude=True)
+
+    # Resized copies of `image` for lists and for printed cards, or `image`
+    # itself until they have been rendered.
+    def _derivative_url(self, variant: str) -> Optional[str]:
+        if self.image and self.image == self.thumbnails_image:
+            return derivative_url(self.image, variant)
+        return self.image
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def thumbnail_url(self) -> Optional[str]:
+        return self._derivative_url("thumbnail")
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def card_image_url(self) -> Optional[str]:
+        return self._derivative_url("card")
 
 
 class EnrollmentReadRaw(EnrollmentBase, EnrollmentId):
@@ -97,6 +122,48 @@ class EnrollmentListResponse(SQLModel):
     items: list[EnrollmentRead]
 
 
+class PhotoUploadMethod(str, Enum):
+    PUT = "put"
+    POST = "post"
+
+
+class PhotoUploadFile(SQLModel):
+    filename: str
+    registration_no: str
+
+
+class PhotoUploadManifest(SQLModel):
+    academic_session_id: UUID
+    files: list[PhotoUploadFile] = Field(max_length=2000)
+
+
+class PhotoUploadCreate(PhotoUploadManifest):
+    method: PhotoUploadMethod = PhotoUploadMethod.PUT
+
+
+class PhotoUploadTarget(SQLModel):
+    filename: str
+    registration_no: str
+    content_type: str
+    # Stored in Enrollment.image once the upload is completed.
+    image: str
+    upload_url: str
+    # Form fields to send along with a POST upload.
+    fields: Optional[dict[str, str]] = None
+
+
+class PhotoUploadSessionResponse(SQLModel):
+    upload_id: UUID
+    expires_in: int
+    files: list[PhotoUploadTarget]
+    errors: list[BulkUploadRowError]
+
+
+class PhotoUploadCompleteResponse(SQLModel):
+    updated: int
+    errors: list[BulkUploadRowError]
+
+
 try:
     from models.student import StudentRead
 
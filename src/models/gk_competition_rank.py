@@ -0,0 +1,65 @@
+from uuid import UUID
+
+from sqlalchemy import Column, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlmodel import Field, SQLModel
+
+from models.gk_competition_student import GKCompetitionStudentRead
+
+
+# Derived from gk_competition_students and rebuilt whenever marks change, so
+# reads never rank the whole table. Only students with marks are ranked.
+class GKCompetitionRankBase(SQLModel):
+    marks: int
+    group: str
+    class_name: str
+    overall_rank: int
+    overall_percentile: float
+    group_rank: int
+    group_percentile: float
+    class_rank: int
+    class_percentile: float
+
+
+class GKCompetitionRank(GKCompetitionRankBase, table=True):
+    __tablename__ = "gk_competition_ranks"  # type: ignore
+    __table_args__ = (
+        Index("ix_gk_competition_ranks_overall_rank", "overall_rank"),
+        Index("ix_gk_competition_ranks_group_rank", "group", "group_rank"),
+        Index(
+            "ix_gk_competition_ranks_class_rank", "class_name", "class_rank"
+        ),
+    )
+    gk_competition_student_id: UUID = Field(
+        sa_column=Column(
+            PG_UUID(as_uuid=True),
+            ForeignKey("gk_competition_students.id", ondelete="CASCADE"),
+            primary_key=True,
+        )
+    )
+
+
+class GKCompetitionRankRead(SQLModel):
+    overall_rank: int
+    overall_percentile: float
+    group_rank: int
+    group_percentile: float
+    class_rank: int
+    class_percentile: float
+
+
+class GKCompetitionLeaderboardItem(SQLModel):
+    rank: int
+    percentile: float
+    gk_competition_student: GKCompetitionStudentRead
+
+
+class GKCompetitionLeaderboardResponse(SQLModel):
+    total: int
+    scope: str
+    items: list[GKCompetitionLeaderboardItem]
+
+
+class GKCompetitionStudentDataResponse(SQLModel):
+    gk_competition_student: GKCompetitionStudentRead
+    rank: GKCompetitionRankRead | None = None
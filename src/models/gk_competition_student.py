@@ -2,10 +2,12 @@ from datetime import datetime, timezone
 from typing import Optional
 from uuid import UUID, uuid4
 
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import Index, UniqueConstraint, func
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlmodel import Field, SQLModel
 
+from models.bulk_upload import BulkUploadRowError
+
 
 class GKCompetitionStudentDB(SQLModel):
     id: Optional[UUID] = Field(
@@ -54,6 +56,13 @@ class GKCompetitionStudent(
     pass
 
 
+# Matches the trim(school_name) used by the school filter and options list.
+Index(
+    "ix_gk_competition_students_trim_school_name",
+    func.trim(GKCompetitionStudent.__table__.c.school_name),  # type: ignore
+)
+
+
 class GKCompetitionStudentCreate(GKCompetitionStudentBase):
     pass
 
@@ -95,3 +104,20 @@ class GKCompetitionStudentReadRaw(
 class GKCompetitionStudentListResponse(SQLModel):
     total: int
     items: list[GKCompetitionStudentRead]
+
+
+class GKCompetitionStudentBulkUploadResponse(SQLModel):
+    total_rows: int
+    created: int
+    updated: int
+    unchanged: int
+    committed: bool
+    errors: list[BulkUploadRowError]
+
+
+class GKCompetitionMarksUploadResponse(SQLModel):
+    total_rows: int
+    updated: int
+    unchanged: int
+    committed: bool
+    errors: list[BulkUploadRowError]
@@ -116,6 +116,11 @@ class ReportCardReadDetailWithSubjects(ReportCardReadDetail):
     report_card_subjects: list[ReportCardSubjectRead] = []
 
 
+class ReportCardDataResponse(SQLModel):
+    report_card: ReportCardReadDetailWithSubjects
+    half_yearly_report_card: ReportCardReadDetailWithSubjects | None = None
+
+
 class ReportCardListResponse(SQLModel):
     total: int
     items: list[ReportCardReadDetailWithSubjects]
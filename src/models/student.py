@@ -5,6 +5,7 @@ from uuid import UUID, uuid4
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlmodel import Field, Relationship, SQLModel
 
+from models.bulk_upload import BulkUploadRowError
 from models.enrollment import EnrollmentRead
 
 if TYPE_CHECKING:
@@ -66,3 +67,15 @@ class StudentReadRaw(StudentBase, StudentId):
 class StudentListResponse(SQLModel):
     total: int
     items: list[StudentRead]
+
+
+class StudentBulkUploadResponse(SQLModel):
+    total_rows: int
+    students_created: int
+    students_updated: int
+    students_unchanged: int
+    enrollments_created: int
+    enrollments_updated: int
+    enrollments_unchanged: int
+    committed: bool
+    errors: list[BulkUploadRowError]
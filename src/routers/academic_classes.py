@@ -2,14 +2,15 @@ from typing import cast
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import case, func
+from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, col, select
 
 from db import get_session
 from models.academic_class import (AcademicClass, AcademicClassCreate,
                                    AcademicClassListResponse,
-                                   AcademicClassRead, AcademicClassUpdate)
+                                   AcademicClassRead, AcademicClassUpdate,
+                                   grade_rank)
 from models.academic_session import AcademicSession
 
 router = APIRouter(
@@ -37,31 +38,6 @@ def create_academic_class(
     return db_academic_class
 
 
-grade_order = [
-    "PRE-NURSERY",
-    "NURSERY",
-    "LKG",
-    "UKG",
-    "I",
-    "II",
-    "III",
-    "IV",
-    "V",
-    "VI",
-    "VII",
-    "VIII",
-    "IX",
-    "X",
-    "XI",
-    "XII",
-]
-grade_rank = case(
-    {grade: index for index, grade in enumerate(grade_order)},
-    value=col(AcademicClass.grade),
-    else_=len(grade_order),
-)
-
-
 @router.get("", response_model=AcademicClassListResponse)
 def list_academic_classes(
     academic_session_id: UUID | None = Query(default=None),
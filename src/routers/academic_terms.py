@@ -2,7 +2,7 @@ from typing import cast
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import case, func
+from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, col, select
 
@@ -10,7 +10,7 @@ from db import get_session
 from models.academic_session import AcademicSession
 from models.academic_term import (AcademicTerm, AcademicTermCreate,
                                   AcademicTermListResponse, AcademicTermRead,
-                                  AcademicTermType, AcademicTermUpdate)
+                                  AcademicTermUpdate, term_rank)
 
 router = APIRouter(
     prefix="/academic-terms",
@@ -37,23 +37,6 @@ def create_academic_term(
     return db_academic_term
 
 
-term_rank = case(
-    (
-        col(AcademicTerm.term_type) == AcademicTermType.QUARTERLY,
-        0,
-    ),
-    (
-        col(AcademicTerm.term_type) == AcademicTermType.HALF_YEARLY,
-        1,
-    ),
-    (
-        col(AcademicTerm.term_type) == AcademicTermType.ANNUAL,
-        2,
-    ),
-    else_=3,
-)
-
-
 @router.get("", response_model=AcademicTermListResponse)
 def list_academic_terms(
     academic_session_id: UUID | None = Query(default=None),
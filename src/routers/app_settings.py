@@ -4,6 +4,8 @@ from fastapi import APIRouter, Depends
 from sqlmodel import Session, select
 
 from db import get_session
+from lib.cache import NamespaceCache
+from lib.gk_results import warm_lookup_table
 from models.app_settings import (SINGLETON_APP_SETTINGS_ID, AppSettings,
                                  AppSettingsRead, AppSettingsUpdate)
 
@@ -27,9 +29,20 @@ def _get_or_create_settings(session: Session) -> AppSettings:
     return settings
 
 
+settings_cache = NamespaceCache("app_settings")
+
+
+def _load_settings(session: Session) -> AppSettingsRead:
+    return AppSettingsRead.model_validate(_get_or_create_settings(session))
+
+
+def get_cached_settings(session: Session) -> AppSettingsRead:
+    return settings_cache.get(session, _load_settings)
+
+
 @router.get("", response_model=AppSettingsRead)
 def get_settings(session: Session = Depends(get_session)):
-    return _get_or_create_settings(session)
+    return get_cached_settings(session)
 
 
 @router.patch("", response_model=AppSettingsRead)
@@ -39,10 +52,19 @@ def update_settings(
 ):
     settings = _get_or_create_settings(session)
     update_data = payload.model_dump(exclude_unset=True)
+    publishing_results = (
+        update_data.get("gk_competition_result_active") is True
+        and not settings.gk_competition_result_active
+    )
     for key, value in update_data.items():
         setattr(settings, key, value)
     settings.updated_at = datetime.now(timezone.utc)
     session.add(settings)
+    settings_cache.publish(session)
     session.commit()
     session.refresh(settings)
+    if publishing_results:
+        # Build the public result lookup now rather than on the first of
+        # many simultaneous requests.
+        warm_lookup_table(session)
     return settings
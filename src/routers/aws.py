@@ -1,23 +1,33 @@
-import re
+import threading
+import time
 from enum import Enum
+from typing import Iterable
 
-import boto3
-from botocore.config import Config
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from sqlmodel import Session
 
+from db import get_session
 from lib.env import env
+from lib.s3 import s3
+from lib.s3_urls import s3_url_re
+from lib.thumbnail_pipeline import ensure_thumbnails
+from lib.thumbnails import THUMBNAIL_VARIANTS, derivative_url
 
-s3 = boto3.client(
-    "s3",
-    region_name=env.AWS_REGION,
-    aws_access_key_id=env.AWS_ACCESS_KEY,
-    aws_secret_access_key=env.AWS_SECRET_ACCESS_KEY,
-    config=Config(signature_version="s3v4"),
-)
+router = APIRouter(prefix="/aws", tags=["aws"])
 
+DOWNLOAD_URL_EXPIRES_SECONDS = 86400
+# A signed URL is reused until less than this much of its lifetime is
+# left, so a client always gets at least this long to fetch the object.
+DOWNLOAD_URL_MIN_REMAINING_SECONDS = 6 * 3600
+MAX_CACHED_DOWNLOAD_URLS = 50000
+MAX_BATCH_URLS = 5000
+MAX_THUMBNAIL_URLS = 500
 
-router = APIRouter(prefix="/aws", tags=["aws"])
+# (bucket, key) -> (expires_at, url). Every URL is signed with the same
+# lifetime, so insertion order is also expiry order.
+_download_urls: dict[tuple[str, str], tuple[float, str]] = {}
+_download_urls_lock = threading.Lock()
 
 
 class S3Access(str, Enum):
@@ -34,9 +44,24 @@ class UrlQuery(BaseModel):
     url: str
 
 
-s3_url_re = re.compile(
-    r"^https://(?P<bucket>[\w.-]+)\.s3(?:\.(?P<region>[\w-]+))?\.amazonaws\.com/(?P<key>.+)$"
-)
+class DownloadUrlsBody(BaseModel):
+    urls: list[str] = Field(max_length=MAX_BATCH_URLS)
+
+
+class DownloadUrlsResponse(BaseModel):
+    # Requested URL -> presigned URL.
+    urls: dict[str, str]
+    invalid: list[str]
+
+
+class ThumbnailsBody(BaseModel):
+    urls: list[str] = Field(max_length=MAX_THUMBNAIL_URLS)
+
+
+class ThumbnailsResponse(BaseModel):
+    # Photo URL -> variant name -> derivative URL.
+    urls: dict[str, dict[str, str]]
+    invalid: list[str]
 
 
 def parse_s3_url(url: str):
@@ -46,6 +71,64 @@ def parse_s3_url(url: str):
     return m.group("bucket"), m.group("key")
 
 
+def parse_s3_urls(
+    urls: Iterable[str],
+) -> tuple[dict[str, tuple[str, str]], list[str]]:
+    # Each distinct URL is matched once; returns the parsed (bucket, key)
+    # pairs and the URLs that are not S3 objects.
+    parsed: dict[str, tuple[str, str]] = {}
+    invalid: list[str] = []
+    for url in dict.fromkeys(urls):
+        m = s3_url_re.match(url.split("?")[0])
+        if m:
+            parsed[url] = (m.group("bucket"), m.group("key"))
+        else:
+            invalid.append(url)
+    return parsed, invalid
+
+
+def _evict_download_urls(now: float) -> None:
+    while _download_urls:
+        oldest = next(iter(_download_urls))
+        expires_at, _ = _download_urls[oldest]
+        if (
+            expires_at - now > DOWNLOAD_URL_MIN_REMAINING_SECONDS
+            and len(_download_urls) <= MAX_CACHED_DOWNLOAD_URLS
+        ):
+            break
+        del _download_urls[oldest]
+
+
+def presign_download_url(bucket: str, key: str) -> str:
+    now = time.monotonic()
+    cached = _download_urls.get((bucket, key))
+    if cached and cached[0] - now > DOWNLOAD_URL_MIN_REMAINING_SECONDS:
+        return cached[1]
+    url = s3.generate_presigned_url(
+        "get_object",
+        Params={"Bucket": bucket, "Key": key},
+        ExpiresIn=DOWNLOAD_URL_EXPIRES_SECONDS,
+    )
+    with _download_urls_lock:
+        _download_urls.pop((bucket, key), None)
+        _download_urls[(bucket, key)] = (
+            now + DOWNLOAD_URL_EXPIRES_SECONDS,
+            url,
+        )
+        _evict_download_urls(now)
+    return url
+
+
+def presign_download_urls(urls: Iterable[str]) -> dict[str, str]:
+    # Signing happens locally, so a whole batch costs no S3 round trips.
+    # URLs that are not S3 objects are left out.
+    parsed, _ = parse_s3_urls(urls)
+    return {
+        url: presign_download_url(bucket, key)
+        for url, (bucket, key) in parsed.items()
+    }
+
+
 @router.get("/upload-url")
 def get_upload_url(q: UploadQuery = Depends()):
     bucket = env.AWS_PUBLIC_BUCKET if q.access == S3Access.PUBLIC else env.AWS_PRIVATE_BUCKET
@@ -60,12 +143,19 @@ def get_upload_url(q: UploadQuery = Depends()):
 @router.get("/download-url")
 def get_download_url(q: UrlQuery = Depends()):
     bucket, key = parse_s3_url(q.url.split("?")[0])
-    url = s3.generate_presigned_url(
-        "get_object",
-        Params={"Bucket": bucket, "Key": key},
-        ExpiresIn=86400,
+    return {"url": presign_download_url(bucket, key)}
+
+
+@router.post("/download-urls", response_model=DownloadUrlsResponse)
+def get_download_urls(body: DownloadUrlsBody):
+    parsed, invalid = parse_s3_urls(body.urls)
+    return DownloadUrlsResponse(
+        urls={
+            url: presign_download_url(bucket, key)
+            for url, (bucket, key) in parsed.items()
+        },
+        invalid=invalid,
     )
-    return {"url": url}
 
 
 @router.delete("/s3-url")
@@ -73,3 +163,26 @@ def delete_s3_url(q: UrlQuery = Depends()):
     bucket, key = parse_s3_url(q.url.split("?")[0])
     s3.delete_object(Bucket=bucket, Key=key)
     return {"status": "deleted", "bucket": bucket, "key": key}
+
+
+@router.post("/thumbnails", response_model=ThumbnailsResponse)
+def create_thumbnails(
+    body: ThumbnailsBody,
+    session: Session = Depends(get_session),
+):
+    # Called once an upload completes, or for photos whose derivatives
+    # were never rendered; existing ones are not rendered again.
+    _, invalid = parse_s3_urls(body.urls)
+    failed = ensure_thumbnails(body.urls, session.info.get("db_namespace"))
+    skipped = failed.union(invalid)
+    return ThumbnailsResponse(
+        urls={
+            url: {
+                variant: derivative_url(url, variant) or ""
+                for variant in THUMBNAIL_VARIANTS
+            }
+            for url in dict.fromkeys(body.urls)
+            if url not in skipped
+        },
+        invalid=invalid + sorted(failed),
+    )
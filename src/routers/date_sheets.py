@@ -1,19 +1,26 @@
-from typing import cast
+from typing import Iterator, cast
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import contains_eager, selectinload
 from sqlmodel import Session, col, select
 
 from db import get_session
+from lib.reference_data import (get_academic_class, get_academic_session,
+                                get_academic_term)
 from models.academic_class import AcademicClass
 from models.academic_class_subject import AcademicClassSubject
-from models.academic_term import AcademicTerm
-from models.date_sheet import (DateSheet, DateSheetCreate,
-                               DateSheetListResponse, DateSheetRead,
-                               DateSheetReadDetail, DateSheetUpdate)
+from models.academic_term import AcademicTerm, AcademicTermRead
+from models.date_sheet import (AdmitCardDataResponse, DateSheet,
+                               DateSheetCreate, DateSheetListResponse,
+                               DateSheetRead, DateSheetReadDetail,
+                               DateSheetUpdate)
 from models.date_sheet_subject import DateSheetSubject, DateSheetSubjectRead
+from models.enrollment import Enrollment, EnrollmentRead, EnrollmentReadRaw
+from models.student import Student, StudentRead
 
 router = APIRouter(
     prefix="/date-sheets",
@@ -152,6 +159,12 @@ def query_date_sheet_subjects(
             col(AcademicClassSubject.position).asc(),
             col(DateSheetSubject.created_at).desc(),
         )
+        .options(
+            contains_eager(DateSheetSubject.academic_class_subject).options(
+                selectinload(AcademicClassSubject.subject),
+                selectinload(AcademicClassSubject.class_subject_terms),
+            )
+        )
     ).all()
     return [
         DateSheetSubjectRead.model_validate(item)
@@ -159,12 +172,9 @@ def query_date_sheet_subjects(
     ]
 
 
-@router.get("/find", response_model=DateSheetReadDetail)
-def find_date_sheet(
-    academic_class_id: UUID = Query(...),
-    academic_term_id: UUID = Query(...),
-    session: Session = Depends(get_session),
-):
+def query_date_sheet_detail(
+    session: Session, academic_class_id: UUID, academic_term_id: UUID
+) -> DateSheetReadDetail | None:
     date_sheet = session.exec(
         select(DateSheet).where(
             DateSheet.academic_class_id == academic_class_id,
@@ -172,14 +182,92 @@ def find_date_sheet(
         )
     ).first()
     if not date_sheet:
-        raise HTTPException(status_code=404, detail="Date sheet not found")
+        return None
     date_sheet_read = DateSheetRead.model_validate(date_sheet)
-    date_sheet_subjects = query_date_sheet_subjects(
-        session, date_sheet_read.id
-    )
     return DateSheetReadDetail(
         **date_sheet_read.model_dump(),
-        date_sheet_subjects=date_sheet_subjects,
+        date_sheet_subjects=query_date_sheet_subjects(
+            session, date_sheet_read.id
+        ),
+    )
+
+
+@router.get("/find", response_model=DateSheetReadDetail)
+def find_date_sheet(
+    academic_class_id: UUID = Query(...),
+    academic_term_id: UUID = Query(...),
+    session: Session = Depends(get_session),
+):
+    date_sheet = query_date_sheet_detail(
+        session, academic_class_id, academic_term_id
+    )
+    if not date_sheet:
+        raise HTTPException(status_code=404, detail="Date sheet not found")
+    return date_sheet
+
+
+def iter_admit_card_data(
+    session: Session,
+    academic_term: AcademicTermRead,
+    academic_class_id: UUID,
+) -> Iterator[AdmitCardDataResponse]:
+    # Same documents as /public/admit-card-data for every student of the
+    # class; the date sheet, class and session are shared by all of them.
+    date_sheet = query_date_sheet_detail(
+        session, academic_class_id, academic_term.id
+    )
+    academic_class = get_academic_class(session, academic_class_id)
+    academic_session = get_academic_session(
+        session, academic_term.academic_session_id
+    )
+    enrollments = session.exec(
+        select(Enrollment)
+        .join(Student, col(Student.id) == col(Enrollment.student_id))
+        .where(
+            Enrollment.academic_class_id == academic_class_id,
+            Enrollment.academic_session_id
+            == academic_term.academic_session_id,
+        )
+        .order_by(col(Student.name), col(Student.registration_no))
+        .options(contains_eager(Enrollment.student))
+    ).all()
+    for enrollment in enrollments:
+        yield AdmitCardDataResponse(
+            enrollment=EnrollmentRead(
+                **dict(EnrollmentReadRaw.model_validate(enrollment)),
+                thumbnails_image=enrollment.thumbnails_image,
+                student=StudentRead.model_validate(enrollment.student),
+                academic_class=academic_class,
+                academic_session=academic_session,
+            ),
+            academic_term=academic_term,
+            date_sheet=date_sheet,
+        )
+
+
+@router.get("/admit-cards/export")
+def export_admit_cards(
+    academic_class_id: UUID = Query(...),
+    academic_term_id: UUID = Query(...),
+    session: Session = Depends(get_session),
+):
+    academic_term = get_academic_term(session, academic_term_id)
+    if not academic_term:
+        raise HTTPException(
+            status_code=404, detail="Academic term not found"
+        )
+    if not get_academic_class(session, academic_class_id):
+        raise HTTPException(
+            status_code=404, detail="Academic class not found"
+        )
+    return StreamingResponse(
+        (
+            data.model_dump_json() + "\n"
+            for data in iter_admit_card_data(
+                session, academic_term, academic_class_id
+            )
+        ),
+        media_type="application/x-ndjson",
     )
 
 
@@ -1,7 +1,10 @@
 import json
+import zlib
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
 from sqlmodel import Session, col, select
 
 from db import get_session
@@ -25,6 +28,7 @@ from models.user import User, UserReadRaw
 router = APIRouter(prefix="/dev", tags=["dev"])
 
 SEED_DATA_DIR = Path(__file__).resolve().parents[2] / "seeders" / "data"
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 def _load_seed_data() -> dict[str, object]:
@@ -252,6 +256,23 @@ ROUTE_HANDLERS = {
 }
 
 
+ROUTE_TABLE_MODELS = {
+    "students": Student,
+    "enrollments": Enrollment,
+    "academic_sessions": AcademicSession,
+    "academic_classes": AcademicClass,
+    "academic_terms": AcademicTerm,
+    "subjects": Subject,
+    "academic_class_subjects": AcademicClassSubject,
+    "academic_class_subject_terms": AcademicClassSubjectTerm,
+    "report_cards": ReportCard,
+    "report_card_subjects": ReportCardSubject,
+    "date_sheets": DateSheet,
+    "date_sheet_subjects": DateSheetSubject,
+    "users": User,
+}
+
+
 ROUTE_RESPONSE_MODELS = {
     "students": StudentReadRaw,
     "enrollments": EnrollmentReadRaw,
@@ -274,3 +295,150 @@ def fetch_route_data(route: str, session: Session):
     if handler is None:
         raise KeyError(f"Unknown route: {route}")
     return handler(session=session)
+
+
+def fetch_route_fingerprint(route: str, session: Session) -> dict[str, object]:
+    model = ROUTE_TABLE_MODELS.get(route)
+    if model is None:
+        raise KeyError(f"Unknown route: {route}")
+    table_name = model.__tablename__
+    row = session.connection().execute(
+        text(
+            "SELECT count(*), max(t.created_at), "
+            "md5(coalesce(string_agg(t::text, ',' ORDER BY t.id), '')) "
+            f'FROM "{table_name}" AS t'
+        )
+    ).one()
+    rows, max_created_at, checksum = row
+    return {
+        "rows": rows,
+        "max_created_at": (
+            max_created_at.isoformat() if max_created_at else None
+        ),
+        "checksum": checksum,
+    }
+
+
+def iter_route_data(route: str, session: Session, batch_size: int = 500):
+    model = ROUTE_TABLE_MODELS.get(route)
+    if model is None:
+        raise KeyError(f"Unknown route: {route}")
+    statement = (
+        select(model)
+        .order_by(col(model.created_at).desc())
+        .execution_options(yield_per=batch_size)
+    )
+    for item in session.exec(statement):
+        yield item
+        session.expunge(item)
+
+
+def _resolve_stream_routes(tables: list[str] | None) -> list[str]:
+    if not tables:
+        return list(ROUTE_TABLE_MODELS)
+    unknown = sorted(set(tables) - set(ROUTE_TABLE_MODELS))
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown tables: {unknown}",
+        )
+    return [route for route in ROUTE_TABLE_MODELS if route in tables]
+
+
+def _iter_route_json(route: str, session: Session):
+    response_model = ROUTE_RESPONSE_MODELS[route]
+    for item in iter_route_data(route, session):
+        yield response_model.model_validate(item).model_dump_json()
+
+
+def _iter_ndjson(routes: list[str], session: Session):
+    for route in routes:
+        table = json.dumps(route)
+        for row in _iter_route_json(route, session):
+            yield f'{{"table":{table},"row":{row}}}\n'
+
+
+def _iter_json_document(routes: list[str], session: Session):
+    yield "{"
+    for route_index, route in enumerate(routes):
+        prefix = "," if route_index else ""
+        yield f"{prefix}{json.dumps(route)}:["
+        for row_index, row in enumerate(_iter_route_json(route, session)):
+            yield f",{row}" if row_index else row
+        yield "]"
+    yield "}"
+
+
+def _iter_json_array(route: str, session: Session):
+    yield "["
+    for row_index, row in enumerate(_iter_route_json(route, session)):
+        yield f",{row}" if row_index else row
+    yield "]"
+
+
+def _buffer_chunks(parts, use_gzip: bool):
+    compressor = zlib.compressobj(wbits=31) if use_gzip else None
+    buffer: list[bytes] = []
+    buffered = 0
+    for part in parts:
+        data = part.encode("utf-8")
+        buffer.append(data)
+        buffered += len(data)
+        if buffered < STREAM_CHUNK_SIZE:
+            continue
+        chunk = b"".join(buffer)
+        buffer, buffered = [], 0
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+    chunk = b"".join(buffer)
+    if compressor is not None:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def _streaming_response(parts, media_type: str, use_gzip: bool):
+    headers = {"Content-Encoding": "gzip"} if use_gzip else None
+    return StreamingResponse(
+        _buffer_chunks(parts, use_gzip),
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+@router.get("/db_data/stream")
+def stream_db_data(
+    tables: list[str] | None = Query(default=None),
+    format: str = Query("ndjson", pattern="^(ndjson|json)$"),
+    gzip: bool = Query(False),
+    session: Session = Depends(get_session),
+):
+    routes = _resolve_stream_routes(tables)
+    if format == "json":
+        return _streaming_response(
+            _iter_json_document(routes, session),
+            "application/json",
+            gzip,
+        )
+    return _streaming_response(
+        _iter_ndjson(routes, session),
+        "application/x-ndjson",
+        gzip,
+    )
+
+
+@router.get("/{route}/stream")
+def stream_raw_route(
+    route: str,
+    gzip: bool = Query(False),
+    session: Session = Depends(get_session),
+):
+    if route not in ROUTE_TABLE_MODELS:
+        raise HTTPException(status_code=404, detail=f"Unknown route: {route}")
+    return _streaming_response(
+        _iter_json_array(route, session),
+        "application/json",
+        gzip,
+    )
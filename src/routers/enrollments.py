@@ -1,29 +1,64 @@
+import os
 from typing import cast
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import contains_eager, selectinload
 from sqlmodel import Session, SQLModel, col, select
 
 from db import get_session
-from models.academic_class import AcademicClass
+from lib.csv_upload import bulk_update
+from lib.env import env
+from lib.json_response import ModelJSONResponse
+from lib.reference_data import get_academic_class, get_academic_session
+from lib.s3 import object_exists, s3, s3_io_executor
+from lib.s3_urls import object_url
+from lib.thumbnail_pipeline import schedule_thumbnails
+from models.academic_class import AcademicClass, grade_rank
 from models.academic_session import AcademicSession
+from models.bulk_upload import BulkUploadRowError
 from models.enrollment import (Enrollment, EnrollmentCreate,
                                EnrollmentListResponse, EnrollmentRead,
-                               EnrollmentUpdate)
-from models.student import Student
+                               EnrollmentReadRaw, EnrollmentUpdate,
+                               PhotoUploadCompleteResponse, PhotoUploadCreate,
+                               PhotoUploadManifest, PhotoUploadMethod,
+                               PhotoUploadSessionResponse, PhotoUploadTarget)
+from models.student import Student, StudentRead
+from routers.aws import presign_download_urls
 
 router = APIRouter(
     prefix="/enrollments",
     tags=["enrollments"],
 )
 
+PHOTO_UPLOAD_EXPIRES_SECONDS = 3600
+MAX_PHOTO_BYTES = 20 * 1024 * 1024
+PHOTO_CONTENT_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".webp": "image/webp",
+}
+
 
 class EnrollmentCountResponse(SQLModel):
     total: int
 
 
+class EnrollmentIdCard(SQLModel):
+    enrollment: EnrollmentRead
+    # Presigned download URLs for enrollment.image and
+    # enrollment.card_image_url.
+    image_url: str | None = None
+    card_image_url: str | None = None
+
+
+class EnrollmentIdCardListResponse(SQLModel):
+    items: list[EnrollmentIdCard]
+
+
 @router.post("", response_model=EnrollmentRead)
 def create_enrollment(
     enrollment: EnrollmentCreate,
@@ -100,9 +135,14 @@ def list_enrollments(
         )
         .offset(offset)
         .limit(limit)
+        .options(
+            contains_eager(Enrollment.student),
+            contains_eager(Enrollment.academic_session),
+            selectinload(Enrollment.academic_class),
+        )
     ).all()
     items = cast(list[EnrollmentRead], results)
-    return EnrollmentListResponse(total=total, items=items)
+    return ModelJSONResponse(EnrollmentListResponse(total=total, items=items))
 
 
 @router.get("/count", response_model=EnrollmentCountResponse)
@@ -119,6 +159,259 @@ def count_enrollments(
     return EnrollmentCountResponse(total=total)
 
 
+def _presigned(image_urls: dict[str, str], url: str | None) -> str | None:
+    return image_urls.get(url) if url else None
+
+
+@router.get("/id-cards", response_model=EnrollmentIdCardListResponse)
+def list_id_cards(
+    academic_session_id: UUID = Query(...),
+    academic_class_id: UUID | None = Query(default=None),
+    session: Session = Depends(get_session),
+):
+    # Everything needed to print ID cards for a class or a whole session,
+    # with the photos already presigned.
+    academic_session = get_academic_session(session, academic_session_id)
+    if not academic_session:
+        raise HTTPException(
+            status_code=404, detail="Academic session not found"
+        )
+    statement = (
+        select(Enrollment)
+        .join(Student, col(Student.id) == col(Enrollment.student_id))
+        .join(
+            AcademicClass,
+            col(AcademicClass.id) == col(Enrollment.academic_class_id),
+        )
+        .where(Enrollment.academic_session_id == academic_session_id)
+        .options(contains_eager(Enrollment.student))
+    )
+    if academic_class_id:
+        academic_class = get_academic_class(session, academic_class_id)
+        if not academic_class:
+            raise HTTPException(
+                status_code=404, detail="Academic class not found"
+            )
+        if academic_class.academic_session_id != academic_session_id:
+            raise HTTPException(
+                status_code=400,
+                detail="Academic session does not match the class session",
+            )
+        statement = statement.where(
+            Enrollment.academic_class_id == academic_class_id
+        )
+    enrollments = session.exec(
+        statement.order_by(
+            grade_rank,
+            col(AcademicClass.section),
+            col(Student.name),
+            col(Student.registration_no),
+        )
+    ).all()
+    items = [
+        EnrollmentRead(
+            **dict(EnrollmentReadRaw.model_validate(enrollment)),
+            thumbnails_image=enrollment.thumbnails_image,
+            student=StudentRead.model_validate(enrollment.student),
+            academic_class=get_academic_class(
+                session, enrollment.academic_class_id
+            ),
+            academic_session=academic_session,
+        )
+        for enrollment in enrollments
+    ]
+    images = [item.image for item in items if item.image]
+    image_urls = presign_download_urls(
+        images + [item.card_image_url for item in items if item.card_image_url]
+    )
+    return EnrollmentIdCardListResponse(
+        items=[
+            EnrollmentIdCard(
+                enrollment=item,
+                image_url=_presigned(image_urls, item.image),
+                card_image_url=_presigned(image_urls, item.card_image_url),
+            )
+            for item in items
+        ]
+    )
+
+
+# (row, enrollment id, registration number, filename, object key,
+# content type) for every usable file of an upload manifest.
+PhotoUploadEntry = tuple[int, UUID, str, str, str, str]
+
+
+def _resolve_photo_manifest(
+    session: Session, manifest: PhotoUploadManifest, upload_id: UUID
+) -> tuple[list[PhotoUploadEntry], list[BulkUploadRowError]]:
+    # Keys are derived from the upload id and registration number, so the
+    # same manifest resolves to the same objects when it is completed.
+    if not get_academic_session(session, manifest.academic_session_id):
+        raise HTTPException(
+            status_code=404, detail="Academic session not found"
+        )
+    registration_nos = [
+        file.registration_no.strip() for file in manifest.files
+    ]
+    enrollment_ids = {
+        row.registration_no: row.id
+        for row in session.exec(
+            select(Enrollment.id, Student.registration_no)
+            .join(Student, col(Student.id) == col(Enrollment.student_id))
+            .where(
+                Enrollment.academic_session_id
+                == manifest.academic_session_id,
+                col(Student.registration_no).in_(registration_nos),
+            )
+        ).all()
+    }
+    entries: list[PhotoUploadEntry] = []
+    errors: list[BulkUploadRowError] = []
+    seen: set[str] = set()
+    for row, (file, registration_no) in enumerate(
+        zip(manifest.files, registration_nos), start=1
+    ):
+        extension = os.path.splitext(file.filename)[1].lower()
+        content_type = PHOTO_CONTENT_TYPES.get(extension)
+        enrollment_id = enrollment_ids.get(registration_no)
+        if content_type is None:
+            field, message = "filename", "Unsupported image type"
+        elif registration_no in seen:
+            field, message = "registration_no", "Duplicate registration number"
+        elif enrollment_id is None:
+            field, message = (
+                "registration_no",
+                "Student is not enrolled in this session",
+            )
+        else:
+            seen.add(registration_no)
+            key = (
+                f"enrollment-photos/{manifest.academic_session_id}/"
+                f"{upload_id}/{registration_no}{extension}"
+            )
+            entries.append(
+                (
+                    row,
+                    enrollment_id,
+                    registration_no,
+                    file.filename,
+                    key,
+                    content_type,
+                )
+            )
+            continue
+        errors.append(
+            BulkUploadRowError(
+                row=row, key=file.filename, field=field, message=message
+            )
+        )
+    return entries, errors
+
+
+@router.post("/photo-uploads", response_model=PhotoUploadSessionResponse)
+def create_photo_upload(
+    body: PhotoUploadCreate,
+    session: Session = Depends(get_session),
+):
+    # Presigned uploads for a whole class of photos at once; files go
+    # straight to the bucket and are linked to enrollments on completion.
+    upload_id = uuid4()
+    entries, errors = _resolve_photo_manifest(session, body, upload_id)
+    # Student photos are only ever read through presigned URLs.
+    bucket = env.AWS_PRIVATE_BUCKET
+    targets = []
+    for _, _, registration_no, filename, key, content_type in entries:
+        if body.method == PhotoUploadMethod.POST:
+            # A POST policy also caps the file size.
+            post = s3.generate_presigned_post(
+                Bucket=bucket,
+                Key=key,
+                Fields={"Content-Type": content_type},
+                Conditions=[
+                    {"Content-Type": content_type},
+                    ["content-length-range", 1, MAX_PHOTO_BYTES],
+                ],
+                ExpiresIn=PHOTO_UPLOAD_EXPIRES_SECONDS,
+            )
+            upload_url, fields = post["url"], post["fields"]
+        else:
+            upload_url = s3.generate_presigned_url(
+                "put_object",
+                Params={
+                    "Bucket": bucket,
+                    "Key": key,
+                    "ContentType": content_type,
+                },
+                ExpiresIn=PHOTO_UPLOAD_EXPIRES_SECONDS,
+            )
+            fields = None
+        targets.append(
+            PhotoUploadTarget(
+                filename=filename,
+                registration_no=registration_no,
+                content_type=content_type,
+                image=object_url(bucket, key),
+                upload_url=upload_url,
+                fields=fields,
+            )
+        )
+    return PhotoUploadSessionResponse(
+        upload_id=upload_id,
+        expires_in=PHOTO_UPLOAD_EXPIRES_SECONDS,
+        files=targets,
+        errors=errors,
+    )
+
+
+@router.post(
+    "/photo-uploads/{upload_id}/complete",
+    response_model=PhotoUploadCompleteResponse,
+)
+def complete_photo_upload(
+    upload_id: UUID,
+    body: PhotoUploadManifest,
+    session: Session = Depends(get_session),
+):
+    # Takes the manifest the upload was created with; files that never
+    # reached the bucket are reported and left out.
+    entries, errors = _resolve_photo_manifest(session, body, upload_id)
+    bucket = env.AWS_PRIVATE_BUCKET
+    uploaded = list(
+        s3_io_executor.map(
+            lambda entry: object_exists(bucket, entry[4]), entries
+        )
+    )
+    rows = []
+    for entry, found in zip(entries, uploaded):
+        row, enrollment_id, _, filename, key, _ = entry
+        if not found:
+            errors.append(
+                BulkUploadRowError(
+                    row=row,
+                    key=filename,
+                    field="filename",
+                    message="File was not uploaded",
+                )
+            )
+            continue
+        rows.append({"id": enrollment_id, "image": object_url(bucket, key)})
+    updated = bulk_update(
+        session,
+        Enrollment,
+        rows,
+        key_columns=("id",),
+        update_columns=("image",),
+    )
+    session.commit()
+    schedule_thumbnails(
+        [row["image"] for row in rows],
+        session.info.get("db_namespace"),
+        regenerate=True,
+    )
+    errors.sort(key=lambda error: error.row)
+    return PhotoUploadCompleteResponse(updated=updated, errors=errors)
+
+
 @router.get("/{enrollment_id}", response_model=EnrollmentRead)
 def get_enrollment(
     enrollment_id: UUID,
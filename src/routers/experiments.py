@@ -1,12 +1,10 @@
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
-from openai import AsyncOpenAI
 from pydantic import BaseModel
 
-from lib.env import env
+from lib.tts import DEFAULT_VOICE, speech_stream
 
 router = APIRouter(prefix="/experiments", tags=["experiments"])
-openai_client = AsyncOpenAI(api_key=env.OPENAI_API_KEY)
 CHROME_EXTENSION_ORIGIN = "chrome-extension://cnhndebfkfpdhpakkfckefglmbjonmbp"
 
 
@@ -28,14 +26,10 @@ async def text_to_speech(payload: TextToSpeechRequest, request: Request):
 
     async def _audio_stream():
         try:
-            async with openai_client.audio.speech.with_streaming_response.create(
-                model="gpt-4o-mini-tts",
-                voice=payload.voice or "alloy",
-                input=text,
-            ) as response:
-                async for chunk in response.iter_bytes():
-                    if chunk:
-                        yield chunk
+            async for chunk in speech_stream(
+                text, payload.voice or DEFAULT_VOICE
+            ):
+                yield chunk
         except Exception as exc:
             raise HTTPException(
                 status_code=500, detail=f"TTS stream failed: {exc}"
@@ -1,23 +1,132 @@
+from datetime import datetime, timezone
 from typing import cast
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func, or_
+from fastapi import (APIRouter, Depends, File, HTTPException, Query,
+                     UploadFile)
+from sqlalchemy import func, or_, text
 from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, col, select
 
 from db import get_session
-from models.gk_competition_student import (GKCompetitionStudent,
-                                           GKCompetitionStudentCreate,
-                                           GKCompetitionStudentListResponse,
-                                           GKCompetitionStudentRead,
-                                           GKCompetitionStudentUpdate)
+from lib.csv_upload import bulk_update, bulk_upsert, iter_csv_rows
+from lib.gk_results import invalidate_gk_cache, school_options
+from lib.json_response import ModelJSONResponse
+from models.bulk_upload import BulkUploadRowError
+from models.gk_competition_rank import (GKCompetitionLeaderboardItem,
+                                        GKCompetitionLeaderboardResponse,
+                                        GKCompetitionRank)
+from models.gk_competition_student import (
+    GKCompetitionMarksUploadResponse, GKCompetitionStudent,
+    GKCompetitionStudentBulkUploadResponse, GKCompetitionStudentCreate,
+    GKCompetitionStudentListResponse, GKCompetitionStudentRead,
+    GKCompetitionStudentUpdate)
 
 router = APIRouter(
     prefix="/gk-competition-students",
     tags=["gk-competition-students"],
 )
 
+GK_UPLOAD_COLUMNS = (
+    "roll_no",
+    "aadhaar_no",
+    "name",
+    "father_name",
+    "mother_name",
+    "class_name",
+    "school_name",
+    "school_address",
+    "group",
+    "paper_medium",
+    "exam_center",
+    "contact_no",
+)
+# Only overwritten when the uploaded cell is not empty.
+GK_OPTIONAL_COLUMNS = ("marks", "class_verification_status", "remark")
+GK_UPDATE_COLUMNS = (
+    *(column for column in GK_UPLOAD_COLUMNS if column != "roll_no"),
+    *GK_OPTIONAL_COLUMNS,
+)
+GK_MARKS_COLUMNS = ("roll_no", "marks")
+# Columns that feed gk_competition_ranks.
+GK_RANK_COLUMNS = ("marks", "group", "class_name")
+
+# Percentile is the share of the other ranked students scoring the same or
+# lower, so every tie shares a value, the top score is 100 and the bottom
+# score is 0.
+REBUILD_GK_COMPETITION_RANKS = text(
+    """
+    INSERT INTO gk_competition_ranks (
+        gk_competition_student_id, marks, "group", class_name,
+        overall_rank, overall_percentile, group_rank, group_percentile,
+        class_rank, class_percentile
+    )
+    SELECT
+        id, marks, "group", class_name,
+        dense_rank() OVER (ORDER BY marks DESC),
+        round((100 * (1 - percent_rank() OVER (
+            ORDER BY marks DESC)))::numeric, 2),
+        dense_rank() OVER (PARTITION BY "group" ORDER BY marks DESC),
+        round((100 * (1 - percent_rank() OVER (
+            PARTITION BY "group" ORDER BY marks DESC)))::numeric, 2),
+        dense_rank() OVER (PARTITION BY class_name ORDER BY marks DESC),
+        round((100 * (1 - percent_rank() OVER (
+            PARTITION BY class_name ORDER BY marks DESC)))::numeric, 2)
+    FROM gk_competition_students
+    WHERE marks IS NOT NULL
+    """
+)
+
+
+# Runs in the caller's transaction so ranks are committed together with the
+# marks they were computed from.
+def refresh_gk_competition_ranks(session: Session) -> None:
+    connection = session.connection()
+    connection.execute(
+        text("SELECT pg_advisory_xact_lock(hashtext('gk_competition_ranks'))")
+    )
+    connection.execute(text("DELETE FROM gk_competition_ranks"))
+    connection.execute(REBUILD_GK_COMPETITION_RANKS)
+
+
+def _parse_marks(value: str) -> int:
+    try:
+        marks = int(value)
+    except ValueError:
+        raise ValueError(f"Invalid marks: {value}")
+    if marks < 0:
+        raise ValueError("Marks cannot be negative")
+    return marks
+
+
+def _load_school_options(session: Session) -> list[str]:
+    trimmed_school_name = func.trim(col(GKCompetitionStudent.school_name))
+    statement = (
+        select(trimmed_school_name)
+        .distinct()
+        .where(
+            col(GKCompetitionStudent.school_name).isnot(None),
+            trimmed_school_name != "",
+        )
+        .order_by(trimmed_school_name)
+    )
+    return list(session.exec(statement).all())
+
+
+def _duplicate_error(
+    row_number: int,
+    key: str | None,
+    field: str,
+    label: str,
+    first_row: int,
+) -> BulkUploadRowError:
+    return BulkUploadRowError(
+        row=row_number,
+        key=key,
+        field=field,
+        message=f"Duplicate {label} in file (first seen on row {first_row})",
+    )
+
 
 @router.post("", response_model=GKCompetitionStudentRead)
 def create_gk_competition_student(
@@ -27,6 +136,10 @@ def create_gk_competition_student(
     db_student = GKCompetitionStudent(**student.model_dump())
     session.add(db_student)
     try:
+        session.flush()
+        if db_student.marks is not None:
+            refresh_gk_competition_ranks(session)
+        invalidate_gk_cache(session)
         session.commit()
     except IntegrityError:
         session.rollback()
@@ -115,24 +228,318 @@ def list_gk_competition_students(
         list[GKCompetitionStudentRead],
         session.exec(statement).all(),
     )
-    return GKCompetitionStudentListResponse(total=total, items=items)
+    return ModelJSONResponse(
+        GKCompetitionStudentListResponse(total=total, items=items)
+    )
+
+
+@router.get("/leaderboard", response_model=GKCompetitionLeaderboardResponse)
+def get_gk_competition_leaderboard(
+    session: Session = Depends(get_session),
+    group: str | None = Query(default=None),
+    class_name: str | None = Query(default=None),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=2000),
+):
+    group_value = group.strip() if group else ""
+    class_name_value = class_name.strip() if class_name else ""
+    filters = []
+    if group_value:
+        filters.append(col(GKCompetitionRank.group) == group_value)
+    if class_name_value:
+        filters.append(col(GKCompetitionRank.class_name) == class_name_value)
+    if class_name_value:
+        scope = "class"
+        rank_column = col(GKCompetitionRank.class_rank)
+        percentile_column = col(GKCompetitionRank.class_percentile)
+    elif group_value:
+        scope = "group"
+        rank_column = col(GKCompetitionRank.group_rank)
+        percentile_column = col(GKCompetitionRank.group_percentile)
+    else:
+        scope = "overall"
+        rank_column = col(GKCompetitionRank.overall_rank)
+        percentile_column = col(GKCompetitionRank.overall_percentile)
+    total = session.exec(
+        select(func.count()).select_from(GKCompetitionRank).where(*filters)
+    ).one()
+    statement = (
+        select(rank_column, percentile_column, GKCompetitionStudent)
+        .join(
+            GKCompetitionStudent,
+            col(GKCompetitionStudent.id)
+            == col(GKCompetitionRank.gk_competition_student_id),
+        )
+        .where(*filters)
+        .order_by(rank_column, col(GKCompetitionStudent.name))
+        .offset(offset)
+        .limit(limit)
+    )
+    items = [
+        GKCompetitionLeaderboardItem(
+            rank=rank,
+            percentile=percentile,
+            gk_competition_student=GKCompetitionStudentRead.model_validate(
+                student
+            ),
+        )
+        for rank, percentile, student in session.exec(statement).all()
+    ]
+    return GKCompetitionLeaderboardResponse(
+        total=total, scope=scope, items=items
+    )
 
 
 @router.get("/school-options", response_model=list[str])
 def list_gk_competition_school_options(
     session: Session = Depends(get_session),
 ):
-    trimmed_school_name = func.trim(col(GKCompetitionStudent.school_name))
-    statement = (
-        select(trimmed_school_name)
-        .distinct()
-        .where(
-            col(GKCompetitionStudent.school_name).isnot(None),
-            trimmed_school_name != "",
+    return school_options(session, _load_school_options)
+
+
+@router.post(
+    "/bulk-upload", response_model=GKCompetitionStudentBulkUploadResponse
+)
+def bulk_upload_gk_competition_students(
+    file: UploadFile = File(...),
+    dry_run: bool = Query(False),
+    session: Session = Depends(get_session),
+):
+    existing_students = {
+        row["roll_no"]: row
+        for row in session.connection().execute(
+            GKCompetitionStudent.__table__.select()  # type: ignore
+        ).mappings()
+    }
+    roll_no_by_aadhaar = {
+        row["aadhaar_no"]: roll_no
+        for roll_no, row in existing_students.items()
+    }
+
+    now = datetime.now(timezone.utc)
+    errors: list[BulkUploadRowError] = []
+    seen_roll_nos: dict[str, int] = {}
+    seen_aadhaar_nos: dict[str, int] = {}
+    rows: list[dict] = []
+    counts = {"total_rows": 0, "created": 0, "updated": 0, "unchanged": 0}
+    for row_number, values in iter_csv_rows(file, GK_UPLOAD_COLUMNS):
+        counts["total_rows"] += 1
+        roll_no = values.get("roll_no") or None
+        aadhaar_no = values.get("aadhaar_no") or None
+        row_errors = [
+            BulkUploadRowError(
+                row=row_number,
+                key=roll_no,
+                field=column,
+                message="Value is required",
+            )
+            for column in GK_UPLOAD_COLUMNS
+            if not values.get(column)
+        ]
+        if roll_no:
+            if roll_no in seen_roll_nos:
+                row_errors.append(
+                    _duplicate_error(
+                        row_number, roll_no, "roll_no", "roll number",
+                        seen_roll_nos[roll_no],
+                    )
+                )
+            seen_roll_nos.setdefault(roll_no, row_number)
+        if aadhaar_no:
+            if aadhaar_no in seen_aadhaar_nos:
+                row_errors.append(
+                    _duplicate_error(
+                        row_number, roll_no, "aadhaar_no", "Aadhaar number",
+                        seen_aadhaar_nos[aadhaar_no],
+                    )
+                )
+            seen_aadhaar_nos.setdefault(aadhaar_no, row_number)
+            owner = roll_no_by_aadhaar.get(aadhaar_no)
+            if roll_no and owner is not None and owner != roll_no:
+                row_errors.append(
+                    BulkUploadRowError(
+                        row=row_number,
+                        key=roll_no,
+                        field="aadhaar_no",
+                        message="Aadhaar number already registered to "
+                        f"roll number {owner}",
+                    )
+                )
+        student_values = {
+            column: values[column] for column in GK_UPLOAD_COLUMNS
+        }
+        if values.get("marks"):
+            try:
+                student_values["marks"] = _parse_marks(values["marks"])
+            except ValueError as exc:
+                row_errors.append(
+                    BulkUploadRowError(
+                        row=row_number,
+                        key=roll_no,
+                        field="marks",
+                        message=str(exc),
+                    )
+                )
+        for column in ("class_verification_status", "remark"):
+            if values.get(column):
+                student_values[column] = values[column]
+        if row_errors:
+            errors.extend(row_errors)
+            continue
+
+        existing = existing_students.get(roll_no)
+        if existing is None:
+            rows.append(
+                {
+                    "id": uuid4(),
+                    "created_at": now,
+                    **{column: None for column in GK_OPTIONAL_COLUMNS},
+                    **student_values,
+                }
+            )
+            counts["created"] += 1
+            continue
+        row = {
+            **dict(existing),
+            **student_values,
+        }
+        if any(
+            row[column] != existing[column] for column in GK_UPDATE_COLUMNS
+        ):
+            rows.append(row)
+            counts["updated"] += 1
+        else:
+            counts["unchanged"] += 1
+
+    committed = False
+    if not errors and not dry_run:
+        try:
+            bulk_upsert(
+                session,
+                GKCompetitionStudent,
+                rows,
+                conflict_columns=("roll_no",),
+                update_columns=GK_UPDATE_COLUMNS,
+            )
+            if rows:
+                refresh_gk_competition_ranks(session)
+            invalidate_gk_cache(session)
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            raise HTTPException(
+                status_code=409,
+                detail="Students changed during upload, please retry",
+            )
+        committed = True
+    return GKCompetitionStudentBulkUploadResponse(
+        **counts, committed=committed, errors=errors
+    )
+
+
+@router.post("/bulk-marks", response_model=GKCompetitionMarksUploadResponse)
+def bulk_upload_gk_competition_marks(
+    file: UploadFile = File(...),
+    dry_run: bool = Query(False),
+    session: Session = Depends(get_session),
+):
+    existing_students = {
+        roll_no: (aadhaar_no, marks)
+        for roll_no, aadhaar_no, marks in session.exec(
+            select(
+                GKCompetitionStudent.roll_no,
+                GKCompetitionStudent.aadhaar_no,
+                GKCompetitionStudent.marks,
+            )
+        ).all()
+    }
+
+    errors: list[BulkUploadRowError] = []
+    seen_roll_nos: dict[str, int] = {}
+    rows: list[dict] = []
+    counts = {"total_rows": 0, "updated": 0, "unchanged": 0}
+    for row_number, values in iter_csv_rows(file, GK_MARKS_COLUMNS):
+        counts["total_rows"] += 1
+        roll_no = values.get("roll_no") or None
+        row_errors = [
+            BulkUploadRowError(
+                row=row_number,
+                key=roll_no,
+                field=column,
+                message="Value is required",
+            )
+            for column in GK_MARKS_COLUMNS
+            if not values.get(column)
+        ]
+        existing = existing_students.get(roll_no) if roll_no else None
+        if roll_no:
+            if roll_no in seen_roll_nos:
+                row_errors.append(
+                    _duplicate_error(
+                        row_number, roll_no, "roll_no", "roll number",
+                        seen_roll_nos[roll_no],
+                    )
+                )
+            seen_roll_nos.setdefault(roll_no, row_number)
+            if existing is None:
+                row_errors.append(
+                    BulkUploadRowError(
+                        row=row_number,
+                        key=roll_no,
+                        field="roll_no",
+                        message="Roll number not found",
+                    )
+                )
+        aadhaar_no = values.get("aadhaar_no")
+        if existing is not None and aadhaar_no and aadhaar_no != existing[0]:
+            row_errors.append(
+                BulkUploadRowError(
+                    row=row_number,
+                    key=roll_no,
+                    field="aadhaar_no",
+                    message="Aadhaar number does not match roll number",
+                )
+            )
+        marks = None
+        if values.get("marks"):
+            try:
+                marks = _parse_marks(values["marks"])
+            except ValueError as exc:
+                row_errors.append(
+                    BulkUploadRowError(
+                        row=row_number,
+                        key=roll_no,
+                        field="marks",
+                        message=str(exc),
+                    )
+                )
+        if row_errors:
+            errors.extend(row_errors)
+            continue
+
+        if existing is not None and existing[1] == marks:
+            counts["unchanged"] += 1
+            continue
+        rows.append({"roll_no": roll_no, "marks": marks})
+        counts["updated"] += 1
+
+    committed = False
+    if not errors and not dry_run:
+        bulk_update(
+            session,
+            GKCompetitionStudent,
+            rows,
+            key_columns=("roll_no",),
+            update_columns=("marks",),
         )
-        .order_by(trimmed_school_name)
+        if rows:
+            refresh_gk_competition_ranks(session)
+        invalidate_gk_cache(session)
+        session.commit()
+        committed = True
+    return GKCompetitionMarksUploadResponse(
+        **counts, committed=committed, errors=errors
     )
-    return session.exec(statement).all()
 
 
 @router.get("/{gk_competition_student_id}",
@@ -168,11 +575,19 @@ def partial_update_gk_competition_student(
 
     update_data = student.model_dump(exclude_unset=True)
 
+    ranks_changed = any(
+        key in GK_RANK_COLUMNS and getattr(db_student, key) != value
+        for key, value in update_data.items()
+    )
     for key, value in update_data.items():
         setattr(db_student, key, value)
 
     session.add(db_student)
     try:
+        session.flush()
+        if ranks_changed:
+            refresh_gk_competition_ranks(session)
+        invalidate_gk_cache(session)
         session.commit()
     except IntegrityError:
         session.rollback()
@@ -196,6 +611,11 @@ def delete_gk_competition_student(
         raise HTTPException(
             status_code=404, detail="Student not found"
         )
+    has_marks = db_student.marks is not None
     session.delete(db_student)
+    session.flush()
+    if has_marks:
+        refresh_gk_competition_ranks(session)
+    invalidate_gk_cache(session)
     session.commit()
     return {"message": "Student deleted"}
@@ -1,27 +1,30 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response
 from sqlmodel import Session, SQLModel, col, select
 
 from db import get_session
-from models.academic_class import AcademicClass, AcademicClassRead
+from lib.env import env
+from lib.gk_results import (check_failed_lookups, lookup_result,
+                            record_failed_lookup)
+from lib.reference_data import (get_academic_term, get_half_yearly_term,
+                                list_academic_classes, list_academic_sessions,
+                                list_academic_terms)
+from models.academic_class import AcademicClassRead
 from models.academic_class_subject import AcademicClassSubject
-from models.academic_session import AcademicSession, AcademicSessionRead
-from models.academic_term import (AcademicTerm, AcademicTermRead,
-                                  AcademicTermType)
-from models.date_sheet import DateSheet, DateSheetRead, DateSheetReadDetail
-from models.date_sheet_subject import DateSheetSubjectRead
+from models.academic_session import AcademicSessionRead
+from models.academic_term import AcademicTermRead, AcademicTermType
+from models.date_sheet import AdmitCardDataResponse, DateSheetReadDetail
 from models.enrollment import Enrollment, EnrollmentRead
-from models.gk_competition_student import (GKCompetitionStudent,
-                                           GKCompetitionStudentRead)
-from models.report_card import (ReportCard, ReportCardReadDetail,
+from models.gk_competition_rank import GKCompetitionStudentDataResponse
+from models.report_card import (ReportCard, ReportCardDataResponse,
+                                ReportCardReadDetail,
                                 ReportCardReadDetailWithSubjects)
 from models.report_card_subject import ReportCardSubject, ReportCardSubjectRead
 from models.student import Student
-from routers.academic_classes import grade_rank
-from routers.academic_terms import term_rank
-from routers.app_settings import _get_or_create_settings
-from routers.date_sheets import query_date_sheet_subjects
+from routers.app_settings import get_cached_settings
+from routers.date_sheets import query_date_sheet_detail
 from routers.report_card_subjects import REPORT_CARD_SUBJECT_ORDER_BY
 from routers.report_cards import (compute_percentages_and_ranks_for_term,
                                   populate_rank_and_percentage)
@@ -32,15 +35,19 @@ router = APIRouter(
 )
 
 
-class AdmitCardDataResponse(SQLModel):
-    enrollment: EnrollmentRead
-    academic_term: AcademicTermRead
-    date_sheet: DateSheetReadDetail | None = None
-
-
-class ReportCardDataResponse(SQLModel):
-    report_card: ReportCardReadDetailWithSubjects
-    half_yearly_report_card: ReportCardReadDetailWithSubjects | None = None
+# The address the outermost trusted proxy received the request from. Entries
+# to the left of it are supplied by the caller and are not trusted.
+def _client_address(request: Request) -> str:
+    if env.TRUSTED_PROXY_COUNT:
+        forwarded = [
+            address.strip()
+            for header in request.headers.getlist("x-forwarded-for")
+            for address in header.split(",")
+            if address.strip()
+        ]
+        if len(forwarded) >= env.TRUSTED_PROXY_COUNT:
+            return forwarded[-env.TRUSTED_PROXY_COUNT]
+    return request.client.host if request.client else "unknown"
 
 
 def _query_report_card_subjects(
@@ -69,7 +76,7 @@ def get_report_card(
     academic_term_id: UUID = Query(...),
     session: Session = Depends(get_session),
 ):
-    academic_term = session.get(AcademicTerm, academic_term_id)
+    academic_term = get_academic_term(session, academic_term_id)
     if not academic_term:
         raise HTTPException(
             status_code=404, detail="Academic term not found"
@@ -109,13 +116,9 @@ def get_report_card(
     half_yearly_report_card_read: ReportCardReadDetail | None = None
     half_yearly_report_card_with_subjects = None
     if academic_term.term_type == AcademicTermType.ANNUAL:
-        half_yearly_term = session.exec(
-            select(AcademicTerm).where(
-                AcademicTerm.academic_session_id
-                == academic_term.academic_session_id,
-                AcademicTerm.term_type == AcademicTermType.HALF_YEARLY,
-            )
-        ).first()
+        half_yearly_term = get_half_yearly_term(
+            session, academic_term.academic_session_id
+        )
         if half_yearly_term:
             half_yearly_report_card = session.exec(
                 select(ReportCard).where(
@@ -175,7 +178,7 @@ def get_admit_card(
     academic_term_id: UUID = Query(...),
     session: Session = Depends(get_session),
 ):
-    academic_term = session.get(AcademicTerm, academic_term_id)
+    academic_term = get_academic_term(session, academic_term_id)
     if not academic_term:
         raise HTTPException(
             status_code=404, detail="Academic term not found"
@@ -205,31 +208,14 @@ def get_admit_card(
             detail="Enrollment not found for the selected session",
         )
 
-    date_sheet = session.exec(
-        select(DateSheet).where(
-            DateSheet.academic_class_id == enrollment.academic_class_id,
-            DateSheet.academic_term_id == academic_term_id,
-        )
-    ).first()
-
-    date_sheet_subjects: list[DateSheetSubjectRead] = []
-    if date_sheet and date_sheet.id:
-        date_sheet_subjects = query_date_sheet_subjects(
-            session, date_sheet.id
-        )
-
-    date_sheet_read: DateSheetReadDetail | None = None
-    if date_sheet:
-        date_sheet_base = DateSheetRead.model_validate(date_sheet)
-        date_sheet_read = DateSheetReadDetail(
-            **date_sheet_base.model_dump(),
-            date_sheet_subjects=date_sheet_subjects,
-        )
+    date_sheet = query_date_sheet_detail(
+        session, enrollment.academic_class_id, academic_term_id
+    )
 
     return AdmitCardDataResponse(
         enrollment=EnrollmentRead.model_validate(enrollment),
         academic_term=AcademicTermRead.model_validate(academic_term),
-        date_sheet=date_sheet_read,
+        date_sheet=date_sheet,
     )
 
 
@@ -273,10 +259,6 @@ class DateSheetDataResponse(SQLModel):
     date_sheet: DateSheetReadDetail
 
 
-class GKCompetitionStudentDataResponse(SQLModel):
-    gk_competition_student: GKCompetitionStudentRead
-
-
 class SettingsDataResponse(SQLModel):
     gk_competition_result_active: bool
     gk_competition_admit_card_active: bool
@@ -287,27 +269,21 @@ class SettingsDataResponse(SQLModel):
     response_model=GKCompetitionStudentDataResponse,
 )
 def get_gk_competition_student_data(
+    request: Request,
     aadhaar_no: str = Query(...),
     roll_no: str = Query(...),
     session: Session = Depends(get_session),
 ):
-
-    student = session.exec(
-        select(GKCompetitionStudent).where(
-            col(GKCompetitionStudent.aadhaar_no) == aadhaar_no,
-            col(GKCompetitionStudent.roll_no) == roll_no,
-        )
-    ).first()
-    if not student:
+    client = _client_address(request)
+    check_failed_lookups(client)
+    content = lookup_result(session, roll_no, aadhaar_no)
+    if content is None:
+        record_failed_lookup(client)
         err_message = "Roll Number or Aadhaar Number does not match our records. Please check and try again."
         raise HTTPException(
             status_code=404, detail=err_message
         )
-    return GKCompetitionStudentDataResponse(
-        gk_competition_student=GKCompetitionStudentRead.model_validate(
-            student
-        )
-    )
+    return Response(content=content, media_type="application/json")
 
 
 @router.get("/date-sheet-data", response_model=DateSheetDataResponse)
@@ -316,37 +292,22 @@ def get_date_sheet_data(
     academic_term_id: UUID = Query(...),
     session: Session = Depends(get_session),
 ):
-    date_sheet = session.exec(
-        select(DateSheet).where(
-            DateSheet.academic_class_id == academic_class_id,
-            DateSheet.academic_term_id == academic_term_id,
-        )
-    ).first()
+    date_sheet = query_date_sheet_detail(
+        session, academic_class_id, academic_term_id
+    )
     if not date_sheet:
         raise HTTPException(
             status_code=404,
             detail="Date sheet not found for the provided class and term",
         )
-
-    date_sheet_subjects: list[DateSheetSubjectRead] = []
-    if date_sheet.id:
-        date_sheet_subjects = query_date_sheet_subjects(
-            session, date_sheet.id
-        )
-
-    date_sheet_base = DateSheetRead.model_validate(date_sheet)
-    date_sheet_read = DateSheetReadDetail(
-        **date_sheet_base.model_dump(),
-        date_sheet_subjects=date_sheet_subjects,
-    )
-    return DateSheetDataResponse(date_sheet=date_sheet_read)
+    return DateSheetDataResponse(date_sheet=date_sheet)
 
 
 @router.get("/settings-data", response_model=SettingsDataResponse)
 def get_settings_data(
     session: Session = Depends(get_session),
 ):
-    settings = _get_or_create_settings(session)
+    settings = get_cached_settings(session)
     return SettingsDataResponse(
         gk_competition_result_active=settings.gk_competition_result_active,
         gk_competition_admit_card_active=settings.gk_competition_admit_card_active
@@ -357,14 +318,7 @@ def get_settings_data(
 def get_academic_sessions(
     session: Session = Depends(get_session),
 ):
-    statement = select(AcademicSession)
-    results = session.exec(
-        statement.order_by(
-            col(AcademicSession.year),
-            col(AcademicSession.created_at).desc(),
-        )
-    ).all()
-    return results
+    return list_academic_sessions(session)
 
 
 @router.get("/academic-terms", response_model=list[AcademicTermRead])
@@ -372,15 +326,7 @@ def get_academic_terms(
     academic_session_id: UUID = Query(),
     session: Session = Depends(get_session),
 ):
-    statement = select(AcademicTerm).where(
-        AcademicTerm.academic_session_id == academic_session_id)
-    results = session.exec(
-        statement.order_by(
-            term_rank,
-            col(AcademicTerm.created_at).desc(),
-        )
-    ).all()
-    return results
+    return list_academic_terms(session, academic_session_id)
 
 
 @router.get("/academic-classes", response_model=list[AcademicClassRead])
@@ -388,13 +334,4 @@ def get_academic_classes(
     academic_session_id: UUID = Query(),
     session: Session = Depends(get_session),
 ):
-    statement = select(AcademicClass).where(
-        AcademicClass.academic_session_id == academic_session_id)
-    results = session.exec(
-        statement.order_by(
-            grade_rank,
-            col(AcademicClass.section),
-            col(AcademicClass.created_at).desc(),
-        )
-    ).all()
-    return results
+    return list_academic_classes(session, academic_session_id)
@@ -1,24 +1,40 @@
-import math
+import json
+from typing import Iterator, Sequence
 from uuid import UUID
 
 from fastapi import APIRouter, Body, Depends, HTTPException, Query
-from sqlalchemy import case, func, or_
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import Integer, Numeric, and_, case, func, or_
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased, contains_eager, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlmodel import Session, SQLModel, col, select
 
 from db import get_session
+from lib.json_response import ModelJSONResponse
+from lib.pdf import build_document
+from lib.pdf_render import build_zip, render_pages
+from lib.reference_data import (get_academic_class, get_academic_term,
+                                get_half_yearly_term, list_academic_classes,
+                                list_class_subjects)
+from lib.report_card_pdf import REPORT_CARD_LAYOUT, render_report_card
 from models.academic_class import AcademicClass
-from models.academic_class_subject import AcademicClassSubject
+from models.academic_class_subject import (AcademicClassSubject,
+                                           AcademicClassSubjectReadWithSubject)
 from models.academic_class_subject_term import AcademicClassSubjectTerm
 from models.academic_session import AcademicSession
-from models.academic_term import AcademicTerm, AcademicTermType
+from models.academic_term import (AcademicTerm, AcademicTermRead,
+                                  AcademicTermType)
 from models.enrollment import Enrollment, EnrollmentReadRaw
 from models.report_card import (ReportCard, ReportCardCreate,
+                                ReportCardDataResponse,
                                 ReportCardListResponse, ReportCardRead,
                                 ReportCardReadDetail,
                                 ReportCardReadDetailWithSubjects,
                                 ReportCardUpdate)
-from models.report_card_subject import ReportCardSubject, ReportCardSubjectRead
+from models.report_card_subject import (ReportCardSubject,
+                                        ReportCardSubjectRead,
+                                        ReportCardSubjectReadRaw)
 from models.student import Student
 from routers.report_card_subjects import REPORT_CARD_SUBJECT_ORDER_BY
 
@@ -28,6 +44,18 @@ router = APIRouter(
 )
 
 
+# Everything ReportCardReadDetail reads, loaded with one query per
+# relationship instead of one per report card.
+REPORT_CARD_LIST_OPTIONS = (
+    selectinload(ReportCard.enrollment).options(
+        selectinload(Enrollment.student),
+        selectinload(Enrollment.academic_class),
+        selectinload(Enrollment.academic_session),
+    ),
+    selectinload(ReportCard.academic_term),
+)
+
+
 class ReportCardGenerationResponse(SQLModel):
     total: int
 
@@ -52,7 +80,7 @@ def create_report_card(
         raise HTTPException(
             status_code=404, detail="Enrollment not found"
         )
-    academic_term = session.get(AcademicTerm, report_card.academic_term_id)
+    academic_term = get_academic_term(session, report_card.academic_term_id)
     if not academic_term:
         raise HTTPException(status_code=404, detail="Academic term not found")
 
@@ -66,20 +94,15 @@ def create_report_card(
             status_code=409, detail="Report card already exists"
         )
 
-    class_subjects_raw = session.exec(
-        select(AcademicClassSubject.id).where(
-            AcademicClassSubject.academic_class_id
-            == enrollment.academic_class_id,
-        )
-    ).all()
     if db_report_card.id is None:
         raise HTTPException(
             status_code=500, detail="Report card ID was not generated"
         )
     class_subject_ids = [
-        class_subject_id
-        for class_subject_id in class_subjects_raw
-        if class_subject_id is not None
+        class_subject.id
+        for class_subject in list_class_subjects(
+            session, enrollment.academic_class_id
+        )
     ]
     for class_subject_id in class_subject_ids:
         session.add(
@@ -192,17 +215,14 @@ def list_report_cards(
     )
     sort_desc = normalized_sort_dir != "asc"
 
-    items: list[ReportCardReadDetail] = []
+    statement = statement.options(*REPORT_CARD_LIST_OPTIONS)
+    results: Sequence[ReportCard] = []
     if not should_sort_by_rank and not should_sort_by_percentage:
         results = session.exec(
             statement.order_by(*order_by_clauses)
             .offset(offset)
             .limit(limit)
         ).all()
-        items = [
-            ReportCardReadDetail.model_validate(report_card)
-            for report_card in results
-        ]
 
     report_card_ids_raw = session.exec(id_statement).all()
     report_card_ids = [
@@ -213,7 +233,7 @@ def list_report_cards(
     percentages_by_id: dict[UUID, int] = {}
     ranks_by_id: dict[UUID, int] = {}
     if academic_class_id and academic_term_id:
-        academic_term = session.get(AcademicTerm, academic_term_id)
+        academic_term = get_academic_term(session, academic_term_id)
         if academic_term:
             percentages_by_id, ranks_by_id = (
                 compute_percentages_and_ranks_for_term(
@@ -222,12 +242,6 @@ def list_report_cards(
                     academic_class_id,
                 )
             )
-        for report_card in items:
-            if report_card.id in percentages_by_id:
-                report_card.overall_percentage = percentages_by_id[
-                    report_card.id
-                ]
-                report_card.rank = ranks_by_id.get(report_card.id)
 
     if should_sort_by_rank or should_sort_by_percentage:
         def sort_value(value: int | None) -> float:
@@ -249,7 +263,9 @@ def list_report_cards(
         )
         page_ids = ordered_ids[offset: offset + limit]
         if not page_ids:
-            return ReportCardListResponse(total=total, items=[])
+            return ModelJSONResponse(
+                ReportCardListResponse(total=total, items=[])
+            )
 
         order_case = case(
             {report_card_id: index for index,
@@ -260,20 +276,9 @@ def list_report_cards(
             statement.where(col(ReportCard.id).in_(
                 page_ids)).order_by(order_case)
         ).all()
-        items = [
-            ReportCardReadDetail.model_validate(report_card)
-            for report_card in results
-        ]
-        for report_card in items:
-            if report_card.id in percentages_by_id:
-                report_card.overall_percentage = percentages_by_id[
-                    report_card.id
-                ]
-                report_card.rank = ranks_by_id.get(report_card.id)
-
-    report_cards_with_subjects: list[ReportCardReadDetailWithSubjects] = []
-    if items:
-        item_ids = [report_card.id for report_card in items]
+
+    if results:
+        item_ids = [report_card.id for report_card in results]
         subjects = session.exec(
             select(ReportCardSubject)
             .join(
@@ -286,25 +291,38 @@ def list_report_cards(
                 col(ReportCardSubject.report_card_id),
                 *REPORT_CARD_SUBJECT_ORDER_BY,
             )
+            .options(
+                contains_eager(
+                    ReportCardSubject.academic_class_subject
+                ).options(
+                    selectinload(AcademicClassSubject.subject),
+                    selectinload(AcademicClassSubject.class_subject_terms),
+                )
+            )
         ).all()
-        subjects_by_report_card: dict[
-            UUID, list[ReportCardSubjectRead]
-        ] = {report_card_id: [] for report_card_id in item_ids}
+        subjects_by_report_card: dict[UUID, list[ReportCardSubject]] = {
+            report_card_id: [] for report_card_id in item_ids
+        }
         for subject in subjects:
-            subjects_by_report_card[subject.report_card_id].append(
-                ReportCardSubjectRead.model_validate(subject)
-            )
-        report_cards_with_subjects = [
-            ReportCardReadDetailWithSubjects(
-                **rc.model_dump(),
-                report_card_subjects=subjects_by_report_card.get(
-                    rc.id, []
-                ),
+            subjects_by_report_card[subject.report_card_id].append(subject)
+        # Attached as the loaded collection, in display order, so that each
+        # report card is validated once together with its subjects.
+        for report_card in results:
+            set_committed_value(
+                report_card,
+                "report_card_subjects",
+                subjects_by_report_card[report_card.id],
             )
-            for rc in items
-        ]
 
-    return ReportCardListResponse(total=total, items=report_cards_with_subjects)
+    items = [
+        ReportCardReadDetailWithSubjects.model_validate(report_card)
+        for report_card in results
+    ]
+    for report_card in items:
+        if report_card.id in percentages_by_id:
+            report_card.overall_percentage = percentages_by_id[report_card.id]
+            report_card.rank = ranks_by_id.get(report_card.id)
+    return ModelJSONResponse(ReportCardListResponse(total=total, items=items))
 
 
 class ReportCardGenerationRequest(SQLModel):
@@ -546,7 +564,7 @@ def populate_rank_and_percentage(
     session: Session = Depends(get_session),
 ):
     enrollment = session.get(Enrollment, report_card.enrollment_id)
-    academic_term = session.get(AcademicTerm, report_card.academic_term_id)
+    academic_term = get_academic_term(session, report_card.academic_term_id)
     if enrollment and academic_term:
         percentages_by_id, ranks_by_id = (
             compute_percentages_and_ranks_for_term(
@@ -562,193 +580,386 @@ def populate_rank_and_percentage(
             report_card.rank = ranks_by_id.get(report_card.id)
 
 
-@router.get("/{report_card_id}", response_model=ReportCardReadDetail)
-def get_report_card(
-    report_card_id: UUID,
-    session: Session = Depends(get_session),
-):
-    report_card = session.get(ReportCard, report_card_id)
-    if not report_card:
-        raise HTTPException(status_code=404, detail="Report card not found")
-    read_report_card = ReportCardReadDetail.model_validate(report_card)
-    populate_rank_and_percentage(read_report_card, session)
-    return read_report_card
+def _query_class_report_cards(
+    session: Session,
+    academic_term_ids: list[UUID],
+    academic_class_id: UUID,
+) -> list[ReportCard]:
+    return list(
+        session.exec(
+            select(ReportCard)
+            .join(Enrollment)
+            .join(Student, col(Student.id) == col(Enrollment.student_id))
+            .where(
+                Enrollment.academic_class_id == academic_class_id,
+                col(ReportCard.academic_term_id).in_(academic_term_ids),
+            )
+            .order_by(col(Student.name), col(ReportCard.created_at).desc())
+            .options(
+                contains_eager(ReportCard.enrollment).contains_eager(
+                    Enrollment.student
+                )
+            )
+        ).all()
+    )
 
 
-def _compute_totals_by_report_card(
+def _query_class_report_card_subjects(
     session: Session,
     report_card_ids: list[UUID],
-    term_type: AcademicTermType | None = None,
-) -> dict[UUID, tuple[int, int]]:
-    if not report_card_ids:
-        return {}
-
-    if term_type == AcademicTermType.QUARTERLY:
-        subject_total = func.coalesce(ReportCardSubject.final_marks, 0)
-    else:
-        subject_total = (
-            func.coalesce(ReportCardSubject.notebook, 0)
-            + func.coalesce(ReportCardSubject.class_test, 0)
-            + func.coalesce(ReportCardSubject.assignment, 0)
-            + func.coalesce(ReportCardSubject.mid_term, 0)
-            + func.coalesce(ReportCardSubject.final_term, 0)
-        )
-
-    totals = session.exec(
+) -> dict[UUID, list[ReportCardSubjectRead]]:
+    # Plain rows rather than entities: a class export can span tens of
+    # thousands of subject rows. The few class subjects they refer to are
+    # validated once and shared. Like /public/report-card-data, every
+    # subject of a report card is kept, even one that refers to another
+    # class's subject after the enrollment changed class.
+    report_card_subjects = ReportCardSubject.__table__  # type: ignore
+    results = session.exec(
         select(
-            col(ReportCardSubject.report_card_id),
-            func.coalesce(func.sum(subject_total), 0),
-            func.count(col(ReportCardSubject.id)),
+            *(
+                report_card_subjects.c[name]
+                for name in ReportCardSubjectReadRaw.model_fields
+            )
         )
         .join(
             AcademicClassSubject,
             col(AcademicClassSubject.id)
             == col(ReportCardSubject.academic_class_subject_id),
         )
-        .where(
-            col(ReportCardSubject.report_card_id).in_(report_card_ids),
-            col(AcademicClassSubject.is_additional) == False,
-        )
-        .group_by(col(ReportCardSubject.report_card_id))
+        .where(col(ReportCardSubject.report_card_id).in_(report_card_ids))
+        .order_by(*REPORT_CARD_SUBJECT_ORDER_BY)
     ).all()
+    class_subjects = {
+        class_subject.id: AcademicClassSubjectReadWithSubject.model_validate(
+            class_subject
+        )
+        for class_subject in session.exec(
+            select(AcademicClassSubject)
+            .where(
+                col(AcademicClassSubject.id).in_(
+                    {row.academic_class_subject_id for row in results}
+                )
+            )
+            .options(
+                selectinload(AcademicClassSubject.subject),
+                selectinload(AcademicClassSubject.class_subject_terms),
+            )
+        ).all()
+    }
+    subjects_by_report_card: dict[UUID, list[ReportCardSubjectRead]] = {}
+    for row in results:
+        subjects_by_report_card.setdefault(row.report_card_id, []).append(
+            ReportCardSubjectRead(
+                **row._mapping,
+                academic_class_subject=class_subjects[
+                    row.academic_class_subject_id
+                ],
+            )
+        )
+    return subjects_by_report_card
 
-    totals_by_id: dict[UUID, tuple[int, int]] = {}
-    for report_card_id, total_marks, subject_count in totals:
-        totals_by_id[report_card_id] = (total_marks, subject_count)
-    return totals_by_id
 
+def _report_card_with_subjects(
+    report_card: ReportCard,
+    percentages_by_id: dict[UUID, int],
+    ranks_by_id: dict[UUID, int],
+    subjects_by_report_card: dict[UUID, list[ReportCardSubjectRead]],
+) -> ReportCardReadDetailWithSubjects:
+    read_report_card = ReportCardReadDetail.model_validate(report_card)
+    if read_report_card.id in percentages_by_id:
+        read_report_card.overall_percentage = percentages_by_id[
+            read_report_card.id
+        ]
+        read_report_card.rank = ranks_by_id.get(read_report_card.id)
+    return ReportCardReadDetailWithSubjects(
+        **dict(read_report_card),
+        report_card_subjects=subjects_by_report_card.get(
+            read_report_card.id, []
+        ),
+    )
 
-def _compute_percentages_and_ranks_from_totals(
-    totals_by_id: dict[UUID, tuple[int, int]]
-) -> tuple[dict[UUID, int], dict[UUID, int]]:
-    percentages_by_id: dict[UUID, int] = {}
-    for report_card_id, (total_marks, subject_count) in totals_by_id.items():
-        if subject_count:
-            percentages_by_id[report_card_id] = math.ceil(
-                total_marks / subject_count
+
+def iter_report_card_data(
+    session: Session,
+    academic_term: AcademicTermRead,
+    academic_class_id: UUID,
+) -> Iterator[ReportCardDataResponse]:
+    # Same documents as /public/report-card-data for every student of the
+    # class, with standings and subjects loaded once for the whole class.
+    half_yearly_term = (
+        get_half_yearly_term(session, academic_term.academic_session_id)
+        if academic_term.term_type == AcademicTermType.ANNUAL
+        else None
+    )
+    academic_term_ids = [academic_term.id]
+    half_yearly_percentages: dict[UUID, int] = {}
+    half_yearly_ranks: dict[UUID, int] = {}
+    if half_yearly_term:
+        academic_term_ids.append(half_yearly_term.id)
+        half_yearly_percentages, half_yearly_ranks = (
+            compute_percentages_and_ranks_for_term(
+                session, half_yearly_term, academic_class_id
             )
+        )
+    percentages_by_id, ranks_by_id = compute_percentages_and_ranks_for_term(
+        session, academic_term, academic_class_id
+    )
+    report_cards = _query_class_report_cards(
+        session, academic_term_ids, academic_class_id
+    )
+    subjects_by_report_card = _query_class_report_card_subjects(
+        session, [report_card.id for report_card in report_cards]
+    )
+    half_yearly_by_enrollment = {
+        report_card.enrollment_id: report_card
+        for report_card in report_cards
+        if half_yearly_term
+        and report_card.academic_term_id == half_yearly_term.id
+    }
+    for report_card in report_cards:
+        if report_card.academic_term_id != academic_term.id:
+            continue
+        half_yearly_report_card = half_yearly_by_enrollment.get(
+            report_card.enrollment_id
+        )
+        yield ReportCardDataResponse(
+            report_card=_report_card_with_subjects(
+                report_card,
+                percentages_by_id,
+                ranks_by_id,
+                subjects_by_report_card,
+            ),
+            half_yearly_report_card=(
+                _report_card_with_subjects(
+                    half_yearly_report_card,
+                    half_yearly_percentages,
+                    half_yearly_ranks,
+                    subjects_by_report_card,
+                )
+                if half_yearly_report_card
+                else None
+            ),
+        )
 
-    ranks_by_id: dict[UUID, int] = {}
-    sorted_items = sorted(
-        percentages_by_id.items(), key=lambda item: item[1], reverse=True
+
+@router.get("/export")
+def export_report_cards(
+    academic_class_id: UUID = Query(...),
+    academic_term_id: UUID = Query(...),
+    session: Session = Depends(get_session),
+):
+    academic_term = get_academic_term(session, academic_term_id)
+    if not academic_term:
+        raise HTTPException(
+            status_code=404, detail="Academic term not found"
+        )
+    if not get_academic_class(session, academic_class_id):
+        raise HTTPException(
+            status_code=404, detail="Academic class not found"
+        )
+    return StreamingResponse(
+        (
+            data.model_dump_json() + "\n"
+            for data in iter_report_card_data(
+                session, academic_term, academic_class_id
+            )
+        ),
+        media_type="application/x-ndjson",
     )
-    current_rank = 0
-    last_percentage = None
-    for index, (report_card_id, percentage) in enumerate(
-        sorted_items, start=1
-    ):
-        if percentage != last_percentage:
-            current_rank = index
-            last_percentage = percentage
-        ranks_by_id[report_card_id] = current_rank
 
-    return percentages_by_id, ranks_by_id
 
+@router.get("/export/pdf")
+def export_report_card_pdfs(
+    academic_term_id: UUID = Query(...),
+    academic_class_id: UUID | None = Query(default=None),
+    format: str = Query("pdf", pattern="^(pdf|zip)$"),
+    session: Session = Depends(get_session),
+):
+    # Without a class, every class of the term's session is exported.
+    academic_term = get_academic_term(session, academic_term_id)
+    if not academic_term:
+        raise HTTPException(
+            status_code=404, detail="Academic term not found"
+        )
+    if academic_class_id:
+        if not get_academic_class(session, academic_class_id):
+            raise HTTPException(
+                status_code=404, detail="Academic class not found"
+            )
+        academic_class_ids = [academic_class_id]
+    else:
+        academic_class_ids = [
+            academic_class.id
+            for academic_class in list_academic_classes(
+                session, academic_term.academic_session_id
+            )
+        ]
 
-def _compute_percentages_and_ranks(
-    session: Session,
-    report_card_ids: list[UUID],
-    term_type: AcademicTermType | None = None,
-) -> tuple[dict[UUID, int], dict[UUID, int]]:
-    totals_by_id = _compute_totals_by_report_card(
-        session,
-        report_card_ids,
-        term_type,
+    documents = [
+        data
+        for class_id in academic_class_ids
+        for data in iter_report_card_data(session, academic_term, class_id)
+    ]
+    if not documents:
+        raise HTTPException(status_code=404, detail="No report cards found")
+    pages = render_pages(
+        REPORT_CARD_LAYOUT,
+        render_report_card,
+        [_pdf_document(data) for data in documents],
+    )
+
+    if format == "zip":
+        content = build_zip(
+            [
+                (_report_card_file_name(data), build_document([page]))
+                for data, page in zip(documents, pages)
+            ]
+        )
+        media_type = "application/zip"
+    else:
+        content = build_document(pages)
+        media_type = "application/pdf"
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="report-cards.{format}"'
+            )
+        },
+    )
+
+
+def _pdf_document(data: ReportCardDataResponse) -> bytes:
+    # Sorted keys: nested table models dump their fields in load order,
+    # which differs between processes and would miss the page cache.
+    return json.dumps(
+        data.model_dump(mode="json"), sort_keys=True, separators=(",", ":")
+    ).encode()
+
+
+def _report_card_file_name(data: ReportCardDataResponse) -> str:
+    enrollment = data.report_card.enrollment
+    student = enrollment.student if enrollment else None
+    name = student.registration_no if student else str(data.report_card.id)
+    return f"{name}.pdf"
+
+
+@router.get("/{report_card_id}", response_model=ReportCardReadDetail)
+def get_report_card(
+    report_card_id: UUID,
+    session: Session = Depends(get_session),
+):
+    report_card = session.get(ReportCard, report_card_id)
+    if not report_card:
+        raise HTTPException(status_code=404, detail="Report card not found")
+    read_report_card = ReportCardReadDetail.model_validate(report_card)
+    populate_rank_and_percentage(read_report_card, session)
+    return read_report_card
+
+
+def _subject_total(term_type: AcademicTermType):
+    if term_type == AcademicTermType.QUARTERLY:
+        return func.coalesce(ReportCardSubject.final_marks, 0)
+    return (
+        func.coalesce(ReportCardSubject.notebook, 0)
+        + func.coalesce(ReportCardSubject.class_test, 0)
+        + func.coalesce(ReportCardSubject.assignment, 0)
+        + func.coalesce(ReportCardSubject.mid_term, 0)
+        + func.coalesce(ReportCardSubject.final_term, 0)
     )
-    return _compute_percentages_and_ranks_from_totals(totals_by_id)
 
 
 def compute_percentages_and_ranks_for_term(
     session: Session,
-    academic_term: AcademicTerm,
+    academic_term: AcademicTermRead,
     academic_class_id: UUID,
 ) -> tuple[dict[UUID, int], dict[UUID, int]]:
-    report_cards_raw = session.exec(
-        select(ReportCard.id, ReportCard.enrollment_id)
+    # Pairs every report card of the class and term with the report cards
+    # whose marks count towards it: itself, plus the half-yearly report card
+    # of the same enrollment for ANNUAL terms. Totals, percentages and ranks
+    # are then computed in a single statement.
+    report_cards = (
+        select(
+            col(ReportCard.id).label("report_card_id"),
+            col(ReportCard.id).label("counted_report_card_id"),
+        )
         .join(Enrollment)
         .where(
             Enrollment.academic_class_id == academic_class_id,
             ReportCard.academic_term_id == academic_term.id,
         )
-    ).all()
-    report_cards = [
-        (report_card_id, enrollment_id)
-        for report_card_id, enrollment_id in report_cards_raw
-        if report_card_id is not None and enrollment_id is not None
-    ]
-    report_card_ids = [
-        report_card_id for report_card_id, _ in report_cards
-    ]
-    if academic_term.term_type != AcademicTermType.ANNUAL:
-        return _compute_percentages_and_ranks(
-            session,
-            report_card_ids,
-            academic_term.term_type,
-        )
-
-    annual_totals_by_id = _compute_totals_by_report_card(
-        session,
-        report_card_ids,
-        academic_term.term_type,
     )
-    half_yearly_term = session.exec(
-        select(AcademicTerm).where(
-            AcademicTerm.academic_session_id
-            == academic_term.academic_session_id,
-            AcademicTerm.term_type == AcademicTermType.HALF_YEARLY,
+    half_yearly_term = (
+        get_half_yearly_term(session, academic_term.academic_session_id)
+        if academic_term.term_type == AcademicTermType.ANNUAL
+        else None
+    )
+    if half_yearly_term:
+        half_yearly_report_card = aliased(ReportCard)
+        report_cards = report_cards.union_all(
+            select(
+                col(ReportCard.id),
+                col(half_yearly_report_card.id),
+            )
+            .join(
+                Enrollment,
+                col(Enrollment.id) == col(ReportCard.enrollment_id),
+            )
+            .join(
+                half_yearly_report_card,
+                and_(
+                    col(half_yearly_report_card.enrollment_id)
+                    == col(ReportCard.enrollment_id),
+                    col(half_yearly_report_card.academic_term_id)
+                    == half_yearly_term.id,
+                ),
+            )
+            .where(
+                Enrollment.academic_class_id == academic_class_id,
+                ReportCard.academic_term_id == academic_term.id,
+            )
         )
-    ).first()
-    if not half_yearly_term:
-        return _compute_percentages_and_ranks_from_totals(
-            annual_totals_by_id
+    counted = report_cards.subquery("counted")
+    totals = (
+        select(
+            counted.c.report_card_id,
+            func.sum(_subject_total(academic_term.term_type)).label(
+                "total_marks"
+            ),
+            func.count(col(ReportCardSubject.id)).label("subject_count"),
         )
-
-    enrollment_ids = [
-        enrollment_id for _, enrollment_id in report_cards
-    ]
-    half_yearly_report_cards_raw = session.exec(
-        select(ReportCard.id, ReportCard.enrollment_id).where(
-            ReportCard.academic_term_id == half_yearly_term.id,
-            col(ReportCard.enrollment_id).in_(enrollment_ids),
+        .join(
+            ReportCardSubject,
+            col(ReportCardSubject.report_card_id)
+            == counted.c.counted_report_card_id,
         )
-    ).all()
-    half_yearly_report_card_ids_by_enrollment = {
-        enrollment_id: report_card_id
-        for report_card_id, enrollment_id in half_yearly_report_cards_raw
-        if report_card_id is not None and enrollment_id is not None
-    }
-    half_yearly_totals_by_id = _compute_totals_by_report_card(
-        session,
-        list(half_yearly_report_card_ids_by_enrollment.values()),
-        half_yearly_term.term_type,
-    )
-
-    combined_totals_by_id: dict[UUID, tuple[int, int]] = {}
-    for annual_report_card_id, enrollment_id in report_cards:
-        annual_total, annual_count = annual_totals_by_id.get(
-            annual_report_card_id, (0, 0)
+        .join(
+            AcademicClassSubject,
+            col(AcademicClassSubject.id)
+            == col(ReportCardSubject.academic_class_subject_id),
         )
-        half_yearly_report_card_id = (
-            half_yearly_report_card_ids_by_enrollment.get(enrollment_id)
+        .where(col(AcademicClassSubject.is_additional) == False)
+        .group_by(counted.c.report_card_id)
+        .subquery("totals")
+    )
+    percentage = func.ceil(
+        totals.c.total_marks / totals.c.subject_count.cast(Numeric)
+    )
+    rows = session.exec(
+        select(
+            totals.c.report_card_id,
+            percentage.cast(Integer),
+            func.rank().over(order_by=percentage.desc()),
         )
-        half_yearly_total, half_yearly_count = (
-            half_yearly_totals_by_id.get(
-                half_yearly_report_card_id, (0, 0)
-            )
-            if half_yearly_report_card_id
-            else (0, 0)
-        )
-        total_marks = annual_total + half_yearly_total
-        subject_count = annual_count + half_yearly_count
-        if subject_count:
-            combined_totals_by_id[annual_report_card_id] = (
-                total_marks,
-                subject_count,
-            )
+    ).all()
 
-    return _compute_percentages_and_ranks_from_totals(
-        combined_totals_by_id
-    )
+    percentages_by_id: dict[UUID, int] = {}
+    ranks_by_id: dict[UUID, int] = {}
+    for report_card_id, percentage_value, rank in rows:
+        percentages_by_id[report_card_id] = percentage_value
+        ranks_by_id[report_card_id] = rank
+    return percentages_by_id, ranks_by_id
 
 
 @router.patch("/{report_card_id}", response_model=ReportCardRead)
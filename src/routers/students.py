@@ -1,20 +1,38 @@
-from uuid import UUID
+from datetime import datetime, timezone
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import (APIRouter, Depends, File, HTTPException, Query,
+                     UploadFile)
 from sqlalchemy import func, or_
 from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, col, select
 
 from db import get_session
+from lib.csv_upload import bulk_upsert, iter_csv_rows, parse_date_value
+from lib.json_response import ModelJSONResponse
+from lib.thumbnail_pipeline import schedule_thumbnails
+from models.academic_class import AcademicClass
+from models.academic_session import AcademicSession
+from models.bulk_upload import BulkUploadRowError
 from models.enrollment import Enrollment, EnrollmentRead
-from models.student import (Student, StudentCreate, StudentListResponse,
-                            StudentRead, StudentUpdate)
+from models.student import (Student, StudentBulkUploadResponse,
+                            StudentCreate, StudentListResponse, StudentRead,
+                            StudentUpdate)
 
 router = APIRouter(
     prefix="/students",
     tags=["students"]
 )
 
+STUDENT_UPLOAD_COLUMNS = (
+    "registration_no",
+    "name",
+    "dob",
+    "father_name",
+    "mother_name",
+)
+STUDENT_UPDATE_COLUMNS = ("name", "dob", "father_name", "mother_name")
+
 
 @router.post("", response_model=StudentRead)
 def create_student(
@@ -35,6 +53,240 @@ def create_student(
     return db_student
 
 
+def _resolve_upload_class_id(
+    values: dict[str, str],
+    class_ids: set[UUID],
+    class_ids_by_name: dict[tuple[str, str], UUID],
+) -> UUID:
+    raw_class_id = values.get("academic_class_id")
+    if raw_class_id:
+        try:
+            class_id = UUID(raw_class_id)
+        except ValueError:
+            raise ValueError("Invalid academic class id")
+        if class_id not in class_ids:
+            raise ValueError("Academic class not found in this session")
+        return class_id
+    grade = values.get("grade") or values.get("class")
+    section = values.get("section")
+    if not grade or not section:
+        raise ValueError("Provide academic_class_id or grade and section")
+    class_id = class_ids_by_name.get((grade.upper(), section.upper()))
+    if class_id is None:
+        raise ValueError(f"Class {grade}-{section} not found in this session")
+    return class_id
+
+
+@router.post("/bulk-upload", response_model=StudentBulkUploadResponse)
+def bulk_upload_students(
+    academic_session_id: UUID = Query(...),
+    file: UploadFile = File(...),
+    dry_run: bool = Query(False),
+    session: Session = Depends(get_session),
+):
+    if not session.get(AcademicSession, academic_session_id):
+        raise HTTPException(
+            status_code=404, detail="Academic session not found"
+        )
+    classes = session.exec(
+        select(AcademicClass.id, AcademicClass.grade, AcademicClass.section)
+        .where(AcademicClass.academic_session_id == academic_session_id)
+    ).all()
+    class_ids = {class_id for class_id, _, _ in classes}
+    class_ids_by_name = {
+        (grade.strip().upper(), section.strip().upper()): class_id
+        for class_id, grade, section in classes
+    }
+    existing_students = {
+        row.registration_no: row
+        for row in session.exec(
+            select(
+                Student.id,
+                Student.registration_no,
+                Student.name,
+                Student.dob,
+                Student.father_name,
+                Student.mother_name,
+            )
+        ).all()
+    }
+    existing_enrollments = {
+        row.student_id: row
+        for row in session.exec(
+            select(
+                Enrollment.id,
+                Enrollment.student_id,
+                Enrollment.academic_class_id,
+                Enrollment.image,
+            ).where(Enrollment.academic_session_id == academic_session_id)
+        ).all()
+    }
+
+    now = datetime.now(timezone.utc)
+    errors: list[BulkUploadRowError] = []
+    seen_rows: dict[str, int] = {}
+    student_rows: list[dict] = []
+    enrollment_rows: list[dict] = []
+    new_images: list[str] = []
+    counts = {
+        "total_rows": 0,
+        "students_created": 0,
+        "students_updated": 0,
+        "students_unchanged": 0,
+        "enrollments_created": 0,
+        "enrollments_updated": 0,
+        "enrollments_unchanged": 0,
+    }
+    for row_number, values in iter_csv_rows(file, STUDENT_UPLOAD_COLUMNS):
+        counts["total_rows"] += 1
+        registration_no = values.get("registration_no") or None
+        row_errors = [
+            BulkUploadRowError(
+                row=row_number,
+                key=registration_no,
+                field=column,
+                message="Value is required",
+            )
+            for column in STUDENT_UPLOAD_COLUMNS
+            if not values.get(column)
+        ]
+        if registration_no and registration_no in seen_rows:
+            row_errors.append(
+                BulkUploadRowError(
+                    row=row_number,
+                    key=registration_no,
+                    field="registration_no",
+                    message="Duplicate registration number in file "
+                    f"(first seen on row {seen_rows[registration_no]})",
+                )
+            )
+        if registration_no:
+            seen_rows.setdefault(registration_no, row_number)
+        dob = None
+        if values.get("dob"):
+            try:
+                dob = parse_date_value(values["dob"])
+            except ValueError as exc:
+                row_errors.append(
+                    BulkUploadRowError(
+                        row=row_number,
+                        key=registration_no,
+                        field="dob",
+                        message=str(exc),
+                    )
+                )
+        try:
+            class_id = _resolve_upload_class_id(
+                values, class_ids, class_ids_by_name
+            )
+        except ValueError as exc:
+            row_errors.append(
+                BulkUploadRowError(
+                    row=row_number,
+                    key=registration_no,
+                    field="academic_class_id",
+                    message=str(exc),
+                )
+            )
+        if row_errors:
+            errors.extend(row_errors)
+            continue
+
+        student_values = {
+            "registration_no": registration_no,
+            "name": values["name"],
+            "dob": dob,
+            "father_name": values["father_name"],
+            "mother_name": values["mother_name"],
+        }
+        existing_student = existing_students.get(registration_no)
+        if existing_student is None:
+            student_id = uuid4()
+            student_rows.append(
+                {"id": student_id, "created_at": now, **student_values}
+            )
+            counts["students_created"] += 1
+        else:
+            student_id = existing_student.id
+            if any(
+                getattr(existing_student, column) != student_values[column]
+                for column in STUDENT_UPDATE_COLUMNS
+            ):
+                student_rows.append(
+                    {"id": student_id, "created_at": now, **student_values}
+                )
+                counts["students_updated"] += 1
+            else:
+                counts["students_unchanged"] += 1
+
+        existing_enrollment = existing_enrollments.get(student_id)
+        image = values.get("image") or (
+            existing_enrollment.image if existing_enrollment else None
+        )
+        if image and (
+            existing_enrollment is None or existing_enrollment.image != image
+        ):
+            new_images.append(image)
+        enrollment_values = {
+            "student_id": student_id,
+            "academic_session_id": academic_session_id,
+            "academic_class_id": class_id,
+            "image": image,
+        }
+        if existing_enrollment is None:
+            enrollment_rows.append(
+                {"id": uuid4(), "created_at": now, **enrollment_values}
+            )
+            counts["enrollments_created"] += 1
+        elif (
+            existing_enrollment.academic_class_id != class_id
+            or existing_enrollment.image != image
+        ):
+            enrollment_rows.append(
+                {
+                    "id": existing_enrollment.id,
+                    "created_at": now,
+                    **enrollment_values,
+                }
+            )
+            counts["enrollments_updated"] += 1
+        else:
+            counts["enrollments_unchanged"] += 1
+
+    committed = False
+    if not errors and not dry_run:
+        try:
+            bulk_upsert(
+                session,
+                Student,
+                student_rows,
+                conflict_columns=("registration_no",),
+                update_columns=STUDENT_UPDATE_COLUMNS,
+            )
+            bulk_upsert(
+                session,
+                Enrollment,
+                enrollment_rows,
+                conflict_columns=("student_id", "academic_session_id"),
+                update_columns=("academic_class_id", "image"),
+            )
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            raise HTTPException(
+                status_code=409,
+                detail="Students changed during upload, please retry",
+            )
+        committed = True
+        # Core upserts skip the ORM hook that picks up new photos.
+        schedule_thumbnails(
+            new_images, session.info.get("db_namespace"), regenerate=True
+        )
+    return StudentBulkUploadResponse(
+        **counts, committed=committed, errors=errors
+    )
+
+
 @router.get("", response_model=StudentListResponse)
 def list_students(
     session: Session = Depends(get_session),
@@ -125,7 +377,7 @@ def list_students(
             student.enrollment = enrollment_by_student_id.get(
                 student.id
             )
-    return StudentListResponse(total=total, items=items)
+    return ModelJSONResponse(StudentListResponse(total=total, items=items))
 
 
 @router.get("/{student_id}", response_model=StudentRead)
@@ -2,14 +2,24 @@ import os
 import re
 import subprocess
 from pathlib import Path
+from typing import Callable
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel
 from sqlalchemy import text
 from sqlmodel import Session
 
-from db import get_session
+from db import engine, get_session
 from lib.env import env
+from lib.test_namespaces import (DEFAULT_LEASE_SECONDS, DEFAULT_POOL_SIZE,
+                                 clone_namespace, ensure_template,
+                                 lease_namespace, pool_status,
+                                 release_namespace, schedule_refill,
+                                 seed_folder_path)
+from lib.test_operations import (Log, OperationError, get_job,
+                                 migrate_namespace, refresh_namespace,
+                                 reset_namespace, run_operation,
+                                 seed_namespace, start_job, verify_namespace)
 
 router = APIRouter(prefix="/test", tags=["test"])
 
@@ -34,26 +44,70 @@ class NamespaceDeleteResult(BaseModel):
     deleted: list[str]
 
 
-def _run_command(
-    command: list[str], namespace: str | None = None
-) -> CommandResult:
-    command_env = os.environ.copy()
+class NamespaceLease(BaseModel):
+    namespace: str
+    folder: str
+    template: str
+    state: str
+    lease_id: str
+    leased_at: str
+    expires_at: str
+
+
+class TestJob(BaseModel):
+    id: str
+    command: str
+    namespace: str | None
+    status: str
+    output: str
+    created_at: str
+    started_at: str | None
+    finished_at: str | None
+
+
+class PoolSlot(BaseModel):
+    namespace: str
+    folder: str
+    template: str
+    index: int
+    overflow: bool
+    state: str
+    lease_id: str | None = None
+    expires_at: str | None = None
+
+
+class PoolStatus(BaseModel):
+    folder: str
+    slots: list[PoolSlot]
+
+
+def _validate_namespace(namespace: str | None) -> str | None:
     if "localhost" not in env.DATABASE_URL and not namespace:
         raise HTTPException(
             status_code=400,
             detail="DB namespace required for non-local database.",
         )
-    if namespace:
-        normalized = namespace.strip()
-        if (
-            not normalized
-            or not _NAMESPACE_RE.fullmatch(normalized)
-            or normalized in _BLOCKED_NAMESPACES
-        ):
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid DB namespace.",
-            )
+    if not namespace:
+        return None
+    normalized = namespace.strip()
+    if (
+        not normalized
+        or not _NAMESPACE_RE.fullmatch(normalized)
+        or normalized in _BLOCKED_NAMESPACES
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid DB namespace.",
+        )
+    return normalized
+
+
+def _run_command(
+    command: list[str], namespace: str | None = None
+) -> CommandResult:
+    command_env = os.environ.copy()
+    normalized = _validate_namespace(namespace)
+    if normalized:
         command_env["DB_NAMESPACE"] = normalized
     result = subprocess.run(
         command,
@@ -115,52 +169,187 @@ def purge_namespaces(session: Session = Depends(get_session)):
     return NamespaceDeleteResult(deleted=deleted)
 
 
-@router.post("/reset_db", response_model=CommandResult)
-def reset_db(request: Request):
+def _execute(
+    command_name: str,
+    namespace: str | None,
+    operation: Callable[[Log], None],
+    background: bool,
+) -> CommandResult | TestJob:
+    normalized = _validate_namespace(namespace)
+    if background:
+        return TestJob(**start_job(command_name, normalized, operation))
+    try:
+        output = run_operation(command_name, normalized, operation)
+    except OperationError as exc:
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "message": COMMAND_ERROR_MESSAGE,
+                "command": exc.command,
+                "output": exc.output,
+            },
+        )
+    return CommandResult(status="ok", command=command_name, output=output)
+
+
+@router.get("/jobs/{job_id}", response_model=TestJob)
+def get_test_job(job_id: str):
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/reset_db", response_model=CommandResult | TestJob)
+def reset_db(request: Request, background: bool = Query(False)):
     namespace = getattr(request.state, "db_namespace", None)
-    result = _run_command(["make", "reset_db"], namespace)
-    return result
+    return _execute(
+        "reset_db",
+        namespace,
+        lambda log: reset_namespace(namespace, log),
+        background,
+    )
 
 
-@router.post("/migrate_db", response_model=CommandResult)
-def migrate_db(request: Request):
+@router.post("/migrate_db", response_model=CommandResult | TestJob)
+def migrate_db(request: Request, background: bool = Query(False)):
     namespace = getattr(request.state, "db_namespace", None)
-    return _run_command(["make", "migrate_db"], namespace)
+    return _execute(
+        "migrate_db",
+        namespace,
+        lambda log: migrate_namespace(namespace, log),
+        background,
+    )
 
 
-@router.post("/seed_db", response_model=CommandResult)
-def seed_db(request: Request, folder: str = Query(..., min_length=1)):
+@router.post("/seed_db", response_model=CommandResult | TestJob)
+def seed_db(
+    request: Request,
+    folder: str = Query(..., min_length=1),
+    background: bool = Query(False),
+):
+    seed_folder_path(folder)
     namespace = getattr(request.state, "db_namespace", None)
-    return _run_command(["make", "seed_db", folder], namespace)
+    return _execute(
+        f"seed_db {folder}",
+        namespace,
+        lambda log: seed_namespace(namespace, folder, log),
+        background,
+    )
+
+
+def _build_template(folder: str, template: str) -> None:
+    run_operation(
+        f"refresh_db {folder}",
+        template,
+        lambda log: refresh_namespace(template, folder, log),
+    )
+
+
+def _clone_from_template(folder: str, namespace: str, log: Log) -> None:
+    template = ensure_template(
+        folder,
+        lambda template_name: _build_template(folder, template_name),
+    )
+    with engine.begin() as connection:
+        tables = clone_namespace(connection, template, namespace)
+    log(f"Cloned {len(tables)} tables from {template}.")
+
+
+def _pool_builder(folder: str):
+    seed_folder_path(folder)
+    return lambda template_name: _build_template(folder, template_name)
+
+
+@router.get("/namespaces/pool", response_model=PoolStatus)
+def get_namespace_pool(folder: str = Query(..., min_length=1)):
+    seed_folder_path(folder)
+    return PoolStatus(folder=folder, slots=pool_status(folder))
+
+
+@router.post("/namespaces/pool", response_model=PoolStatus)
+def warm_namespace_pool(
+    folder: str = Query(..., min_length=1),
+    size: int = Query(DEFAULT_POOL_SIZE, ge=0, le=32),
+):
+    schedule_refill(folder, _pool_builder(folder), size)
+    return PoolStatus(folder=folder, slots=pool_status(folder))
 
 
-@router.post("/refresh_db", response_model=CommandResult)
-def refresh_db(request: Request, folder: str = Query(..., min_length=1)):
+@router.post("/namespaces/lease", response_model=NamespaceLease)
+def lease_pool_namespace(
+    folder: str = Query(..., min_length=1),
+    lease_seconds: int = Query(DEFAULT_LEASE_SECONDS, ge=1),
+):
+    build = _pool_builder(folder)
+    lease = lease_namespace(folder, build, lease_seconds)
+    schedule_refill(folder, build)
+    return lease
+
+
+@router.post(
+    "/namespaces/{namespace}/release", response_model=NamespaceLease
+)
+def release_pool_namespace(
+    namespace: str,
+    folder: str = Query(..., min_length=1),
+    lease_id: str = Query(..., min_length=1),
+):
+    build = _pool_builder(folder)
+    released = release_namespace(folder, namespace, lease_id)
+    schedule_refill(folder, build)
+    return released
+
+
+@router.post("/refresh_db", response_model=CommandResult | TestJob)
+def refresh_db(
+    request: Request,
+    folder: str = Query(..., min_length=1),
+    use_template: bool = Query(True),
+    background: bool = Query(False),
+):
+    seed_folder_path(folder)
     namespace = getattr(request.state, "db_namespace", None)
-    return _run_command(["make", "refresh_db", folder], namespace)
+    normalized = _validate_namespace(namespace)
+
+    def operation(log: Log) -> None:
+        if normalized and use_template:
+            _clone_from_template(folder, normalized, log)
+        else:
+            refresh_namespace(normalized, folder, log)
 
+    return _execute(f"refresh_db {folder}", normalized, operation, background)
 
-@router.post("/verify_seed", response_model=CommandResult)
+
+@router.post("/verify_seed", response_model=CommandResult | TestJob)
 def verify_seed(
     request: Request,
     folder: str = Query(..., min_length=1),
     logical_compare: bool = Query(False),
+    background: bool = Query(False),
 ):
-    command = ["make", "verify_seed"]
-    if logical_compare:
-        command.append("LOGICAL_COMPARE=1")
-    command.append(folder)
+    seed_folder_path(folder)
     namespace = getattr(request.state, "db_namespace", None)
-    return _run_command(command, namespace)
+    return _execute(
+        f"verify_seed {folder}",
+        namespace,
+        lambda log: verify_namespace(namespace, folder, logical_compare, log),
+        background,
+    )
 
 
 @router.post("/populate_seed", response_model=CommandResult)
 def populate_seed(
     request: Request,
     folder: str = Query(..., min_length=1),
+    incremental: bool = Query(False),
 ):
+    command = ["make", "populate_seed"]
+    if incremental:
+        command.append("INCREMENTAL=1")
+    command.append(folder)
     namespace = getattr(request.state, "db_namespace", None)
-    return _run_command(["make", "populate_seed", folder], namespace)
+    return _run_command(command, namespace)
 
 
 @router.post("/firebase_custom_token", response_model=CommandResult)
@@ -0,0 +1,32 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "migration_scripts"))
+
+from json_stream import CHUNK_SIZE, iter_json  # noqa: E402
+
+
+# The string fills the first chunk up to `before` characters short of its
+# end, so the number that follows is split across the chunk boundary.
+@pytest.mark.parametrize("number", ["12.5e1", "12.5", "-7", "3E+2", "0.25"])
+@pytest.mark.parametrize("before", range(0, 8))
+def test_number_across_chunk_boundary(tmp_path, number, before):
+    padding = "a" * (CHUNK_SIZE - len('["",') - before)
+    path = tmp_path / "items.json"
+    path.write_text(f'["{padding}",{number}]')
+
+    values = [value for _, value, _ in iter_json(path)]
+
+    assert values == [padding, json.loads(number)]
+
+
+def test_number_at_end_of_file(tmp_path):
+    path = tmp_path / "items.json"
+    path.write_text('{"a": [1, 2.5e3]}')
+
+    values = [value for _, value, _ in iter_json(path, "a")]
+
+    assert values == [1, 2500.0]